@@ -1,7 +1,7 @@
 import base64
 import logging
-import random
 import uuid
+from pathlib import PurePosixPath
 from typing import Optional
 
 import requests
@@ -11,11 +11,16 @@ from generate_post.core.domain.interfaces.image_generator_service import (
 )
 from generate_post.config.env_config import EnvConfig
 from generate_post.config.constants import ASSETS_DIR
+from generate_post.utils.circuit_breaker import CircuitOpenError
+from generate_post.utils.hedging import Cancellation, HedgeBudget, Hedger
+from generate_post.utils.model_router import ModelRouter
+from generate_post.utils.response_cache import create_session
 from generate_post.utils.retry_decorator import retry
 
 logger = logging.getLogger(__name__)
 
 _IMAGE_ASSET_PREFIX = "/assets/img/posts"
+_CF_HOST = "api.cloudflare.com"
 
 _MODEL_CONFIGS = {
     "black-forest-labs/flux-1-schnell": lambda prompt: {
@@ -46,12 +51,22 @@ _MODEL_CONFIGS = {
 _BINARY_SIGNATURES = (b"\x89PNG", b"\xff\xd8\xff")
 
 
+def _cache_alias(url: str, body: dict) -> tuple:
+    """Chave de cache sem o modelo: a conta e o prompt, ignorando os parâmetros."""
+    return url.split("/ai/run/", 1)[0], body.get("prompt")
+
+
 class CloudflareImageService(ImageGeneratorServiceInterface):
     """Implementação do serviço de geração de imagens usando a API Cloudflare AI"""
 
-    def __init__(self, env_config: Optional[EnvConfig] = None):
+    def __init__(self, env_config: Optional[EnvConfig] = None, hedge: bool = False):
         self._env = env_config or EnvConfig.from_env()
-        self._session = requests.Session()
+        self._router = ModelRouter(
+            "cloudflare-image", _MODEL_CONFIGS, max_timeout=120, host=_CF_HOST
+        )
+        self._hedger = Hedger(
+            self._router, HedgeBudget("cloudflare-image") if hedge else None
+        )
 
     def create_image_prompt(
         self, title: str, categories: str, tags: str, content_preview: str
@@ -69,7 +84,6 @@ class CloudflareImageService(ImageGeneratorServiceInterface):
             f"No text, no watermarks, no logos, no people."
         )
 
-    @retry(max_attempts=3, delay=3)
     def generate_image(
         self, title: str, categories: str, tags: str, content_preview: str
     ) -> Optional[str]:
@@ -85,55 +99,66 @@ class CloudflareImageService(ImageGeneratorServiceInterface):
         prompt = self.create_image_prompt(title, categories, tags, content_preview)
         logger.info("Prompt da imagem: %s...", prompt[:100])
 
-        model = random.choice(list(_MODEL_CONFIGS))
-        logger.info("Modelo de imagem selecionado: %s", model)
+        try:
+            return self._generate(prompt)
+        except CircuitOpenError as e:
+            # Cloudflare fora do ar: o post sai com a imagem padrão
+            logger.warning("%s. Pulando geração de imagem.", e)
+            return None
+
+    @retry(max_attempts=3, delay=3)
+    def _generate(self, prompt: str) -> str:
+        image_bytes = self._hedger.run(
+            lambda model, cancel: self._run_model(model, prompt, cancel)
+        )
+        return self._save_image(image_bytes)
 
+    def _run_model(self, model: str, prompt: str, cancel: Cancellation) -> bytes:
         req_json = _MODEL_CONFIGS[model](prompt)
 
         url = (
-            f"https://api.cloudflare.com/client/v4/accounts/"
+            f"https://{_CF_HOST}/client/v4/accounts/"
             f"{self._env.cf_account_id}/ai/run/@cf/{model}"
         )
 
-        response = self._session.post(
-            url,
-            headers={
-                "Authorization": f"Bearer {self._env.cf_api_token}",
-                "Content-Type": "application/json",
-            },
-            json=req_json,
-            timeout=120,
-        )
+        # Sessão própria: se outra tentativa vencer o hedge, a conexão cai.
+        with cancel.attach(
+            create_session(self._env.http_cache, alias=_cache_alias)
+        ) as session:
+            response = session.post(
+                url,
+                headers={
+                    "Authorization": f"Bearer {self._env.cf_api_token}",
+                    "Content-Type": "application/json",
+                },
+                json=req_json,
+                timeout=self._router.timeout(model),
+            )
 
         if response.status_code != 200:
             raise requests.RequestException(
                 f"Erro ao gerar imagem. Status: {response.status_code}, "
-                f"Resposta: {response.text[:500]}"
+                f"Resposta: {response.text[:500]}",
+                response=response,
             )
 
-        return self._save_response_image(response)
-
-    def _save_response_image(self, response: requests.Response) -> str:
-        """Processa a resposta e salva a imagem no disco."""
-        image_filename = f"{uuid.uuid4()}.png"
-        image_path = ASSETS_DIR / image_filename
-        ASSETS_DIR.mkdir(parents=True, exist_ok=True)
+        return self._response_image(response)
 
+    def _response_image(self, response: requests.Response) -> bytes:
+        """Extrai os bytes da imagem da resposta (binária ou JSON com base64)."""
         content_type = response.headers.get("Content-Type", "")
 
         # Resposta binária direta
         if self._is_binary_image(content_type, response.content):
-            image_path.write_bytes(response.content)
-            logger.info("Imagem binária salva: %s", image_path)
-            return f"{_IMAGE_ASSET_PREFIX}/{image_filename}"
+            logger.info("Imagem binária recebida")
+            return response.content
 
         # Resposta JSON com base64
         try:
             data = response.json()
         except ValueError:
-            image_path.write_bytes(response.content)
-            logger.warning("Resposta não-JSON salva como imagem: %s", image_path)
-            return f"{_IMAGE_ASSET_PREFIX}/{image_filename}"
+            logger.warning("Resposta não-JSON tratada como imagem")
+            return response.content
 
         if not data.get("success", False):
             raise requests.RequestException(f"Erro na resposta da API: {data}")
@@ -145,8 +170,26 @@ class CloudflareImageService(ImageGeneratorServiceInterface):
             )
 
         image_b64 = result.get("image", result) if isinstance(result, dict) else result
-        image_path.write_bytes(base64.b64decode(image_b64))
-        logger.info("Imagem base64 decodificada e salva: %s", image_path)
+        logger.info("Imagem base64 decodificada")
+        return base64.b64decode(image_b64)
+
+    def image_exists(self, image_path: str) -> bool:
+        """Verifica se o arquivo da imagem ainda está em ASSETS_DIR."""
+        return (ASSETS_DIR / PurePosixPath(image_path).name).is_file()
+
+    def delete_image(self, image_path: str) -> None:
+        """Apaga de ASSETS_DIR uma imagem que não vai para nenhum post."""
+        (ASSETS_DIR / PurePosixPath(image_path).name).unlink(missing_ok=True)
+        logger.info("Imagem descartada removida: %s", image_path)
+
+    @staticmethod
+    def _save_image(image_bytes: bytes) -> str:
+        """Salva a imagem no disco e retorna o caminho relativo ao site."""
+        image_filename = f"{uuid.uuid4()}.png"
+        image_path = ASSETS_DIR / image_filename
+        ASSETS_DIR.mkdir(parents=True, exist_ok=True)
+        image_path.write_bytes(image_bytes)
+        logger.info("Imagem salva: %s", image_path)
         return f"{_IMAGE_ASSET_PREFIX}/{image_filename}"
 
     @staticmethod
@@ -0,0 +1,177 @@
+import re
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, List, Set, Tuple
+
+# Áreas pesquisadas em paralelo no modo fan-out do digest
+TOPICS: Dict[str, str] = {
+    "IA": "inteligência artificial e machine learning (modelos, lançamentos, pesquisa, regulação)",
+    "DevTools": "lançamentos de linguagens, frameworks e ferramentas de programação",
+    "Cloud": "atualizações de grandes plataformas (GitHub, AWS, Google Cloud, Azure, etc.)",
+    "Segurança": "segurança cibernética e vulnerabilidades relevantes",
+    "Open source": "open source e comunidade dev",
+}
+
+# Manchetes com pelo menos essa fração de palavras em comum são a mesma notícia
+DUPLICATE_SIMILARITY = 0.6
+
+_ITEM_RE = re.compile(r"^\s*(?:[-*•]|\d+[.)])\s+(.*\S)")
+_WORD_RE = re.compile(r"\w+")
+_MARKER_RE = re.compile(r"\[(\d+(?:\s*,\s*\d+)*)\](?!\()")
+
+
+@dataclass
+class NewsItem:
+    """Uma notícia encontrada na pesquisa de um tópico, com suas fontes."""
+
+    topic: str
+    text: str
+    sources: List[Dict[str, str]] = field(default_factory=list)
+
+    @property
+    def headline(self) -> str:
+        return self.text.split(":", 1)[0].replace("*", "").strip()
+
+
+def research_prompt(description: str, start: str, end: str) -> str:
+    return f"""Use o Google Search para encontrar as notícias mais relevantes publicadas entre {start} e {end} sobre {description}.
+
+Responda apenas com uma lista de 3 a 6 notícias, uma por linha, no formato:
+- Manchete: resumo factual em uma ou duas frases, com datas, versões e números quando houver
+
+Não inclua URLs, introdução nem conclusão. Use apenas notícias reais encontradas na busca."""
+
+
+def parse_items(topic: str, text: str, grounding: Dict) -> List[NewsItem]:
+    """Extrai as notícias (itens de lista) e as fontes citadas em cada linha.
+
+    Cada groundingSupport é atribuído à linha onde termina o seu segmento
+    (`endIndex`, em bytes UTF-8 do texto).
+    """
+    chunks = grounding.get("groundingChunks", [])
+    lines: List[Tuple[int, int, str]] = []
+    offset = 0
+    for line in text.splitlines(keepends=True):
+        size = len(line.encode("utf-8"))
+        lines.append((offset, offset + size, line))
+        offset += size
+
+    cited: Dict[int, List[int]] = defaultdict(list)
+    for support in grounding.get("groundingSupports", []):
+        end = support.get("segment", {}).get("endIndex", 0)
+        for i, (low, high, _) in enumerate(lines):
+            if low < end <= high:
+                cited[i].extend(support.get("groundingChunkIndices", []))
+                break
+
+    items = []
+    for i, (_, _, line) in enumerate(lines):
+        match = _ITEM_RE.match(line)
+        if not match:
+            continue
+        sources: List[Dict[str, str]] = []
+        for index in cited.get(i, []):
+            web = chunks[index].get("web", {}) if index < len(chunks) else {}
+            uri = web.get("uri", "").strip()
+            if uri and all(s["uri"] != uri for s in sources):
+                sources.append({"title": web.get("title") or uri, "uri": uri})
+        items.append(NewsItem(topic, match.group(1), sources))
+    return items
+
+
+def resolve_items(items: List[NewsItem], resolved: Dict[str, str]) -> None:
+    """Troca as URIs das fontes pelas URLs finais, sem repetir fontes na notícia."""
+    for item in items:
+        sources: Dict[str, Dict[str, str]] = {}
+        for source in item.sources:
+            url = resolved.get(source["uri"], source["uri"])
+            sources.setdefault(url, {**source, "uri": url})
+        item.sources = list(sources.values())
+
+
+def merge_items(items: List[NewsItem]) -> Tuple[List[NewsItem], List[Dict[str, str]]]:
+    """Remove notícias repetidas entre tópicos e numera as fontes.
+
+    A mesma notícia costuma aparecer em mais de um tópico (um modelo de IA
+    lançado numa cloud, por exemplo); a primeira ocorrência fica e recebe as
+    fontes das demais. Devolve as notícias e a lista global de fontes, na
+    ordem em que os números `[n]` serão usados.
+    """
+    merged: List[NewsItem] = []
+    words: List[set] = []
+    for item in items:
+        item_words = set(_WORD_RE.findall(item.headline.lower()))
+        for existing, existing_words in zip(merged, words):
+            if _similarity(item_words, existing_words) >= DUPLICATE_SIMILARITY:
+                known = {s["uri"] for s in existing.sources}
+                existing.sources += [s for s in item.sources if s["uri"] not in known]
+                break
+        else:
+            merged.append(item)
+            words.append(item_words)
+
+    sources: List[Dict[str, str]] = []
+    seen: set[str] = set()
+    for item in merged:
+        for source in item.sources:
+            if source["uri"] not in seen:
+                seen.add(source["uri"])
+                sources.append(source)
+    return merged, sources
+
+
+def drop_covered(
+    items: List[NewsItem], headlines: List[str], urls: Set[str]
+) -> List[NewsItem]:
+    """Remove notícias já cobertas em resumos anteriores.
+
+    Uma notícia é repetida se a manchete se parece com uma já publicada
+    (mesmo critério de `merge_items`) ou se todas as suas fontes já foram
+    citadas. Se nada sobrar, devolve as notícias originais.
+    """
+    past = [set(_WORD_RE.findall(h.lower())) for h in headlines]
+    fresh = []
+    for item in items:
+        item_words = set(_WORD_RE.findall(item.headline.lower()))
+        item_urls = {s["uri"] for s in item.sources}
+        if item_urls and item_urls <= urls:
+            continue
+        if any(
+            _similarity(item_words, words) >= DUPLICATE_SIMILARITY for words in past
+        ):
+            continue
+        fresh.append(item)
+    return fresh or items
+
+
+def format_items(items: List[NewsItem], sources: List[Dict[str, str]]) -> str:
+    """Lista as notícias para a síntese, com os números das fontes de cada uma."""
+    number = {source["uri"]: i for i, source in enumerate(sources, 1)}
+    lines = []
+    for item in items:
+        markers = "".join(f"[{number[s['uri']]}]" for s in item.sources)
+        lines.append(f"- ({item.topic}) {item.text} {markers}".rstrip())
+    return "\n".join(lines)
+
+
+def link_citations(text: str, sources: List[Dict[str, str]]) -> str:
+    """Troca os marcadores `[n]` (ou `[n, m]`) da síntese por `[n](url)`.
+
+    Números sem fonte correspondente são removidos.
+    """
+
+    def replace(match: re.Match) -> str:
+        links = []
+        for number in match.group(1).split(","):
+            n = int(number)
+            if 1 <= n <= len(sources):
+                links.append(f"[{n}]({sources[n - 1]['uri']})")
+        return " ".join(links)
+
+    return _MARKER_RE.sub(replace, text)
+
+
+def _similarity(a: set, b: set) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
@@ -1,15 +1,34 @@
 import logging
-import random
 import re
 import requests
 from pathlib import PurePosixPath
-from typing import Dict, Optional
+from typing import Callable, Dict, Optional
 from urllib.parse import quote
 
+from generate_post.adapters.api.gemini_context_cache import (
+    GeminiContextCache,
+    build_request,
+    log_usage,
+)
+from generate_post.adapters.api.gemini_continuation import (
+    Generation,
+    continue_truncated,
+)
+from generate_post.adapters.api.gemini_streaming import (
+    GEMINI_HOST,
+    StreamingPostParser,
+    cache_alias,
+    stream_text,
+    stream_url,
+)
 from generate_post.core.domain.interfaces.content_generator_service import (
     ContentGeneratorServiceInterface,
 )
+from generate_post.config.constants import STATE_DIR
 from generate_post.config.env_config import EnvConfig
+from generate_post.utils.hedging import Cancellation, HedgeBudget, Hedger
+from generate_post.utils.model_router import ModelRouter
+from generate_post.utils.response_cache import REPLAY, create_session
 from generate_post.utils.retry_decorator import retry
 
 logger = logging.getLogger(__name__)
@@ -36,18 +55,8 @@ _SYSTEM_INSTRUCTION = (
 _TITLE_CLEAN_RE = re.compile(r'["#]|(?:title:|Title:)')
 _LABEL_CLEAN_RE = re.compile(r"(?:categorias:|categories:|tags:|\[|\])", re.IGNORECASE)
 
-
-class GeminiContentService(ContentGeneratorServiceInterface):
-    """Implementação do serviço de geração de conteúdo usando a API Gemini"""
-
-    def __init__(self, env_config: Optional[EnvConfig] = None):
-        self._env = env_config or EnvConfig.from_env()
-        self._session = requests.Session()
-        self._session.headers["Content-Type"] = "application/json"
-
-    def create_prompt(self, last_post: Optional[Dict] = None) -> str:
-        """Cria um prompt para geração de conteúdo"""
-        base_prompt = """
+# Parte fixa do prompt (cacheável); o contexto do último post vem depois
+_BASE_PROMPT = """
 ## TAREFA
 Crie um post completo para blog de programação em formato Markdown.
 
@@ -81,6 +90,51 @@ Linha 5 em diante: Corpo do post em Markdown
 - Não use emojis em excesso
 """
 
+# Corpo do post gravado conforme chega no modo streaming
+_DRAFT_PATH = STATE_DIR / "drafts" / "post.md"
+
+
+class GeminiContentService(ContentGeneratorServiceInterface):
+    """Implementação do serviço de geração de conteúdo usando a API Gemini"""
+
+    def __init__(
+        self,
+        env_config: Optional[EnvConfig] = None,
+        stream: bool = False,
+        hedge: bool = False,
+        context_cache: bool = False,
+    ):
+        self._env = env_config or EnvConfig.from_env()
+        self._stream = stream
+        self._router = ModelRouter(
+            "gemini-content",
+            _MODELS,
+            max_timeout=120,
+            min_timeout=60,
+            host=GEMINI_HOST,
+        )
+        # No streaming o prazo do primeiro token já corta a cauda e duas
+        # tentativas disputariam o rascunho e a prévia; só a chamada
+        # bloqueante é duplicada.
+        self._hedger = Hedger(
+            self._router,
+            HedgeBudget("gemini-content") if hedge and not stream else None,
+        )
+        # No replay não há rede para criar o cachedContents
+        self._context_cache = (
+            GeminiContextCache(self._env.gemini_api_key)
+            if context_cache and self._env.http_cache != REPLAY
+            else None
+        )
+
+    def create_prompt(self, last_post: Optional[Dict] = None) -> str:
+        """Cria um prompt para geração de conteúdo.
+
+        O template fixo vem primeiro e o contexto do último post no final,
+        para que o template possa ir para o cache de contexto.
+        """
+        base_prompt = _BASE_PROMPT
+
         if last_post:
             filename = last_post.get("filename", "")
             # Extract the stem (no dir, no .md) then strip YYYY-MM-DD- date prefix
@@ -103,47 +157,79 @@ Resumo do conteúdo anterior:
 
         return base_prompt
 
-    @retry(max_attempts=3, delay=5)
     def generate_content(self, prompt: str) -> str:
         """Gera conteúdo a partir de um prompt usando a API Gemini"""
-        self._env.validate_gemini()
+        return self._generate(prompt)
 
-        model_name = random.choice(_MODELS)
-        logger.info("Modelo selecionado: %s", model_name)
-
-        req_json = {
-            "systemInstruction": {"parts": [{"text": _SYSTEM_INSTRUCTION}]},
-            "contents": [{"parts": [{"text": prompt}]}],
-            "safetySettings": [
-                {
-                    "category": "HARM_CATEGORY_DANGEROUS_CONTENT",
-                    "threshold": "BLOCK_ONLY_HIGH",
-                }
-            ],
-            "generationConfig": {
-                "temperature": 0.9,
-                "maxOutputTokens": 8192,
-                "topP": 0.95,
-                "topK": 40,
-            },
-        }
+    def generate_content_with_preview(
+        self, prompt: str, on_preview: Callable[[Dict], None]
+    ) -> str:
+        """No modo streaming, a prévia sai com os primeiros caracteres do corpo."""
+        if not self._stream:
+            return super().generate_content_with_preview(prompt, on_preview)
+        return self._generate(prompt, on_preview)
 
-        url = (
-            f"https://generativelanguage.googleapis.com/v1beta/"
-            f"models/{model_name}:generateContent"
-        )
+    @retry(max_attempts=3, delay=5)
+    def _generate(
+        self, prompt: str, on_preview: Optional[Callable[[Dict], None]] = None
+    ) -> str:
+        self._env.validate_gemini()
 
-        response = self._session.post(
+        def call(model_name: str, cancel: Cancellation) -> str:
+            req_json = self._request_body(model_name, prompt)
+            with self._attempt_session(cancel) as session:
+                if not self._stream:
+                    return continue_truncated(
+                        self._request_content(model_name, req_json, session),
+                        req_json,
+                        lambda body: self._request_content(model_name, body, session),
+                        check=cancel.check,
+                    ).text
+
+                # As continuações alimentam o mesmo parser: o rascunho e a
+                # prévia enxergam um texto só.
+                parser = StreamingPostParser(
+                    self.parse_generated_content,
+                    draft_path=_DRAFT_PATH,
+                    on_preview=on_preview,
+                )
+                with parser:
+                    continue_truncated(
+                        self._stream_content(model_name, req_json, parser, session),
+                        req_json,
+                        lambda body: self._stream_content(
+                            model_name, body, parser, session
+                        ),
+                        check=cancel.check,
+                    )
+            logger.info("Rascunho do corpo salvo em %s", _DRAFT_PATH)
+            return parser.text
+
+        return self._hedger.run(call)
+
+    def _attempt_session(self, cancel: Cancellation) -> requests.Session:
+        """Sessão de uma tentativa; se ela perder o hedge, as conexões caem."""
+        session = create_session(self._env.http_cache, alias=cache_alias)
+        session.headers["Content-Type"] = "application/json"
+        return cancel.attach(session)
+
+    def _request_content(
+        self, model_name: str, req_json: Dict, session: requests.Session
+    ) -> Generation:
+        url = f"https://{GEMINI_HOST}/v1beta/models/{model_name}:generateContent"
+
+        response = session.post(
             url,
             headers={"x-goog-api-key": self._env.gemini_api_key},
             json=req_json,
-            timeout=120,
+            timeout=self._router.timeout(model_name),
         )
 
         if response.status_code != 200:
             raise requests.RequestException(
                 f"Falha ao gerar post. Status: {response.status_code}, "
-                f"Resposta: {response.text[:500]}"
+                f"Resposta: {response.text[:500]}",
+                response=response,
             )
 
         data = response.json()
@@ -151,7 +237,65 @@ Resumo do conteúdo anterior:
         if not candidates or "content" not in candidates[0]:
             raise ValueError(f"Formato de resposta inválido: {data}")
 
-        return candidates[0]["content"]["parts"][0]["text"]
+        log_usage(model_name, data.get("usageMetadata", {}))
+        return Generation(
+            text=candidates[0]["content"]["parts"][0]["text"],
+            finish_reason=candidates[0].get("finishReason"),
+        )
+
+    def _stream_content(
+        self,
+        model_name: str,
+        req_json: Dict,
+        parser: StreamingPostParser,
+        session: requests.Session,
+    ) -> Generation:
+        """Gera o post via streamGenerateContent, repassando o texto ao `parser`."""
+        generation = Generation(text="")
+        usage: Dict = {}
+
+        def on_event(event: Dict) -> None:
+            candidates = event.get("candidates") or [{}]
+            generation.finish_reason = candidates[0].get(
+                "finishReason", generation.finish_reason
+            )
+            usage.update(event.get("usageMetadata", {}))
+
+        for chunk in stream_text(
+            session,
+            stream_url(model_name),
+            headers={"x-goog-api-key": self._env.gemini_api_key},
+            req_json=req_json,
+            total_timeout=self._router.timeout(model_name),
+            on_event=on_event,
+        ):
+            generation.text += chunk
+            parser.feed(chunk)
+        log_usage(model_name, usage)
+        return generation
+
+    def _request_body(self, model_name: str, prompt: str) -> Dict:
+        return build_request(
+            model_name,
+            prompt,
+            prefix=_BASE_PROMPT,
+            system_instruction=_SYSTEM_INSTRUCTION,
+            config={
+                "safetySettings": [
+                    {
+                        "category": "HARM_CATEGORY_DANGEROUS_CONTENT",
+                        "threshold": "BLOCK_ONLY_HIGH",
+                    }
+                ],
+                "generationConfig": {
+                    "temperature": 0.9,
+                    "maxOutputTokens": 8192,
+                    "topP": 0.95,
+                    "topK": 40,
+                },
+            },
+            context_cache=self._context_cache,
+        )
 
     def parse_generated_content(self, generated_text: str) -> Dict:
         """Extrai título, categorias, tags e conteúdo do texto gerado"""
@@ -0,0 +1,247 @@
+import hashlib
+import json
+import logging
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import requests
+
+from generate_post.adapters.api.gemini_streaming import GEMINI_HOST
+from generate_post.config.constants import STATE_DIR
+
+logger = logging.getLogger(__name__)
+
+CONTEXT_CACHES_PATH = STATE_DIR / "context_caches.json"
+
+# Vida de um cachedContents; renovada quando falta menos de REFRESH_MARGIN
+CONTEXT_CACHE_TTL = 3600  # segundos
+REFRESH_MARGIN = 10 * 60
+
+# Texto enviado quando o prompt não tem parte variável
+_EMPTY_TAIL = "Siga as instruções acima."
+
+_FILE_LOCK = threading.Lock()
+
+
+class GeminiContextCache:
+    """Reaproveita um `cachedContents` para a parte fixa dos prompts.
+
+    A instrução de sistema, o template do prompt e as tools vão para um cache
+    de contexto do modelo, identificado pelo modelo e pelo hash desse prefixo;
+    cada requisição manda só o final variável. Os nomes ficam em
+    `STATE_DIR/context_caches.json` e o TTL é renovado quando está para
+    vencer. Se a API recusar o prefixo por ser menor que o mínimo de tokens do
+    modelo, isso é lembrado para aquele modelo e prefixo (outro modelo tenta de
+    novo) e o prompt segue inteiro; outras falhas também caem no prompt
+    inteiro, sem derrubar a geração. Os templates atuais ficam abaixo do
+    mínimo, então hoje o cache sempre cai nesse caso.
+
+    Criar e renovar o cache usa uma sessão própria, nunca a do cache de
+    respostas (`--cache`): uma criação gravada devolveria o nome de um
+    cachedContents já vencido, e uma renovação gravada não renovaria nada.
+    """
+
+    def __init__(
+        self,
+        api_key: Optional[str],
+        ttl: int = CONTEXT_CACHE_TTL,
+        path: Path = CONTEXT_CACHES_PATH,
+        session: Optional[requests.Session] = None,
+    ):
+        self._session = session or requests.Session()
+        self._api_key = api_key
+        self._ttl = ttl
+        self._path = path
+        self._lock = threading.Lock()
+        # Prefixos que falharam nesta execução: não tenta de novo a cada retry
+        self._failed: set[str] = set()
+
+    def get(
+        self,
+        model_name: str,
+        system_instruction: str,
+        prefix: str,
+        tools: Optional[List[Dict]] = None,
+    ) -> Optional[str]:
+        """Nome do cachedContents (`cachedContents/...`) do prefixo, ou None."""
+        key = _cache_key(model_name, system_instruction, prefix, tools)
+        with self._lock:
+            if key in self._failed:
+                return None
+            entry = self._load().get(key, {})
+            if entry.get("too_small"):
+                return None
+
+            now = time.time()
+            name = entry.get("name")
+            expires = float(entry.get("expires", 0))
+            if name and expires - now > REFRESH_MARGIN:
+                return name
+            if name and expires > now and self._refresh(name):
+                self._save(key, {"name": name, "expires": now + self._ttl})
+                return name
+
+            return self._create(key, model_name, system_instruction, prefix, tools)
+
+    def _create(
+        self,
+        key: str,
+        model_name: str,
+        system_instruction: str,
+        prefix: str,
+        tools: Optional[List[Dict]],
+    ) -> Optional[str]:
+        body: Dict = {
+            "model": f"models/{model_name}",
+            "systemInstruction": {"parts": [{"text": system_instruction}]},
+            "contents": [{"role": "user", "parts": [{"text": prefix}]}],
+            "ttl": f"{self._ttl}s",
+        }
+        if tools:
+            body["tools"] = tools
+        try:
+            response = self._session.post(
+                f"https://{GEMINI_HOST}/v1beta/cachedContents",
+                headers={"x-goog-api-key": self._api_key},
+                json=body,
+                timeout=30,
+            )
+        except requests.RequestException as e:
+            logger.warning("Cache de contexto indisponível (%s); prompt inteiro", e)
+            self._failed.add(key)
+            return None
+
+        if response.status_code == 400 and "too small" in response.text.lower():
+            logger.info(
+                "Prefixo abaixo do mínimo de tokens do cache de contexto de %s; "
+                "enviando o prompt inteiro",
+                model_name,
+            )
+            self._save(key, {"too_small": True})
+            return None
+        if response.status_code != 200:
+            logger.warning(
+                "Falha ao criar cache de contexto para %s. Status: %d, Resposta: %s",
+                model_name,
+                response.status_code,
+                response.text[:300],
+            )
+            self._failed.add(key)
+            return None
+
+        data = response.json()
+        name = data["name"]
+        usage = data.get("usageMetadata", {})
+        logger.info(
+            "Cache de contexto %s criado para %s (%s tokens, TTL %ds)",
+            name,
+            model_name,
+            usage.get("totalTokenCount", "?"),
+            self._ttl,
+        )
+        self._save(key, {"name": name, "expires": time.time() + self._ttl})
+        return name
+
+    def _refresh(self, name: str) -> bool:
+        try:
+            response = self._session.patch(
+                f"https://{GEMINI_HOST}/v1beta/{name}",
+                params={"updateMask": "ttl"},
+                headers={"x-goog-api-key": self._api_key},
+                json={"ttl": f"{self._ttl}s"},
+                timeout=30,
+            )
+        except requests.RequestException as e:
+            logger.warning("Falha ao renovar cache de contexto %s: %s", name, e)
+            return False
+        if response.status_code != 200:
+            logger.info(
+                "Cache de contexto %s não renovado (status %d); criando outro",
+                name,
+                response.status_code,
+            )
+            return False
+        logger.info("Cache de contexto %s renovado por %ds", name, self._ttl)
+        return True
+
+    def _load(self) -> Dict:
+        try:
+            return json.loads(self._path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError):
+            logger.warning("Caches de contexto ilegíveis em %s; ignorando", self._path)
+            return {}
+
+    def _save(self, key: str, entry: Dict) -> None:
+        with _FILE_LOCK:
+            data = self._load()
+            data[key] = entry
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self._path.with_suffix(".tmp")
+            tmp.write_text(json.dumps(data, indent=1), encoding="utf-8")
+            tmp.replace(self._path)
+
+
+def build_request(
+    model_name: str,
+    prompt: str,
+    prefix: str,
+    system_instruction: str,
+    config: Dict,
+    tools: Optional[List[Dict]] = None,
+    context_cache: Optional[GeminiContextCache] = None,
+) -> Dict:
+    """Corpo do generateContent, usando o cache de contexto quando houver.
+
+    `prefix` é a parte fixa do prompt (o template); se `prompt` começa com
+    ela e existe um cachedContents para o modelo, só o restante é enviado.
+    `config` traz os demais campos (generationConfig, safetySettings).
+    """
+    cached = None
+    if context_cache is not None and prompt.startswith(prefix):
+        cached = context_cache.get(model_name, system_instruction, prefix, tools)
+
+    if cached:
+        # Instrução de sistema e tools já estão no cache e não podem ser repetidas.
+        tail = prompt[len(prefix) :].strip() or _EMPTY_TAIL
+        return {
+            "cachedContent": cached,
+            "contents": [{"role": "user", "parts": [{"text": tail}]}],
+            **config,
+        }
+
+    body: Dict = {
+        "systemInstruction": {"parts": [{"text": system_instruction}]},
+        "contents": [{"parts": [{"text": prompt}]}],
+    }
+    if tools:
+        body["tools"] = tools
+    return {**body, **config}
+
+
+def log_usage(model_name: str, usage: Dict) -> None:
+    """Loga os tokens de uma resposta e quanto do prompt veio do cache."""
+    if not usage:
+        return
+    prompt_tokens = usage.get("promptTokenCount", 0)
+    cached_tokens = usage.get("cachedContentTokenCount", 0)
+    logger.info(
+        "Tokens %s: prompt %d (%d em cache, %.0f%%), resposta %d",
+        model_name,
+        prompt_tokens,
+        cached_tokens,
+        100 * cached_tokens / prompt_tokens if prompt_tokens else 0,
+        usage.get("candidatesTokenCount", 0),
+    )
+
+
+def _cache_key(
+    model_name: str, system_instruction: str, prefix: str, tools: Optional[List]
+) -> str:
+    digest = hashlib.sha256(
+        json.dumps([system_instruction, prefix, tools or []]).encode("utf-8")
+    ).hexdigest()[:16]
+    return f"{model_name}:{digest}"
@@ -0,0 +1,139 @@
+import logging
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Pedidos de continuação depois de uma resposta cortada por MAX_TOKENS
+MAX_CONTINUATIONS = 2
+
+_CONTINUE_PROMPT = (
+    "Sua resposta foi cortada pelo limite de tamanho. Continue exatamente do "
+    "ponto onde parou, no meio da frase se for o caso, sem repetir nada do que "
+    "já foi escrito e sem nenhum comentário sobre a continuação."
+)
+
+
+@dataclass
+class Generation:
+    """Texto de uma chamada ao Gemini, com o motivo de término e o grounding."""
+
+    text: str
+    finish_reason: Optional[str] = None
+    grounding: Dict = field(default_factory=dict)
+
+    @property
+    def truncated(self) -> bool:
+        return self.finish_reason == "MAX_TOKENS"
+
+
+def continuation_request(req_json: Dict, text: str) -> Dict:
+    """Repete a requisição com o texto já gerado como turno do modelo."""
+    return {
+        **req_json,
+        "contents": [
+            *req_json["contents"],
+            {"role": "model", "parts": [{"text": text}]},
+            {"role": "user", "parts": [{"text": _CONTINUE_PROMPT}]},
+        ],
+    }
+
+
+def continue_truncated(
+    generation: Generation,
+    req_json: Dict,
+    request: Callable[[Dict], Generation],
+    max_continuations: int = MAX_CONTINUATIONS,
+    check: Optional[Callable[[], None]] = None,
+) -> Generation:
+    """Completa uma resposta cortada por MAX_TOKENS em vez de gerar tudo de novo.
+
+    `request(body)` faz a chamada ao mesmo modelo da resposta original. Cada
+    continuação é concatenada sem ajustes ao texto anterior, para que os
+    offsets do groundingSupports continuem valendo depois de deslocados.
+    `check()`, se houver, roda antes de cada continuação e levanta para
+    interrompê-las (ex.: `Cancellation.check` de uma tentativa que perdeu o
+    hedge).
+    """
+    continuations = 0
+    while generation.truncated and continuations < max_continuations:
+        if check:
+            check()
+        continuations += 1
+        logger.warning(
+            "Resposta cortada por MAX_TOKENS (%d caracteres); pedindo continuação %d/%d",
+            len(generation.text),
+            continuations,
+            max_continuations,
+        )
+        extra = request(continuation_request(req_json, generation.text))
+        generation = Generation(
+            text=generation.text + extra.text,
+            finish_reason=extra.finish_reason,
+            grounding=merge_grounding(
+                generation.grounding,
+                extra.grounding,
+                offset=len(generation.text.encode("utf-8")),
+            ),
+        )
+    if generation.truncated:
+        logger.warning(
+            "Resposta ainda cortada após %d continuações; seguindo com o texto parcial",
+            continuations,
+        )
+    return generation
+
+
+def merge_grounding(base: Dict, extra: Dict, offset: int) -> Dict:
+    """Junta o groundingMetadata de uma continuação ao da resposta anterior.
+
+    Os segmentos da continuação são deslocados em `offset` bytes (o tamanho
+    UTF-8 do texto anterior) e os índices de chunk são remapeados para a lista
+    combinada, sem repetir fontes com a mesma URL.
+    """
+    if not extra:
+        return base
+    chunks: List[Dict] = list(base.get("groundingChunks", []))
+    index_by_uri = {
+        chunk.get("web", {}).get("uri"): i
+        for i, chunk in enumerate(chunks)
+        if chunk.get("web", {}).get("uri")
+    }
+    remap = {}
+    for i, chunk in enumerate(extra.get("groundingChunks", [])):
+        uri = chunk.get("web", {}).get("uri")
+        if uri and uri in index_by_uri:
+            remap[i] = index_by_uri[uri]
+            continue
+        remap[i] = len(chunks)
+        if uri:
+            index_by_uri[uri] = len(chunks)
+        chunks.append(chunk)
+
+    supports = list(base.get("groundingSupports", []))
+    for support in extra.get("groundingSupports", []):
+        segment = dict(support.get("segment", {}))
+        # Índices ausentes valem 0 no proto JSON
+        for key in ("startIndex", "endIndex"):
+            segment[key] = segment.get(key, 0) + offset
+        supports.append(
+            {
+                **support,
+                "segment": segment,
+                "groundingChunkIndices": [
+                    remap[i]
+                    for i in support.get("groundingChunkIndices", [])
+                    if i in remap
+                ],
+            }
+        )
+
+    queries = list(base.get("webSearchQueries", []))
+    queries += [q for q in extra.get("webSearchQueries", []) if q not in queries]
+
+    return {
+        **base,
+        "groundingChunks": chunks,
+        "groundingSupports": supports,
+        "webSearchQueries": queries,
+    }
@@ -1,15 +1,55 @@
+import contextvars
 import logging
-import random
 import re
+import time
 import requests
+from concurrent.futures import ThreadPoolExecutor, wait
 from datetime import datetime, timedelta
-from typing import Dict, Optional
+from typing import Callable, Dict, List, Optional
+
+from generate_post.adapters.api.digest_fanout import (
+    TOPICS,
+    NewsItem,
+    drop_covered,
+    format_items,
+    link_citations,
+    merge_items,
+    parse_items,
+    research_prompt,
+    resolve_items,
+)
 
+from generate_post.adapters.api.gemini_context_cache import (
+    GeminiContextCache,
+    build_request,
+    log_usage,
+)
+from generate_post.adapters.api.gemini_continuation import (
+    Generation,
+    continue_truncated,
+)
+from generate_post.adapters.api.gemini_streaming import (
+    GEMINI_HOST,
+    StreamingPostParser,
+    cache_alias,
+    stream_text,
+    stream_url,
+)
+from generate_post.adapters.api.grounding_citations import (
+    render_citations,
+    resolve_grounding,
+)
+from generate_post.adapters.repositories.digest_history import DigestHistoryIndex
 from generate_post.core.domain.interfaces.content_generator_service import (
     ContentGeneratorServiceInterface,
 )
+from generate_post.config.constants import STATE_DIR
 from generate_post.config.env_config import EnvConfig
-from generate_post.utils.retry_decorator import retry
+from generate_post.utils.hedging import Cancellation, HedgeBudget, Hedger
+from generate_post.utils.model_router import ModelRouter
+from generate_post.utils.response_cache import REPLAY, create_session
+from generate_post.utils.retry_decorator import deadline, retry
+from generate_post.utils.url_resolver import UrlResolver
 
 logger = logging.getLogger(__name__)
 
@@ -32,27 +72,43 @@ _SYSTEM_INSTRUCTION = (
 _TITLE_CLEAN_RE = re.compile(r'["#]|(?:title:|Title:)')
 _LABEL_CLEAN_RE = re.compile(r"(?:categorias:|categories:|tags:|\[|\])", re.IGNORECASE)
 
+# Texto bruto do digest (sem citações) gravado conforme chega no modo streaming
+_DRAFT_PATH = STATE_DIR / "drafts" / "digest.md"
 
-class GeminiNewsDigestService(ContentGeneratorServiceInterface):
-    """Serviço de geração de digest semanal usando Gemini com Google Search grounding."""
+# A busca do grounding acontece antes do primeiro token
+_FIRST_TOKEN_TIMEOUT = 90
 
-    def __init__(self, env_config: Optional[EnvConfig] = None):
-        self._env = env_config or EnvConfig.from_env()
-        self._session = requests.Session()
-        self._session.headers["Content-Type"] = "application/json"
+# camelCase é o formato correto para o JSON da API Gemini (proto JSON encoding)
+_SEARCH_TOOLS = [{"googleSearch": {}}]
 
-    def _week_range(self) -> tuple[str, str]:
-        today = datetime.now()
-        start = today - timedelta(days=7)
-        return start.strftime("%d/%m/%Y"), today.strftime("%d/%m/%Y")
+# Prazo de cada pesquisa por tópico no modo fan-out
+_TOPIC_DEADLINE = 90
 
-    def create_prompt(self, last_post: Optional[Dict] = None) -> str:
-        start, end = self._week_range()
+# Semanas de resumos anteriores consultadas para não repetir notícias
+_HISTORY_WEEKS = 4
+# Manchetes anteriores listadas no prompt
+_HISTORY_MAX_HEADLINES = 40
 
-        return f"""
+_HISTORY_TAIL = """
+## JÁ COBERTO NAS ÚLTIMAS SEMANAS
+Estas notícias já saíram em resumos anteriores. Não as repita, a menos que haja um fato novo relevante (e então foque no que mudou):
+{headlines}
+"""
+
+# Acrescentado ao prompt na síntese do fan-out
+_SYNTHESIS_TAIL = """
+## NOTÍCIAS PESQUISADAS
+As buscas já foram feitas: escreva o post usando SOMENTE as notícias abaixo, sem buscar outras.
+Os números entre colchetes são as fontes de cada notícia. Cite-os logo depois de cada fato, no formato [n], sem URLs.
+
+{items}
+"""
+
+
+# Parte fixa do prompt (cacheável); o período da semana vem depois
+_BASE_PROMPT = """
 ## TAREFA
 Crie um post de RESUMO SEMANAL DE NOTÍCIAS sobre tecnologia, desenvolvimento de software e inteligência artificial.
-O período é de {start} a {end}.
 
 Use o Google Search para buscar as notícias mais relevantes e recentes dessa semana sobre:
 - Lançamentos de linguagens, frameworks e ferramentas de programação
@@ -93,62 +149,101 @@ Linha 5 em diante: Corpo do post em Markdown
 - Seja factual nas notícias mas opinativo nas análises
 """
 
-    @retry(max_attempts=3, delay=5)
-    def generate_content(self, prompt: str) -> str:
-        self._env.validate_gemini()
-
-        model_name = random.choice(_GROUNDED_MODELS)
-        logger.info("Modelo selecionado (digest): %s", model_name)
 
-        req_json = {
-            "systemInstruction": {"parts": [{"text": _SYSTEM_INSTRUCTION}]},
-            "contents": [{"parts": [{"text": prompt}]}],
-            # camelCase é o formato correto para o JSON da API Gemini (proto JSON encoding)
-            "tools": [{"googleSearch": {}}],
-            "safetySettings": [
-                {
-                    "category": "HARM_CATEGORY_DANGEROUS_CONTENT",
-                    "threshold": "BLOCK_ONLY_HIGH",
-                }
-            ],
-            "generationConfig": {
-                "temperature": 0.7,
-                "maxOutputTokens": 8192,
-                "topP": 0.9,
-                "topK": 40,
-            },
-        }
+class GeminiNewsDigestService(ContentGeneratorServiceInterface):
+    """Serviço de geração de digest semanal usando Gemini com Google Search grounding."""
 
-        url = (
-            "https://generativelanguage.googleapis.com"
-            f"/v1beta/models/{model_name}:generateContent"
+    def __init__(
+        self,
+        env_config: Optional[EnvConfig] = None,
+        stream: bool = False,
+        hedge: bool = False,
+        context_cache: bool = False,
+        fan_out: bool = False,
+        history: Optional[DigestHistoryIndex] = None,
+    ):
+        self._env = env_config or EnvConfig.from_env()
+        self._stream = stream
+        self._router = ModelRouter(
+            "gemini-digest",
+            _GROUNDED_MODELS,
+            max_timeout=180,
+            host=GEMINI_HOST,
+            min_timeout=_FIRST_TOKEN_TIMEOUT,
         )
-
-        response = self._session.post(
-            url,
-            headers={
-                "x-goog-api-key": self._env.gemini_api_key,
-            },
-            json=req_json,
-            timeout=180,
+        # Como no GeminiContentService, o streaming não é duplicado.
+        self._hedger = Hedger(
+            self._router,
+            HedgeBudget("gemini-digest") if hedge and not stream else None,
+        )
+        self._fan_out = fan_out
+        # Pesquisas por tópico são curtas: estatísticas e circuitos à parte
+        self._topic_router = ModelRouter(
+            "gemini-digest-topic",
+            _GROUNDED_MODELS,
+            max_timeout=_TOPIC_DEADLINE,
+            host=GEMINI_HOST,
+        )
+        self._topic_hedger = Hedger(
+            self._topic_router,
+            HedgeBudget("gemini-digest-topic") if hedge else None,
         )
+        # No replay não há rede para criar o cachedContents
+        self._context_cache = (
+            GeminiContextCache(self._env.gemini_api_key)
+            if context_cache and self._env.http_cache != REPLAY
+            else None
+        )
+        # Em replay não há rede: só as URLs já resolvidas em execuções anteriores
+        self._resolver = UrlResolver(offline=self._env.http_cache == REPLAY)
+        self._history = history
 
-        if response.status_code != 200:
-            raise requests.RequestException(
-                f"Falha ao gerar digest. "
-                f"Status: {response.status_code}, "
-                f"Resposta: {response.text[:500]}"
-            )
+    def _week_range(self) -> tuple[str, str]:
+        today = datetime.now()
+        start = today - timedelta(days=7)
+        return start.strftime("%d/%m/%Y"), today.strftime("%d/%m/%Y")
 
-        data = response.json()
-        candidates = data.get("candidates")
-        if not candidates or "content" not in candidates[0]:
-            raise ValueError(f"Formato de resposta inválido: {data}")
+    def create_prompt(self, last_post: Optional[Dict] = None) -> str:
+        # O período vem depois do template fixo, que pode ir para o cache de contexto.
+        start, end = self._week_range()
+        prompt = _BASE_PROMPT + f"""
+## PERÍODO
+O período do resumo é de {start} a {end}.
+"""
+        if self._history:
+            self._history.refresh()
+            headlines, _ = self._history.covered(_HISTORY_WEEKS)
+            if headlines:
+                prompt += _HISTORY_TAIL.format(
+                    headlines="\n".join(
+                        f"- {h}" for h in headlines[:_HISTORY_MAX_HEADLINES]
+                    )
+                )
+        return prompt
+
+    def generate_content(self, prompt: str) -> str:
+        return self._generate(prompt)
+
+    def generate_content_with_preview(
+        self, prompt: str, on_preview: Callable[[Dict], None]
+    ) -> str:
+        if not self._stream:
+            return super().generate_content_with_preview(prompt, on_preview)
+        return self._generate(prompt, on_preview)
+
+    @retry(max_attempts=3, delay=5)
+    def _generate(
+        self, prompt: str, on_preview: Optional[Callable[[Dict], None]] = None
+    ) -> str:
+        self._env.validate_gemini()
+
+        if self._fan_out:
+            return self._generate_fan_out(prompt, on_preview)
 
-        text = candidates[0]["content"]["parts"][0]["text"]
+        generation = self._write(prompt, _SEARCH_TOOLS, on_preview)
+        text, grounding = generation.text, generation.grounding
 
         # Extrair fontes do grounding metadata
-        grounding = candidates[0].get("groundingMetadata", {})
         queries = grounding.get("webSearchQueries", [])
         chunks = grounding.get("groundingChunks", [])
         supports = grounding.get("groundingSupports", [])
@@ -167,83 +262,256 @@ Linha 5 em diante: Corpo do post em Markdown
                 "Verifique se o modelo suporta google_search grounding."
             )
 
-        # IMPORTANTE: injetar citações ANTES de qualquer limpeza, pois os byte
-        # offsets do groundingSupports são relativos ao texto original da API.
-        text = self._inject_inline_citations(text, grounding)
-        # Só depois remover links alucinados (preserva [N](url) que injetamos).
-        text = self._remove_hallucinated_links(text)
-
-        sources = self._extract_sources(grounding)
-        if sources:
-            text = self._append_sources(text, sources)
+        # Redirects do grounding viram URLs finais antes da numeração, para
+        # que a mesma página não apareça duas vezes nas fontes.
+        grounding = resolve_grounding(
+            grounding,
+            self._resolver.resolve_all(c.get("web", {}).get("uri", "") for c in chunks),
+        )
 
-        return text
+        # Os byte offsets do groundingSupports são relativos ao texto original
+        # da API: citações, limpeza de links e fontes saem de uma só passada.
+        return render_citations(text, grounding, self._extract_sources(grounding))
 
-    @staticmethod
-    def _remove_hallucinated_links(text: str) -> str:
-        """Remove links inline alucinados pelo modelo, mantendo apenas o texto de exibição.
+    def _generate_fan_out(
+        self, prompt: str, on_preview: Optional[Callable[[Dict], None]] = None
+    ) -> str:
+        """Pesquisa cada tópico em paralelo e escreve o post a partir das notícias.
 
-        Preserva citações numéricas [N](url) que foram injetadas via groundingSupports.
+        Cada tópico tem `_TOPIC_DEADLINE` segundos; um tópico lento ou com
+        erro fica de fora em vez de segurar os outros. A síntese não usa
+        busca: recebe as notícias com os números das fontes e cita com `[n]`,
+        que depois vira link.
         """
-        # Remove [texto descritivo](url) mas preserva [1](url), [12](url), etc.
-        return re.sub(
-            r"\[(?!\d+\])([^\]]+)\]\([^)]+\)(?:\{[^}]*\})?",
-            r"\1",
-            text,
+        items = self._research_topics()
+        resolve_items(
+            items,
+            self._resolver.resolve_all(
+                s["uri"] for item in items for s in item.sources
+            ),
         )
+        if self._history:
+            found = len(items)
+            items = drop_covered(items, *self._history.covered(_HISTORY_WEEKS))
+            logger.info(
+                "Fan-out: %d de %d notícias já cobertas em resumos anteriores",
+                found - len(items),
+                found,
+            )
+        items, sources = merge_items(items)
+        logger.info("Fan-out: %d notícias, %d fontes", len(items), len(sources))
 
-    @staticmethod
-    def _inject_inline_citations(
-        text: str,
-        grounding_metadata: dict,
-    ) -> str:
-        """Insere citações reais inline usando groundingSupports + groundingChunks.
+        synthesis_prompt = prompt + _SYNTHESIS_TAIL.format(
+            items=format_items(items, sources)
+        )
+        text = self._write(synthesis_prompt, None, on_preview).text
 
-        A API retorna 'groundingSupports' mapeando segmentos do texto (por byte offset)
-        aos índices de 'groundingChunks'. Isso permite inserir [n](url) imediatamente
-        após cada trecho fundamentado, com URLs verificados pelo Google.
-        """
-        chunks = grounding_metadata.get("groundingChunks", [])
-        supports = grounding_metadata.get("groundingSupports", [])
+        return render_citations(link_citations(text, sources), sources=sources)
 
-        if not chunks or not supports:
-            return text
+    def _research_topics(self) -> List[NewsItem]:
+        start, end = self._week_range()
+        executor = ThreadPoolExecutor(
+            max_workers=len(TOPICS), thread_name_prefix="digest-topic"
+        )
+        futures = {
+            # Cada tarefa roda numa cópia do contexto para herdar o prazo total.
+            executor.submit(
+                contextvars.copy_context().run,
+                self._research_topic,
+                topic,
+                research_prompt(description, start, end),
+            ): topic
+            for topic, description in TOPICS.items()
+        }
+        _, pending = wait(futures, timeout=_TOPIC_DEADLINE + 5)
+        executor.shutdown(wait=False, cancel_futures=True)
+
+        items: List[NewsItem] = []
+        for future, topic in futures.items():
+            if future in pending:
+                logger.warning(
+                    "Tópico %s passou de %ds; seguindo sem ele", topic, _TOPIC_DEADLINE
+                )
+            elif future.exception() is not None:
+                logger.warning("Tópico %s falhou: %s", topic, future.exception())
+            else:
+                items += future.result()
+        if not items:
+            raise requests.RequestException("Nenhum tópico do fan-out trouxe notícias")
+        return items
+
+    def _research_topic(self, topic: str, prompt: str) -> List[NewsItem]:
+        started = time.perf_counter()
+        req_json = {
+            "contents": [{"parts": [{"text": prompt}]}],
+            "tools": _SEARCH_TOOLS,
+            "generationConfig": {"temperature": 0.3, "maxOutputTokens": 2048},
+        }
+        with deadline(_TOPIC_DEADLINE):
 
-        # Trabalhar com bytes para respeitar os offsets da API (são byte offsets UTF-8)
-        text_bytes = text.encode("utf-8")
+            def call(model_name: str, cancel: Cancellation) -> Generation:
+                with self._attempt_session(cancel) as session:
+                    return self._request_content(
+                        model_name, req_json, session, router=self._topic_router
+                    )
 
-        # Ordenar por endIndex decrescente para não deslocar índices ao inserir
-        sorted_supports = sorted(
-            supports,
-            key=lambda s: s.get("segment", {}).get("endIndex", 0),
-            reverse=True,
+            generation = self._topic_hedger.run(call)
+        items = parse_items(topic, generation.text, generation.grounding)
+        logger.info(
+            "Tópico %s: %d notícias, %d fontes em %.1fs",
+            topic,
+            len(items),
+            len({s["uri"] for item in items for s in item.sources}),
+            time.perf_counter() - started,
+        )
+        return items
+
+    def _write(
+        self,
+        prompt: str,
+        tools: Optional[List[Dict]],
+        on_preview: Optional[Callable[[Dict], None]] = None,
+    ) -> Generation:
+        """Gera o texto do post (bloqueante ou em streaming), com continuações."""
+
+        def call(model_name: str, cancel: Cancellation) -> Generation:
+            req_json = self._request_body(model_name, prompt, tools)
+            with self._attempt_session(cancel) as session:
+                if not self._stream:
+                    return continue_truncated(
+                        self._request_content(model_name, req_json, session),
+                        req_json,
+                        lambda body: self._request_content(model_name, body, session),
+                        check=cancel.check,
+                    )
+
+                parser = StreamingPostParser(
+                    self.parse_generated_content,
+                    draft_path=_DRAFT_PATH,
+                    on_preview=on_preview,
+                )
+                with parser:
+                    generation = continue_truncated(
+                        self._stream_content(model_name, req_json, parser, session),
+                        req_json,
+                        lambda body: self._stream_content(
+                            model_name, body, parser, session
+                        ),
+                        check=cancel.check,
+                    )
+            logger.info("Rascunho do digest salvo em %s", _DRAFT_PATH)
+            return generation
+
+        return self._hedger.run(call)
+
+    def _request_body(
+        self, model_name: str, prompt: str, tools: Optional[List[Dict]]
+    ) -> Dict:
+        return build_request(
+            model_name,
+            prompt,
+            prefix=_BASE_PROMPT,
+            system_instruction=_SYSTEM_INSTRUCTION,
+            tools=tools,
+            config={
+                "safetySettings": [
+                    {
+                        "category": "HARM_CATEGORY_DANGEROUS_CONTENT",
+                        "threshold": "BLOCK_ONLY_HIGH",
+                    }
+                ],
+                "generationConfig": {
+                    "temperature": 0.7,
+                    "maxOutputTokens": 8192,
+                    "topP": 0.9,
+                    "topK": 40,
+                },
+            },
+            context_cache=self._context_cache,
         )
 
-        for support in sorted_supports:
-            segment = support.get("segment", {})
-            end_index = segment.get("endIndex", 0)
-            chunk_indices = support.get("groundingChunkIndices", [])
+    def _attempt_session(self, cancel: Cancellation) -> requests.Session:
+        """Sessão de uma tentativa; se ela perder o hedge, as conexões caem."""
+        session = create_session(self._env.http_cache, alias=cache_alias)
+        session.headers["Content-Type"] = "application/json"
+        return cancel.attach(session)
+
+    def _request_content(
+        self,
+        model_name: str,
+        req_json: Dict,
+        session: requests.Session,
+        router: Optional[ModelRouter] = None,
+    ) -> Generation:
+        url = f"https://{GEMINI_HOST}/v1beta/models/{model_name}:generateContent"
+
+        response = session.post(
+            url,
+            headers={
+                "x-goog-api-key": self._env.gemini_api_key,
+            },
+            json=req_json,
+            timeout=(router or self._router).timeout(model_name),
+        )
 
-            if not chunk_indices or end_index <= 0:
-                continue
+        if response.status_code != 200:
+            raise requests.RequestException(
+                f"Falha ao gerar digest. "
+                f"Status: {response.status_code}, "
+                f"Resposta: {response.text[:500]}",
+                response=response,
+            )
 
-            citations = []
-            for i in chunk_indices:
-                if i < len(chunks):
-                    web = chunks[i].get("web", {})
-                    uri = web.get("uri", "").strip()
-                    if uri:
-                        citations.append(f"[{i + 1}]({uri})")
+        data = response.json()
+        candidates = data.get("candidates")
+        if not candidates or "content" not in candidates[0]:
+            raise ValueError(f"Formato de resposta inválido: {data}")
 
-            if not citations:
-                continue
+        log_usage(model_name, data.get("usageMetadata", {}))
+        return Generation(
+            text=candidates[0]["content"]["parts"][0]["text"],
+            finish_reason=candidates[0].get("finishReason"),
+            grounding=candidates[0].get("groundingMetadata", {}),
+        )
 
-            citation_bytes = (" " + " ".join(citations)).encode("utf-8")
-            text_bytes = (
-                text_bytes[:end_index] + citation_bytes + text_bytes[end_index:]
+    def _stream_content(
+        self,
+        model_name: str,
+        req_json: Dict,
+        parser: StreamingPostParser,
+        session: requests.Session,
+    ) -> Generation:
+        """Gera o digest via streaming; o groundingMetadata vem nos últimos eventos.
+
+        Os offsets do groundingSupports são relativos ao texto completo, então
+        as citações só são injetadas depois que o stream termina.
+        """
+        generation = Generation(text="")
+        usage: Dict = {}
+
+        def on_event(event: Dict) -> None:
+            candidates = event.get("candidates") or [{}]
+            metadata = candidates[0].get("groundingMetadata")
+            if metadata:
+                generation.grounding.update(metadata)
+            generation.finish_reason = candidates[0].get(
+                "finishReason", generation.finish_reason
             )
-
-        return text_bytes.decode("utf-8")
+            usage.update(event.get("usageMetadata", {}))
+
+        for chunk in stream_text(
+            session,
+            stream_url(model_name),
+            headers={"x-goog-api-key": self._env.gemini_api_key},
+            req_json=req_json,
+            first_token_timeout=_FIRST_TOKEN_TIMEOUT,
+            total_timeout=self._router.timeout(model_name),
+            on_event=on_event,
+        ):
+            generation.text += chunk
+            parser.feed(chunk)
+        log_usage(model_name, usage)
+        return generation
 
     @staticmethod
     def _extract_sources(
@@ -269,16 +537,6 @@ Linha 5 em diante: Corpo do post em Markdown
 
         return sources
 
-    @staticmethod
-    def _append_sources(text: str, sources: list[dict[str, str]]) -> str:
-        """Adiciona seção de fontes ao final do conteúdo."""
-        section = "\n\n## Fontes\n\n"
-        for i, src in enumerate(sources, 1):
-            title = src["title"].strip()
-            uri = src["uri"].strip()
-            section += f"{i}. [{title}]({uri})" '{:target="_blank"}\n'
-        return text.rstrip() + section
-
     def parse_generated_content(self, generated_text: str) -> Dict:
         lines = generated_text.strip().split("\n")
 
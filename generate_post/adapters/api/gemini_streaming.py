@@ -0,0 +1,250 @@
+import json
+import logging
+import re
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+GEMINI_HOST = "generativelanguage.googleapis.com"
+_API_BASE = f"https://{GEMINI_HOST}/v1beta/models"
+
+# Prazo para o primeiro token de texto. Modelos com "thinking" demoram a
+# começar, mas um modelo travado não deve segurar o pipeline por 120 s.
+# Não foi medido contra o pensamento do gemini-2.5-pro: um prazo estourado
+# conta como timeout no ModelRouter e vai para o retry, por isso os
+# workflows não usam `--stream`.
+FIRST_TOKEN_TIMEOUT = 45
+# Prazo total do stream, equivalente ao timeout da chamada bloqueante.
+STREAM_TIMEOUT = 120
+
+_HEADER_LINES = 3  # título, categorias e tags
+# Quanto do corpo entra na prévia (o prompt da imagem usa content[:300])
+PREVIEW_CHARS = 300
+
+
+_MODEL_IN_URL_RE = re.compile(r"/models/[^/:]+:")
+
+
+def cache_alias(url: str, body: Any) -> Tuple[Any, ...]:
+    """Chave de cache sem o modelo, para o replay aceitar outro modelo sorteado."""
+    return _MODEL_IN_URL_RE.sub("/models/*:", url), body
+
+
+def stream_url(model_name: str) -> str:
+    """URL do endpoint de streaming (Server-Sent Events) de um modelo."""
+    return f"{_API_BASE}/{model_name}:streamGenerateContent?alt=sse"
+
+
+def iter_sse_events(response: requests.Response) -> Iterator[Dict]:
+    """Itera sobre os eventos `data:` de uma resposta SSE, já decodificados.
+
+    Um evento pode ter várias linhas `data:` e termina numa linha vazia.
+    Comentários (`:` de keep-alive), outros campos e `data: [DONE]` são
+    ignorados.
+    """
+    data_lines: list[bytes] = []
+    # Quebra só em "\n": com o padrão (splitlines), um "\r\n" dividido entre
+    # dois chunks vira uma linha vazia a mais e corta o evento no meio.
+    for line in response.iter_lines(delimiter=b"\n"):
+        line = line.rstrip(b"\r")
+        if line.startswith(b"data:"):
+            data = line[5:].lstrip()
+            if data != b"[DONE]":
+                data_lines.append(data)
+        elif not line and data_lines:
+            yield json.loads(b"\n".join(data_lines))
+            data_lines = []
+    if data_lines:
+        yield json.loads(b"\n".join(data_lines))
+
+
+def stream_text(
+    session: requests.Session,
+    url: str,
+    headers: Dict[str, str],
+    req_json: Dict,
+    first_token_timeout: float = FIRST_TOKEN_TIMEOUT,
+    total_timeout: float = STREAM_TIMEOUT,
+    on_event: Optional[Callable[[Dict], None]] = None,
+) -> Iterator[str]:
+    """Faz a chamada streamGenerateContent e produz os trechos de texto.
+
+    Levanta `requests.Timeout` se nenhum texto chegar em `first_token_timeout`
+    segundos ou se o stream inteiro passar de `total_timeout`. Cada evento
+    bruto também é repassado para `on_event` (ex.: para ler groundingMetadata,
+    que chega nos últimos eventos).
+    """
+    started = time.monotonic()
+    # O timeout de leitura vale para cada recv(): um modelo mudo por mais de
+    # `first_token_timeout` segundos, antes ou durante o stream, é abortado.
+    response = session.post(
+        url,
+        headers=headers,
+        json=req_json,
+        timeout=(10, first_token_timeout),
+        stream=True,
+    )
+    with response:
+        if response.status_code != 200:
+            raise requests.RequestException(
+                f"Falha no streaming. Status: {response.status_code}, "
+                f"Resposta: {response.text[:500]}",
+                response=response,
+            )
+
+        first_token_at: Optional[float] = None
+        finish_reason = None
+        for event in iter_sse_events(response):
+            elapsed = time.monotonic() - started
+            if "error" in event:
+                raise requests.RequestException(f"Erro no streaming: {event['error']}")
+            if on_event:
+                on_event(event)
+
+            candidates = event.get("candidates") or [{}]
+            finish_reason = candidates[0].get("finishReason", finish_reason)
+            parts = candidates[0].get("content", {}).get("parts", [])
+            text = "".join(
+                part.get("text", "") for part in parts if not part.get("thought")
+            )
+
+            if text:
+                if first_token_at is None:
+                    first_token_at = elapsed
+                    logger.info("Primeiro token em %.1fs", first_token_at)
+                yield text
+            elif first_token_at is None and elapsed > first_token_timeout:
+                raise requests.Timeout(
+                    f"Nenhum token de texto em {first_token_timeout:.0f}s"
+                )
+            if elapsed > total_timeout:
+                raise requests.Timeout(f"Stream excedeu {total_timeout:.0f}s")
+
+    if first_token_at is None:
+        raise requests.RequestException(
+            f"Stream terminou sem texto (finishReason: {finish_reason})"
+        )
+    logger.info(
+        "Stream concluído em %.1fs (finishReason: %s)",
+        time.monotonic() - started,
+        finish_reason,
+    )
+
+
+class StreamingPostParser:
+    """Separa o cabeçalho (título, categorias, tags) do corpo enquanto o texto chega.
+
+    Segue o mesmo formato de `parse_generated_content`: as três primeiras
+    linhas não-vazias são o cabeçalho e o restante é o corpo. Assim que o
+    cabeçalho está completo, `on_header` recebe o resultado de `parse_header`;
+    quando também há `preview_chars` caracteres de corpo (ou o stream acaba),
+    `on_preview` recebe o cabeçalho com esse início do corpo em `content`. O
+    corpo é gravado incrementalmente em `draft_path`, se informado.
+    """
+
+    def __init__(
+        self,
+        parse_header: Callable[[str], Dict],
+        on_header: Optional[Callable[[Dict], None]] = None,
+        draft_path: Optional[Path] = None,
+        on_preview: Optional[Callable[[Dict], None]] = None,
+        preview_chars: int = PREVIEW_CHARS,
+    ):
+        self._parse_header = parse_header
+        self._on_header = on_header
+        self._on_preview = on_preview
+        self._preview_chars = preview_chars
+        self._draft_path = draft_path
+        self._draft = None
+        self._pending = ""
+        self._header_lines: list[str] = []
+        self._body_started = False
+        self._body: list[str] = []
+        self._body_len = 0
+        self._preview_sent = False
+        self._chunks: list[str] = []
+        self.header: Optional[Dict] = None
+
+    def __enter__(self) -> "StreamingPostParser":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    @property
+    def text(self) -> str:
+        """Todo o texto recebido até agora."""
+        return "".join(self._chunks)
+
+    def feed(self, chunk: str) -> None:
+        self._chunks.append(chunk)
+        if self._body_started:
+            self._write_body(chunk)
+            return
+
+        self._pending += chunk
+        while not self._body_started and "\n" in self._pending:
+            line, self._pending = self._pending.split("\n", 1)
+            if len(self._header_lines) < _HEADER_LINES:
+                if line.strip():
+                    self._header_lines.append(line)
+                if len(self._header_lines) == _HEADER_LINES:
+                    self._emit_header()
+            elif line.strip():
+                # Primeira linha não-vazia depois do cabeçalho: início do corpo.
+                self._body_started = True
+                rest, self._pending = self._pending, ""
+                self._write_body(line + "\n" + rest)
+
+    def close(self) -> None:
+        """Finaliza o stream: processa a última linha e fecha o rascunho."""
+        if not self._body_started and self._pending.strip():
+            line, self._pending = self._pending, ""
+            if len(self._header_lines) < _HEADER_LINES:
+                self._header_lines.append(line)
+            else:
+                self._body_started = True
+                self._write_body(line)
+        if self.header is None and self._header_lines:
+            self._emit_header()
+        if self.header is not None:
+            self._emit_preview()
+        if self._draft is not None:
+            self._draft.close()
+            self._draft = None
+
+    def _emit_header(self) -> None:
+        self.header = self._parse_header("\n".join(self._header_lines))
+        logger.info(
+            "Cabeçalho recebido: %s [%s] [%s]",
+            self.header["title"],
+            self.header["categories"],
+            self.header["tags"],
+        )
+        if self._on_header:
+            self._on_header(self.header)
+
+    def _emit_preview(self) -> None:
+        if self._preview_sent or self._on_preview is None:
+            return
+        self._preview_sent = True
+        body = "".join(self._body).strip()
+        self._on_preview({**self.header, "content": body[: self._preview_chars]})
+
+    def _write_body(self, text: str) -> None:
+        if not self._preview_sent:
+            self._body.append(text)
+            self._body_len += len(text)
+            if self._body_len >= self._preview_chars:
+                self._emit_preview()
+        if self._draft_path is None:
+            return
+        if self._draft is None:
+            self._draft_path.parent.mkdir(parents=True, exist_ok=True)
+            self._draft = self._draft_path.open("w", encoding="utf-8")
+        self._draft.write(text)
+        self._draft.flush()
@@ -0,0 +1,176 @@
+import logging
+import re
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Regiões do markdown tratadas à parte, na ordem de prioridade do scanner:
+# blocos de código cercados, títulos, código inline e links [texto](url) que
+# não são citações numéricas [N](url). O lookahead inicial descarta rápido as
+# posições que não podem abrir nenhuma delas.
+_MARKDOWN_RE = re.compile(
+    rb"(?=[`~#\[])"
+    rb"(?:(?P<fence>^(?P<mark>`{3,}|~{3,}).*?(?:\n(?P=mark)[^\n]*|\Z))"
+    rb"|(?P<heading>^\#{1,6}[ \t][^\n]*)"
+    rb"|(?P<code>`[^`\n]+`)"
+    rb"|(?P<link>\[(?!\d+\])(?P<label>[^\]]+)\]\([^)]+\)(?:\{[^}]*\})?))",
+    re.MULTILINE | re.DOTALL,
+)
+_LINK_RE = re.compile(rb"\[(?!\d+\])([^\]]+)\]\([^)]+\)(?:\{[^}]*\})?")
+
+
+def render_citations(
+    text: str,
+    grounding_metadata: Optional[Dict] = None,
+    sources: Optional[List[Dict[str, str]]] = None,
+) -> str:
+    """Aplica o pós-processamento do digest numa única passada pelo texto.
+
+    - insere `[n](url)` no fim de cada segmento do groundingSupports (os
+      `endIndex` são byte offsets UTF-8 do texto original da API);
+    - troca links alucinados `[texto](url)` pelo texto, preservando `[N](url)`;
+    - acrescenta a seção `## Fontes` com `sources`, se houver.
+
+    Citações que cairiam dentro de um link ou de código inline vão para logo
+    depois dele; dentro de blocos de código e títulos elas são descartadas (a
+    fonte continua na seção de fontes). Os pontos de inserção são ordenados
+    uma vez e a saída é montada num bytearray, sem recopiar o texto a cada
+    citação.
+    """
+    data = text.encode("utf-8")
+    inserts = _insertion_points(data, grounding_metadata or {})
+    total = len(inserts)
+    out = bytearray()
+    cursor = 0
+    k = 0
+    dropped = 0
+
+    for match in _MARKDOWN_RE.finditer(data):
+        start, end = match.span()
+        while k < total and inserts[k][0] <= start:
+            position, citation = inserts[k]
+            out += data[cursor:position]
+            out += citation
+            cursor = position
+            k += 1
+        out += data[cursor:start]
+
+        kind = match.lastgroup
+        # Um título ou bloco termina no fim da linha: uma citação ali ainda
+        # ficaria na mesma linha.
+        limit = end + 1 if kind in ("fence", "heading") else end
+        inside = []
+        while k < total and inserts[k][0] < limit:
+            inside.append(inserts[k][1])
+            k += 1
+
+        if kind == "link":
+            out += match.group("label")
+            out += b"".join(inside)
+        elif kind == "code":
+            out += match.group()
+            out += b"".join(inside)
+        elif kind == "heading":
+            heading = match.group()
+            out += _LINK_RE.sub(rb"\1", heading) if b"](" in heading else heading
+            dropped += len(inside)
+        else:
+            out += match.group()
+            dropped += len(inside)
+        cursor = end
+
+    for position, citation in inserts[k:]:
+        out += data[cursor:position]
+        out += citation
+        cursor = position
+    out += data[cursor:]
+
+    if dropped:
+        logger.info("%d citações em títulos ou blocos de código omitidas", dropped)
+
+    rendered = out.decode("utf-8")
+    if sources:
+        rendered = rendered.rstrip() + _sources_section(sources)
+    return rendered
+
+
+def resolve_grounding(grounding_metadata: Dict, resolved: Dict[str, str]) -> Dict:
+    """Troca as URIs dos chunks pelas URLs finais e une os chunks repetidos.
+
+    Vários redirects do grounding apontam para a mesma página; depois da
+    troca, cada URL fica num único chunk e os `groundingChunkIndices` dos
+    supports passam a apontar para ele. Chunks sem URI saem da lista, de
+    modo que o chunk `i` é sempre a fonte `i + 1` da seção de fontes.
+    """
+    chunks: List[Dict] = []
+    index: Dict[str, int] = {}
+    remap: Dict[int, int] = {}
+    for i, chunk in enumerate(grounding_metadata.get("groundingChunks", [])):
+        web = chunk.get("web", {})
+        uri = web.get("uri", "").strip()
+        if not uri:
+            continue
+        url = resolved.get(uri, uri)
+        if url not in index:
+            index[url] = len(chunks)
+            chunks.append({**chunk, "web": {**web, "uri": url}})
+        remap[i] = index[url]
+
+    supports = []
+    for support in grounding_metadata.get("groundingSupports", []):
+        indices = [
+            remap[i] for i in support.get("groundingChunkIndices", []) if i in remap
+        ]
+        supports.append(
+            {**support, "groundingChunkIndices": list(dict.fromkeys(indices))}
+        )
+
+    return {
+        **grounding_metadata,
+        "groundingChunks": chunks,
+        "groundingSupports": supports,
+    }
+
+
+def _insertion_points(data: bytes, grounding_metadata: Dict) -> List[Tuple[int, bytes]]:
+    """Pontos de inserção ordenados, um por offset, com as citações já unidas."""
+    chunks = grounding_metadata.get("groundingChunks", [])
+    supports = grounding_metadata.get("groundingSupports", [])
+    if not chunks or not supports:
+        return []
+
+    labels = []
+    for i, chunk in enumerate(chunks, 1):
+        uri = chunk.get("web", {}).get("uri", "").strip()
+        labels.append(f"[{i}]({uri})" if uri else "")
+    size = len(data)
+    by_position: Dict[int, List[str]] = {}
+    for support in supports:
+        end_index = min(support.get("segment", {}).get("endIndex", 0), size)
+        # Segmentos que terminam numa quebra de linha: a citação fica no fim
+        # da linha, não no começo da próxima (que pode ser um título).
+        while end_index > 0 and data[end_index - 1] in b" \t\r\n":
+            end_index -= 1
+        if end_index <= 0:
+            continue
+        # Nunca no meio de um caractere multibyte
+        while end_index < size and data[end_index] & 0xC0 == 0x80:
+            end_index += 1
+        citations = by_position.setdefault(end_index, [])
+        for i in support.get("groundingChunkIndices", []):
+            if 0 <= i < len(labels) and labels[i] and labels[i] not in citations:
+                citations.append(labels[i])
+
+    return [
+        (position, (" " + " ".join(citations)).encode("utf-8"))
+        for position, citations in sorted(by_position.items())
+        if citations
+    ]
+
+
+def _sources_section(sources: List[Dict[str, str]]) -> str:
+    lines = [
+        f"{i}. [{src['title'].strip()}]({src['uri'].strip()})" '{:target="_blank"}\n'
+        for i, src in enumerate(sources, 1)
+    ]
+    return "\n\n## Fontes\n\n" + "".join(lines)
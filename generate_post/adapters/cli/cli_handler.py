@@ -3,6 +3,7 @@ from typing import Protocol
 
 from generate_post.core.domain.entities.post import Post
 from generate_post.config.env_config import EnvConfig
+from generate_post.utils.retry_decorator import log_retry_metrics
 
 logger = logging.getLogger(__name__)
 
@@ -31,6 +32,8 @@ class CLIHandler:
         except Exception:
             logger.exception("Erro durante a geração do post")
             return False
+        finally:
+            log_retry_metrics()
 
     def _write_github_output(self, post: Post) -> None:
         """Escreve as informações do post para o output do GitHub Actions"""
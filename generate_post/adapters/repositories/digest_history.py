@@ -0,0 +1,220 @@
+import json
+import logging
+import re
+import threading
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set
+from urllib.parse import urlsplit
+
+from generate_post.config.constants import POSTS_DIR, STATE_DIR
+from generate_post.utils.url_resolver import UrlResolver, canonical_url
+
+logger = logging.getLogger(__name__)
+
+DIGEST_HISTORY_PATH = STATE_DIR / "digest_history.json"
+# Categoria (ou tag) que o digest põe no front matter de todo resumo
+DIGEST_CATEGORY = "resumo-semanal"
+# Redirects do grounding, como aparecem nas fontes dos resumos antigos
+GROUNDING_REDIRECT_HOST = "vertexaisearch.cloud.google.com"
+
+_FRONT_MATTER_RE = re.compile(r"^---\s*\n(.+?)\n---\s*\n", re.DOTALL)
+_TAXONOMY_RE = re.compile(r"^(?:categories|tags):[ \t]*\[?([^\]\n]*)", re.MULTILINE)
+_HEADING_RE = re.compile(r"^#{2,3}\s+(.+?)\s*$", re.MULTILINE)
+_BOLD_ITEM_RE = re.compile(r"^\s*[-*]\s+\*\*(.+?)\*\*", re.MULTILINE)
+_CITATION_RE = re.compile(r"\s*\[\d+\]\([^)]*\)(?:\{[^}]*\})?")
+_SOURCES_RE = re.compile(
+    r"^##\s+Fontes\s*$(.*?)(?=^---\s*$|^##\s|\Z)", re.MULTILINE | re.DOTALL
+)
+_SOURCE_ITEM_RE = re.compile(r"^\d+\.\s+\[[^\]]*\]\(([^)\s]+)\)", re.MULTILINE)
+_DATE_RE = re.compile(r"^(\d{4}-\d{2}-\d{2})")
+# Títulos de seção que não são notícias
+_GENERIC_HEADINGS = (
+    "fontes",
+    "conclusão",
+    "introdução",
+    "destaques rápidos",
+    "considerações finais",
+)
+
+_FILE_LOCK = threading.Lock()
+
+
+@dataclass
+class DigestEntry:
+    """Manchetes e fontes de um resumo semanal já publicado."""
+
+    filename: str
+    date: str
+    mtime: float
+    size: int
+    headlines: List[str] = field(default_factory=list)
+    urls: List[str] = field(default_factory=list)
+    # Posts que não são resumos também ficam no índice, para não serem relidos
+    digest: bool = True
+
+
+class DigestHistoryIndex:
+    """Índice das notícias já cobertas pelos resumos semanais em `_posts/`.
+
+    Um post é resumo se tem `DIGEST_CATEGORY` nas categorias ou nas tags do
+    front matter (o nome do arquivo nem sempre traz "resumo-da-semana").
+    Guarda, por resumo, as manchetes (títulos de seção e itens em negrito) e
+    as URLs canônicas da seção `## Fontes`, em `STATE_DIR/digest_history.json`.
+    Os redirects do grounding das fontes são trocados pela URL final com o
+    `resolver` (que consulta primeiro `resolved_urls.json`), uma vez por
+    post novo; sem `resolver`, ficam como estão. `refresh` só relê os posts
+    novos ou alterados (mtime/tamanho) e esquece os removidos, então o custo
+    de cada execução é um `stat` por post.
+    """
+
+    def __init__(
+        self,
+        posts_dir: Path = POSTS_DIR,
+        path: Path = DIGEST_HISTORY_PATH,
+        resolver: Optional[UrlResolver] = None,
+    ):
+        self._posts_dir = posts_dir
+        self._path = path
+        self._resolver = resolver
+        self._entries: Optional[Dict[str, DigestEntry]] = None
+
+    def refresh(self) -> Dict[str, DigestEntry]:
+        """Atualiza o índice e devolve os resumos, por nome de arquivo."""
+        entries = self._load()
+        current: Dict[str, DigestEntry] = {}
+        parsed: List[DigestEntry] = []
+        for post in self._posts_dir.glob("*.md"):
+            stat = post.stat()
+            entry = entries.get(post.name)
+            changed = entry is None or entry.mtime != stat.st_mtime
+            if changed or entry.size != stat.st_size:
+                entry = _parse_post(post, stat.st_mtime, stat.st_size)
+                parsed.append(entry)
+            current[post.name] = entry
+
+        if parsed or current.keys() != entries.keys():
+            self._resolve([e for e in parsed if e.digest])
+            logger.info(
+                "Histórico de resumos: %d resumos, %d posts relidos",
+                sum(e.digest for e in current.values()),
+                len(parsed),
+            )
+            self._save(current)
+        self._entries = {name: e for name, e in current.items() if e.digest}
+        return self._entries
+
+    def recent(
+        self, weeks: int = 4, now: Optional[datetime] = None
+    ) -> List[DigestEntry]:
+        """Resumos das últimas `weeks` semanas, do mais novo para o mais antigo."""
+        if self._entries is None:
+            self.refresh()
+        since = ((now or datetime.now()) - timedelta(weeks=weeks)).strftime("%Y-%m-%d")
+        entries = [e for e in self._entries.values() if e.date >= since]
+        return sorted(entries, key=lambda e: e.date, reverse=True)
+
+    def covered(self, weeks: int = 4) -> tuple[List[str], Set[str]]:
+        """Manchetes (mais novas primeiro) e URLs dos resumos recentes."""
+        headlines: List[str] = []
+        urls: Set[str] = set()
+        for entry in self.recent(weeks):
+            headlines += entry.headlines
+            urls.update(entry.urls)
+        return headlines, urls
+
+    def _resolve(self, entries: Iterable[DigestEntry]) -> None:
+        """Troca os redirects do grounding nas fontes pelas URLs finais."""
+        entries = [e for e in entries if any(map(_is_redirect, e.urls))]
+        if not entries or self._resolver is None:
+            return
+        resolved = self._resolver.resolve_all(
+            url for e in entries for url in e.urls if _is_redirect(url)
+        )
+        for entry in entries:
+            entry.urls = list(dict.fromkeys(resolved.get(u, u) for u in entry.urls))
+
+    def _load(self) -> Dict[str, DigestEntry]:
+        try:
+            data = json.loads(self._path.read_text(encoding="utf-8"))
+            # Entradas sem `digest` são do formato antigo (fontes sem resolver)
+            # e são relidas
+            return {
+                name: DigestEntry(**entry)
+                for name, entry in data.items()
+                if "digest" in entry
+            }
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError, TypeError):
+            logger.warning("Histórico de resumos ilegível em %s; recriando", self._path)
+            return {}
+
+    def _save(self, entries: Dict[str, DigestEntry]) -> None:
+        with _FILE_LOCK:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self._path.with_suffix(".tmp")
+            tmp.write_text(
+                json.dumps(
+                    {name: asdict(e) for name, e in sorted(entries.items())},
+                    ensure_ascii=False,
+                    indent=1,
+                ),
+                encoding="utf-8",
+            )
+            tmp.replace(self._path)
+
+
+def _is_redirect(url: str) -> bool:
+    return urlsplit(url).netloc.lower() == GROUNDING_REDIRECT_HOST
+
+
+def _is_digest(content: str) -> bool:
+    fm_match = _FRONT_MATTER_RE.match(content)
+    if not fm_match:
+        return False
+    return any(
+        value.strip().strip("\"'") == DIGEST_CATEGORY
+        for values in _TAXONOMY_RE.findall(fm_match.group(1))
+        for value in values.split(",")
+    )
+
+
+def _parse_post(post: Path, mtime: float, size: int) -> DigestEntry:
+    content = post.read_text(encoding="utf-8")
+    date_match = _DATE_RE.match(post.name)
+    if not _is_digest(content):
+        return DigestEntry(
+            filename=post.name,
+            date=date_match.group(1) if date_match else "",
+            mtime=mtime,
+            size=size,
+            digest=False,
+        )
+
+    headlines: List[str] = []
+    matches = [*_HEADING_RE.finditer(content), *_BOLD_ITEM_RE.finditer(content)]
+    for match in sorted(matches, key=lambda m: m.start()):
+        headline = _CITATION_RE.sub("", match.group(1)).replace("*", "").strip(" :")
+        if headline and not headline.lower().startswith(_GENERIC_HEADINGS):
+            if headline not in headlines:
+                headlines.append(headline)
+
+    urls: List[str] = []
+    sources = _SOURCES_RE.search(content)
+    if sources:
+        for uri in _SOURCE_ITEM_RE.findall(sources.group(1)):
+            # Redirects ficam como vieram: a chave de resolved_urls.json é a URI
+            url = uri if _is_redirect(uri) else canonical_url(uri)
+            if url not in urls:
+                urls.append(url)
+
+    return DigestEntry(
+        filename=post.name,
+        date=date_match.group(1) if date_match else "",
+        mtime=mtime,
+        size=size,
+        headlines=headlines,
+        urls=urls,
+    )
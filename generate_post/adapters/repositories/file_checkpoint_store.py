@@ -0,0 +1,112 @@
+import json
+import logging
+import os
+import shutil
+import tempfile
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional
+
+from generate_post.config.constants import STATE_DIR
+from generate_post.core.domain.interfaces.checkpoint_store import (
+    DONE_STAGE,
+    CheckpointStoreInterface,
+)
+
+logger = logging.getLogger(__name__)
+
+RUNS_DIR = STATE_DIR / "runs"
+
+# Execuções antigas mantidas em RUNS_DIR
+KEEP_RUNS = 10
+
+
+class FileCheckpointStore(CheckpointStoreInterface):
+    """Checkpoints em `.generate_post/runs/<run_id>/<etapa>.json`.
+
+    Cada etapa é gravada num arquivo temporário no mesmo diretório e só então
+    renomeada (`os.replace` é atômico), então uma execução que cai no meio de
+    uma escrita nunca deixa um checkpoint pela metade.
+    """
+
+    def __init__(self, run_dir: Path):
+        self.run_dir = run_dir
+        self.run_id = run_dir.name
+
+    @classmethod
+    def for_run(
+        cls,
+        run_id: Optional[str] = None,
+        resume: bool = False,
+        runs_dir: Path = RUNS_DIR,
+    ) -> "FileCheckpointStore":
+        """Abre o diretório da execução.
+
+        Com `resume`, reaproveita os checkpoints de `run_id` (ou da execução
+        incompleta mais recente); sem ele, a execução começa do zero. Uma
+        execução retomada que já terminou é devolvida intacta, com `done`.
+        """
+        if resume and run_id is None:
+            run_id = _latest_incomplete(runs_dir)
+            if run_id is None:
+                logger.info("Nenhuma execução incompleta para retomar")
+                resume = False
+        run_id = run_id or datetime.now().strftime("%Y%m%d-%H%M%S")
+        run_dir = runs_dir / run_id
+
+        if run_dir.exists() and not resume:
+            shutil.rmtree(run_dir)
+        elif run_dir.exists():
+            stages = sorted(p.stem for p in run_dir.glob("*.json"))
+            logger.info("Retomando execução %s (etapas: %s)", run_id, stages)
+
+        run_dir.mkdir(parents=True, exist_ok=True)
+        _prune(runs_dir, keep=run_id)
+        return cls(run_dir)
+
+    @property
+    def done(self) -> Optional[Dict]:
+        """Checkpoint final da execução, se o post já foi salvo"""
+        return self.load(DONE_STAGE)
+
+    def load(self, stage: str) -> Optional[Dict]:
+        path = self.run_dir / f"{stage}.json"
+        try:
+            return json.loads(path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return None
+
+    def save(self, stage: str, data: Dict) -> None:
+        self.run_dir.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.run_dir, prefix=f".{stage}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, indent=1)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.run_dir / f"{stage}.json")
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+        logger.info("Checkpoint %s/%s gravado", self.run_id, stage)
+
+
+def _latest_incomplete(runs_dir: Path) -> Optional[str]:
+    if not runs_dir.is_dir():
+        return None
+    runs = sorted(
+        (p for p in runs_dir.iterdir() if p.is_dir()), key=lambda p: p.stat().st_mtime
+    )
+    for run_dir in reversed(runs):
+        if not (run_dir / f"{DONE_STAGE}.json").exists():
+            return run_dir.name
+    return None
+
+
+def _prune(runs_dir: Path, keep: str) -> None:
+    runs = sorted(
+        (p for p in runs_dir.iterdir() if p.is_dir() and p.name != keep),
+        key=lambda p: p.stat().st_mtime,
+    )
+    for run_dir in runs[: max(0, len(runs) - (KEEP_RUNS - 1))]:
+        shutil.rmtree(run_dir, ignore_errors=True)
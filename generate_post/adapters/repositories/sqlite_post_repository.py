@@ -0,0 +1,283 @@
+import hashlib
+import logging
+import re
+import sqlite3
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from generate_post.adapters.repositories.file_post_repository import (
+    FilePostRepository,
+)
+from generate_post.core.domain.entities.post import Post
+from generate_post.core.domain.interfaces.post_repository import (
+    PostRepositoryInterface,
+)
+from generate_post.config.constants import POSTS_DIR, STATE_DIR
+
+logger = logging.getLogger(__name__)
+
+POSTS_DB_PATH = STATE_DIR / "posts.sqlite3"
+
+_FRONT_MATTER_RE = re.compile(r"^---\s*\n(.+?)\n---\s*\n", re.DOTALL)
+_FIELD_RE = re.compile(r"^(\w+):[ \t]*(.*?)\s*$")
+_NESTED_RE = re.compile(r"^\s+(\w+):[ \t]*(.*?)\s*$")
+_DATE_RE = re.compile(r"^(\d{4}-\d{2}-\d{2})")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS posts (
+    filename TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    date TEXT NOT NULL,
+    categories TEXT NOT NULL,
+    tags TEXT NOT NULL,
+    image TEXT,
+    audio TEXT,
+    body_hash TEXT NOT NULL,
+    mtime REAL NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS posts_date ON posts (date);
+CREATE TABLE IF NOT EXISTS post_tags (
+    tag TEXT NOT NULL,
+    date TEXT NOT NULL,
+    filename TEXT NOT NULL REFERENCES posts ON DELETE CASCADE,
+    PRIMARY KEY (tag, date, filename)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS post_categories (
+    category TEXT NOT NULL,
+    filename TEXT NOT NULL REFERENCES posts ON DELETE CASCADE,
+    PRIMARY KEY (category, filename)
+) WITHOUT ROWID;
+"""
+
+
+@dataclass
+class PostRecord:
+    """Front matter de um post indexado (sem o corpo)."""
+
+    filename: str
+    title: str
+    date: str
+    categories: List[str] = field(default_factory=list)
+    tags: List[str] = field(default_factory=list)
+    image: Optional[str] = None
+    audio: Optional[str] = None
+    body_hash: str = ""
+
+
+class SqlitePostRepository(PostRepositoryInterface):
+    """Repositório de posts com um índice SQLite do front matter.
+
+    Os arquivos em `_posts/` continuam sendo a fonte da verdade (a escrita é
+    do `FilePostRepository`); o banco em `STATE_DIR/posts.sqlite3` guarda
+    título, data, categorias, tags, imagem, áudio e hash do corpo de cada
+    post. Na primeira consulta o índice é sincronizado: só os arquivos com
+    mtime ou tamanho diferentes são relidos, e os removidos saem do banco.
+    Se o conteúdo relido for igual ao indexado (checkout novo, `touch`), só
+    o mtime é atualizado. As consultas usam os índices por data, tag e
+    categoria.
+
+    A conexão fica aberta até `close()`; use o repositório num `with`.
+    """
+
+    def __init__(self, posts_dir: Path = POSTS_DIR, db_path: Path = POSTS_DB_PATH):
+        self._posts_dir = posts_dir
+        self._files = FilePostRepository()
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(db_path)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA foreign_keys = ON")
+        self._db.executescript(_SCHEMA)
+        self._synced = False
+
+    def __enter__(self) -> "SqlitePostRepository":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Fecha a conexão com o banco"""
+        self._db.close()
+
+    def save_post(self, post: Post) -> bool:
+        """Salva o post como markdown (via FilePostRepository)"""
+        saved = self._files.save_post(post)
+        # O post novo entra no índice na próxima consulta
+        self._synced = False
+        return saved
+
+    def get_last_post(self) -> Optional[Post]:
+        """Recupera o último post (maior nome de arquivo, como no arquivo)"""
+        self.sync()
+        row = self._db.execute(
+            "SELECT * FROM posts ORDER BY filename DESC LIMIT 1"
+        ).fetchone()
+        if row is None:
+            return None
+
+        content = (self._posts_dir / row["filename"]).read_text(encoding="utf-8")
+        fm_match = _FRONT_MATTER_RE.search(content)
+        return Post(
+            title=row["title"],
+            categories=row["categories"],
+            tags=row["tags"],
+            content=content[fm_match.end() :].strip() if fm_match else "",
+            date=datetime.strptime(row["date"], "%Y-%m-%d") if row["date"] else None,
+            image_path=row["image"],
+            filename=f"_posts/{row['filename']}",
+        )
+
+    def recent(self, n: int = 10) -> List[PostRecord]:
+        """Os `n` posts mais recentes, do mais novo para o mais antigo"""
+        self.sync()
+        rows = self._db.execute(
+            "SELECT * FROM posts ORDER BY date DESC, filename DESC LIMIT ?", (n,)
+        )
+        return [self._record(row) for row in rows]
+
+    def by_tag(self, tag: str, since: Optional[str] = None) -> List[PostRecord]:
+        """Posts com a tag `tag` desde `since` (YYYY-MM-DD), mais novos primeiro"""
+        self.sync()
+        rows = self._db.execute(
+            "SELECT posts.* FROM post_tags JOIN posts USING (filename) "
+            "WHERE post_tags.tag = ? AND post_tags.date >= ? "
+            "ORDER BY post_tags.date DESC, filename DESC",
+            (_normalize(tag), since or ""),
+        )
+        return [self._record(row) for row in rows]
+
+    def count_by_category(self) -> Dict[str, int]:
+        """Número de posts por categoria, da maior para a menor"""
+        self.sync()
+        rows = self._db.execute(
+            "SELECT category, COUNT(*) FROM post_categories "
+            "GROUP BY category ORDER BY COUNT(*) DESC, category"
+        )
+        return {category: count for category, count in rows}
+
+    def sync(self, force: bool = False) -> None:
+        """Atualiza o índice com os posts novos, alterados e removidos"""
+        if self._synced and not force:
+            return
+        known = {
+            row["filename"]: (row["mtime"], row["size"])
+            for row in self._db.execute("SELECT filename, mtime, size FROM posts")
+        }
+        indexed = 0
+        with self._db:
+            for path in self._posts_dir.glob("*.md"):
+                stat = path.stat()
+                if known.pop(path.name, None) != (stat.st_mtime, stat.st_size):
+                    indexed += self._index(path, stat.st_mtime, stat.st_size)
+            self._db.executemany(
+                "DELETE FROM posts WHERE filename = ?", [(name,) for name in known]
+            )
+        if indexed or known:
+            logger.info(
+                "Índice de posts: %d atualizados, %d removidos", indexed, len(known)
+            )
+        self._synced = True
+
+    def _index(self, path: Path, mtime: float, size: int) -> bool:
+        """Indexa `path`; devolve False se o conteúdo já estava no índice"""
+        content = path.read_text(encoding="utf-8")
+        fm_match = _FRONT_MATTER_RE.search(content)
+        fields = _front_matter(fm_match.group(1) if fm_match else "")
+        body = content[fm_match.end() :] if fm_match else content
+
+        date_match = _DATE_RE.match(fields.get("date", "")) or _DATE_RE.match(path.name)
+        date = date_match.group(1) if date_match else ""
+        categories = _split(fields.get("categories", ""))
+        tags = _split(fields.get("tags", ""))
+
+        row = (
+            path.name,
+            fields.get("title", ""),
+            date,
+            fields.get("categories", ""),
+            fields.get("tags", ""),
+            fields.get("image.path") or fields.get("image") or None,
+            fields.get("audio") or None,
+            hashlib.sha256(body.encode("utf-8")).hexdigest()[:16],
+        )
+        indexed = self._db.execute(
+            "SELECT filename, title, date, categories, tags, image, audio, "
+            "body_hash FROM posts WHERE filename = ?",
+            (path.name,),
+        ).fetchone()
+        if indexed is not None and tuple(indexed) == row:
+            # Mesmo front matter e mesmo corpo: tags e categorias não mudam
+            self._db.execute(
+                "UPDATE posts SET mtime = ?, size = ? WHERE filename = ?",
+                (mtime, size, path.name),
+            )
+            return False
+
+        self._db.execute("DELETE FROM posts WHERE filename = ?", (path.name,))
+        self._db.execute(
+            "INSERT INTO posts VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (*row, mtime, size),
+        )
+        self._db.executemany(
+            "INSERT OR IGNORE INTO post_tags VALUES (?, ?, ?)",
+            [(_normalize(tag), date, path.name) for tag in tags],
+        )
+        self._db.executemany(
+            "INSERT OR IGNORE INTO post_categories VALUES (?, ?)",
+            [(_normalize(category), path.name) for category in categories],
+        )
+        return True
+
+    @staticmethod
+    def _record(row: sqlite3.Row) -> PostRecord:
+        return PostRecord(
+            filename=f"_posts/{row['filename']}",
+            title=row["title"],
+            date=row["date"],
+            categories=_split(row["categories"]),
+            tags=_split(row["tags"]),
+            image=row["image"],
+            audio=row["audio"],
+            body_hash=row["body_hash"],
+        )
+
+
+def _front_matter(text: str) -> Dict[str, str]:
+    """Campos de primeiro nível do front matter; `image.path` para o aninhado.
+
+    Listas `[a, b]` ficam como o texto entre colchetes, como no
+    FilePostRepository.
+    """
+    fields: Dict[str, str] = {}
+    parent = ""
+    for line in text.splitlines():
+        nested = _NESTED_RE.match(line)
+        if nested and parent:
+            fields[f"{parent}.{nested.group(1)}"] = _unquote(nested.group(2))
+            continue
+        match = _FIELD_RE.match(line)
+        if not match:
+            continue
+        key, value = match.groups()
+        parent = key if not value else ""
+        if value.startswith("[") and value.endswith("]"):
+            value = value[1:-1]
+        fields[key] = _unquote(value)
+    return fields
+
+
+def _unquote(value: str) -> str:
+    if len(value) >= 2 and value[0] == value[-1] and value[0] in "\"'":
+        return value[1:-1]
+    return value
+
+
+def _split(value: str) -> List[str]:
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+def _normalize(value: str) -> str:
+    return value.strip().lower()
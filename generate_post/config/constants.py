@@ -9,6 +9,12 @@ ASSETS_DIR = ROOT_DIR / "assets" / "img" / "posts"
 # Diretório de posts
 POSTS_DIR = ROOT_DIR / "_posts"
 
+# Estado local entre execuções (rascunhos, estatísticas); fora do git
+STATE_DIR = ROOT_DIR / ".generate_post"
+
 # Configuração de retries
 MAX_RETRIES = 3
 RETRY_DELAY = 2  # segundos
+
+# Prazo total de um caso de uso (texto + imagem, com todas as tentativas)
+GENERATION_DEADLINE = 15 * 60  # segundos
@@ -11,6 +11,8 @@ class EnvConfig:
     cf_api_token: Optional[str]
     cf_account_id: Optional[str]
     github_output: Optional[str]
+    # Modo do cache de respostas HTTP (off, readthrough, record, replay)
+    http_cache: str = "off"
 
     @classmethod
     def from_env(cls) -> "EnvConfig":
@@ -20,6 +22,7 @@ class EnvConfig:
             cf_api_token=os.getenv("CF_AI_API_KEY"),
             cf_account_id=os.getenv("CF_ACCOUNT_ID"),
             github_output=os.getenv("GITHUB_OUTPUT"),
+            http_cache=os.getenv("GENERATE_POST_HTTP_CACHE", "off"),
         )
 
     def validate_gemini(self) -> None:
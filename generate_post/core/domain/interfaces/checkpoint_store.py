@@ -0,0 +1,19 @@
+from abc import ABC, abstractmethod
+from typing import Dict, Optional
+
+# Etapa gravada depois que o post foi salvo
+DONE_STAGE = "done"
+
+
+class CheckpointStoreInterface(ABC):
+    """Interface para guardar o resultado de cada etapa de uma execução"""
+
+    @abstractmethod
+    def load(self, stage: str) -> Optional[Dict]:
+        """Recupera o resultado de uma etapa já concluída, se houver"""
+        pass
+
+    @abstractmethod
+    def save(self, stage: str, data: Dict) -> None:
+        """Grava o resultado de uma etapa concluída"""
+        pass
@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import Optional, Dict
+from typing import Callable, Dict, Optional
 
 
 class ContentGeneratorServiceInterface(ABC):
@@ -10,6 +10,19 @@ class ContentGeneratorServiceInterface(ABC):
         """Gera conteúdo a partir de um prompt"""
         pass
 
+    def generate_content_with_preview(
+        self, prompt: str, on_preview: Callable[[Dict], None]
+    ) -> str:
+        """Gera conteúdo chamando `on_preview` assim que houver uma prévia do post.
+
+        A prévia tem as chaves de `parse_generated_content`, com apenas o início
+        do corpo em `content`. Por padrão ela só fica pronta com o texto completo;
+        implementações com streaming podem chamá-la bem antes.
+        """
+        generated_text = self.generate_content(prompt)
+        on_preview(self.parse_generated_content(generated_text))
+        return generated_text
+
     @abstractmethod
     def create_prompt(self, last_post: Optional[Dict] = None) -> str:
         """Cria um prompt para geração de conteúdo"""
@@ -18,3 +18,11 @@ class ImageGeneratorServiceInterface(ABC):
     ) -> str:
         """Cria um prompt para geração de imagem"""
         pass
+
+    def image_exists(self, image_path: str) -> bool:
+        """Se uma imagem gerada antes ainda está disponível (ex.: ao retomar)"""
+        return True
+
+    def delete_image(self, image_path: str) -> None:
+        """Remove uma imagem gerada que não vai ser usada (ex.: texto descartado)"""
+        pass
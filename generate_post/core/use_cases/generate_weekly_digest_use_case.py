@@ -1,8 +1,14 @@
 import logging
 import re
 from datetime import datetime
+from typing import Optional
 
+from generate_post.config.constants import GENERATION_DEADLINE
 from generate_post.core.domain.entities.post import Post
+from generate_post.core.domain.interfaces.checkpoint_store import (
+    DONE_STAGE,
+    CheckpointStoreInterface,
+)
 from generate_post.core.domain.interfaces.content_generator_service import (
     ContentGeneratorServiceInterface,
 )
@@ -12,6 +18,10 @@ from generate_post.core.domain.interfaces.image_generator_service import (
 from generate_post.core.domain.interfaces.post_repository import (
     PostRepositoryInterface,
 )
+from generate_post.core.use_cases.overlapped_generation import (
+    generate_text_and_image,
+)
+from generate_post.utils.retry_decorator import deadline
 
 logger = logging.getLogger(__name__)
 
@@ -27,16 +37,27 @@ class GenerateWeeklyDigestUseCase:
         post_repository: PostRepositoryInterface,
         content_generator: ContentGeneratorServiceInterface,
         image_generator: ImageGeneratorServiceInterface,
+        deadline_seconds: float = GENERATION_DEADLINE,
+        checkpoints: Optional[CheckpointStoreInterface] = None,
     ):
         self._post_repository = post_repository
         self._content_generator = content_generator
         self._image_generator = image_generator
+        self._deadline_seconds = deadline_seconds
+        self._checkpoints = checkpoints
 
     def execute(self) -> Post:
         # Gera conteúdo usando Google Search grounding
         prompt = self._content_generator.create_prompt()
-        generated_text = self._content_generator.generate_content(prompt)
-        post_data = self._content_generator.parse_generated_content(generated_text)
+        # Gera conteúdo e imagem (a imagem começa assim que há uma prévia),
+        # com um prazo total que vale para todas as tentativas
+        with deadline(self._deadline_seconds):
+            post_data, image_path = generate_text_and_image(
+                self._content_generator,
+                self._image_generator,
+                prompt,
+                checkpoints=self._checkpoints,
+            )
 
         title = post_data["title"]
         categories = post_data["categories"]
@@ -46,11 +67,6 @@ class GenerateWeeklyDigestUseCase:
         slug = _SLUG_RE.sub("-", title.lower()).strip("-")
         date = datetime.now()
 
-        # Gera imagem
-        image_path = self._image_generator.generate_image(
-            title, categories, tags, content
-        )
-
         post = Post(
             title=title,
             categories=categories,
@@ -63,4 +79,6 @@ class GenerateWeeklyDigestUseCase:
         )
 
         self._post_repository.save_post(post)
+        if self._checkpoints is not None:
+            self._checkpoints.save(DONE_STAGE, {"filename": post.filename})
         return post
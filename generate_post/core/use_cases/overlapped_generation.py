@@ -0,0 +1,202 @@
+import contextvars
+import logging
+import threading
+import time
+from concurrent.futures import Future
+from typing import Dict, Optional, Tuple
+
+from generate_post.core.domain.interfaces.checkpoint_store import (
+    CheckpointStoreInterface,
+)
+from generate_post.core.domain.interfaces.content_generator_service import (
+    ContentGeneratorServiceInterface,
+)
+from generate_post.core.domain.interfaces.image_generator_service import (
+    ImageGeneratorServiceInterface,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def generate_text_and_image(
+    content_generator: ContentGeneratorServiceInterface,
+    image_generator: ImageGeneratorServiceInterface,
+    prompt: str,
+    checkpoints: Optional[CheckpointStoreInterface] = None,
+) -> Tuple[Dict, Optional[str]]:
+    """Gera o texto e a imagem do post com as duas latências sobrepostas.
+
+    A imagem só depende de título, categorias, tags e do início do corpo, então
+    é disparada em outra thread assim que o gerador de conteúdo entrega a
+    prévia, em vez de esperar o texto completo. Retorna o post já parseado e o
+    caminho da imagem (ou None).
+
+    Com `checkpoints`, o texto bruto, o post parseado e a imagem são gravados
+    assim que ficam prontos, e etapas já gravadas não são refeitas.
+
+    A imagem roda numa thread daemon: se o texto falhar, a exceção sobe na
+    hora, sem esperar a imagem. Uma imagem que não vai ser usada (o texto
+    falhou ou o título mudou depois da prévia) é apagada quando terminar.
+    """
+    if checkpoints is not None:
+        resumed = _resume(content_generator, image_generator, checkpoints)
+        if resumed is not None:
+            return resumed
+
+    started = time.perf_counter()
+    image_future: Optional[Future] = None
+    image_started_at = 0.0
+    preview: Dict = {}
+
+    def on_preview(data: Dict) -> None:
+        nonlocal image_future, image_started_at
+        # Uma nova tentativa do texto pode chamar a prévia de novo.
+        if image_future is not None:
+            return
+        preview.update(data)
+        image_started_at = time.perf_counter() - started
+        logger.info("Prévia pronta em %.1fs; gerando imagem", image_started_at)
+        image_future = _spawn_image(image_generator, data)
+
+    try:
+        generated_text = content_generator.generate_content_with_preview(
+            prompt, on_preview
+        )
+        text_seconds = time.perf_counter() - started
+        if checkpoints is not None:
+            checkpoints.save("generated_text", {"text": generated_text})
+        post_data = content_generator.parse_generated_content(generated_text)
+        if checkpoints is not None:
+            checkpoints.save("post_data", post_data)
+
+        if image_future is None:
+            on_preview(post_data)
+        elif preview["title"] != post_data["title"]:
+            # O texto final veio de outra tentativa, com outro assunto: a
+            # imagem da prévia não é esperada e some quando terminar.
+            logger.warning(
+                "Título mudou após a prévia (%r -> %r); descartando a imagem da "
+                "prévia",
+                preview["title"],
+                post_data["title"],
+            )
+            _discard_image(image_generator, image_future)
+            image_future = None
+            on_preview(post_data)
+
+        waiting = time.perf_counter()
+        image_path, image_seconds = image_future.result()
+        waited = time.perf_counter() - waiting
+        if checkpoints is not None:
+            _save_image(checkpoints, post_data, image_path)
+    except BaseException:
+        if image_future is not None:
+            _discard_image(image_generator, image_future)
+        raise
+
+    total = time.perf_counter() - started
+    logger.info(
+        "Tempos: texto %.1fs, imagem %.1fs (iniciada em %.1fs, espera final "
+        "%.1fs), total %.1fs; sobreposição economizou %.1fs",
+        text_seconds,
+        image_seconds,
+        image_started_at,
+        waited,
+        total,
+        max(0.0, text_seconds + image_seconds - total),
+    )
+    return post_data, image_path
+
+
+def _spawn_image(
+    image_generator: ImageGeneratorServiceInterface, post_data: Dict
+) -> Future:
+    """Gera a imagem numa thread daemon, que não segura o fim do processo."""
+    future: Future = Future()
+
+    def job() -> None:
+        try:
+            future.set_result(_timed_image(image_generator, post_data))
+        except BaseException as exc:
+            future.set_exception(exc)
+
+    # copy_context: a thread herda o prazo total do caso de uso.
+    threading.Thread(
+        target=contextvars.copy_context().run,
+        args=(job,),
+        name="image",
+        daemon=True,
+    ).start()
+    return future
+
+
+def _discard_image(
+    image_generator: ImageGeneratorServiceInterface, future: Future
+) -> None:
+    """Apaga a imagem de `future` quando ela ficar pronta, sem esperar por ela."""
+
+    def discard(done: Future) -> None:
+        if done.exception() is not None:
+            return
+        image_path, _ = done.result()
+        if image_path:
+            try:
+                image_generator.delete_image(image_path)
+            except OSError as e:
+                logger.warning("Falha ao remover imagem %s: %s", image_path, e)
+
+    future.add_done_callback(discard)
+
+
+def _timed_image(
+    image_generator: ImageGeneratorServiceInterface, post_data: Dict
+) -> Tuple[Optional[str], float]:
+    started = time.perf_counter()
+    image_path = image_generator.generate_image(
+        post_data["title"],
+        post_data["categories"],
+        post_data["tags"],
+        post_data["content"],
+    )
+    return image_path, time.perf_counter() - started
+
+
+def _resume(
+    content_generator: ContentGeneratorServiceInterface,
+    image_generator: ImageGeneratorServiceInterface,
+    checkpoints: CheckpointStoreInterface,
+) -> Optional[Tuple[Dict, Optional[str]]]:
+    """Retoma a partir do texto já gerado; None se a geração ainda não terminou."""
+    post_data = checkpoints.load("post_data")
+    if post_data is None:
+        stored_text = checkpoints.load("generated_text")
+        if stored_text is None:
+            return None
+        post_data = content_generator.parse_generated_content(stored_text["text"])
+        checkpoints.save("post_data", post_data)
+    logger.info("Texto retomado do checkpoint: %s", post_data["title"])
+
+    stored_image = checkpoints.load("image")
+    if (
+        stored_image is not None
+        and stored_image["title"] == post_data["title"]
+        and image_generator.image_exists(stored_image["image_path"])
+    ):
+        logger.info("Imagem retomada do checkpoint: %s", stored_image["image_path"])
+        return post_data, stored_image["image_path"]
+
+    image_path, image_seconds = _timed_image(image_generator, post_data)
+    logger.info("Tempos: imagem %.1fs (texto do checkpoint)", image_seconds)
+    _save_image(checkpoints, post_data, image_path)
+    return post_data, image_path
+
+
+def _save_image(
+    checkpoints: CheckpointStoreInterface, post_data: Dict, image_path: Optional[str]
+) -> None:
+    # Sem imagem (credenciais ausentes, circuito aberto) não há o que guardar:
+    # ao retomar, a imagem é tentada de novo.
+    if image_path:
+        checkpoints.save(
+            "image", {"title": post_data["title"], "image_path": image_path}
+        )
@@ -2,6 +2,8 @@
 import argparse
 import logging
 import sys
+from contextlib import ExitStack
+from dataclasses import replace
 
 from generate_post.adapters.api import (
     GeminiContentService,
@@ -9,9 +11,17 @@ from generate_post.adapters.api import (
     GeminiNewsDigestService,
 )
 from generate_post.adapters.cli.cli_handler import CLIHandler
+from generate_post.adapters.repositories.digest_history import DigestHistoryIndex
+from generate_post.adapters.repositories.file_checkpoint_store import (
+    RUNS_DIR,
+    FileCheckpointStore,
+)
 from generate_post.adapters.repositories.file_post_repository import (
     FilePostRepository,
 )
+from generate_post.adapters.repositories.sqlite_post_repository import (
+    SqlitePostRepository,
+)
 from generate_post.config.env_config import EnvConfig
 from generate_post.core.use_cases.generate_post_use_case import (
     GeneratePostUseCase,
@@ -19,6 +29,8 @@ from generate_post.core.use_cases.generate_post_use_case import (
 from generate_post.core.use_cases.generate_weekly_digest_use_case import (
     GenerateWeeklyDigestUseCase,
 )
+from generate_post.utils.response_cache import MODES, REPLAY
+from generate_post.utils.url_resolver import UrlResolver
 
 logger = logging.getLogger(__name__)
 
@@ -38,6 +50,58 @@ def _parse_args() -> argparse.Namespace:
         action="store_true",
         help="Gera um resumo semanal de notícias (usa Google Search grounding)",
     )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Usa streamGenerateContent: cabeçalho processado assim que chega, "
+        "corpo gravado em rascunho e prazo para o primeiro token",
+    )
+    parser.add_argument(
+        "--hedge",
+        action="store_true",
+        help="Se uma chamada passar do p95 do modelo, dispara outra em um modelo "
+        "diferente e fica com a primeira resposta (limitado por orçamento)",
+    )
+    parser.add_argument(
+        "--fan-out",
+        action="store_true",
+        help="No resumo semanal, pesquisa cada área (IA, DevTools, Cloud, "
+        "Segurança, Open source) em paralelo e escreve o post numa chamada de "
+        "síntese a partir das notícias reunidas",
+    )
+    parser.add_argument(
+        "--context-cache",
+        action="store_true",
+        help="Guarda a instrução de sistema e o template do prompt num cache de "
+        "contexto do Gemini e envia só a parte variável em cada chamada (sem "
+        "efeito com os templates atuais, menores que o mínimo de tokens do cache)",
+    )
+    parser.add_argument(
+        "--run-id",
+        help="Identificador da execução (diretório em .generate_post/runs/); "
+        "padrão: data e hora atuais",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Retoma a execução --run-id (ou a última incompleta), pulando as "
+        "etapas que já têm checkpoint",
+    )
+    parser.add_argument(
+        "--repository",
+        choices=("file", "sqlite"),
+        default="file",
+        help="Repositório de posts: file (lê _posts/ direto) ou sqlite (índice "
+        "do front matter em .generate_post/posts.sqlite3, sincronizado por "
+        "mtime e tamanho)",
+    )
+    parser.add_argument(
+        "--cache",
+        choices=MODES,
+        help="Cache de respostas das APIs em .generate_post/http_cache/: "
+        "readthrough (usa o gravado ou grava), record (sempre regrava) ou "
+        "replay (só o gravado, sem rede); padrão: GENERATE_POST_HTTP_CACHE ou off",
+    )
     return parser.parse_args()
 
 
@@ -48,27 +112,65 @@ def main():
     try:
         args = _parse_args()
         env = EnvConfig.from_env()
-
-        post_repository = FilePostRepository()
-        image_generator = CloudflareImageService(env_config=env)
-
-        if args.weekly_digest:
-            content_generator = GeminiNewsDigestService(env_config=env)
-            use_case = GenerateWeeklyDigestUseCase(
-                post_repository=post_repository,
-                content_generator=content_generator,
-                image_generator=image_generator,
-            )
-        else:
-            content_generator = GeminiContentService(env_config=env)
-            use_case = GeneratePostUseCase(
-                post_repository=post_repository,
-                content_generator=content_generator,
-                image_generator=image_generator,
+        if args.cache:
+            env = replace(env, http_cache=args.cache)
+
+        # Fecha o que foi aberto (ex.: o banco do repositório SQLite)
+        checkpoints = FileCheckpointStore.for_run(
+            args.run_id,
+            resume=args.resume,
+            runs_dir=RUNS_DIR / ("digest" if args.weekly_digest else "post"),
+        )
+        if checkpoints.done is not None:
+            # Retomar uma execução concluída não regrava o post nem as etapas
+            logger.info(
+                "Execução %s já concluída (%s); nada a fazer",
+                checkpoints.run_id,
+                checkpoints.done["filename"],
             )
+            sys.exit(0)
 
-        cli_handler = CLIHandler(use_case, env_config=env)
-        success = cli_handler.execute()
+        with ExitStack() as resources:
+            post_repository = (
+                resources.enter_context(SqlitePostRepository())
+                if args.repository == "sqlite"
+                else FilePostRepository()
+            )
+            image_generator = CloudflareImageService(env_config=env, hedge=args.hedge)
+
+            if args.weekly_digest:
+                content_generator = GeminiNewsDigestService(
+                    env_config=env,
+                    stream=args.stream,
+                    hedge=args.hedge,
+                    context_cache=args.context_cache,
+                    fan_out=args.fan_out,
+                    history=DigestHistoryIndex(
+                        resolver=UrlResolver(offline=env.http_cache == REPLAY)
+                    ),
+                )
+                use_case = GenerateWeeklyDigestUseCase(
+                    post_repository=post_repository,
+                    content_generator=content_generator,
+                    image_generator=image_generator,
+                    checkpoints=checkpoints,
+                )
+            else:
+                content_generator = GeminiContentService(
+                    env_config=env,
+                    stream=args.stream,
+                    hedge=args.hedge,
+                    context_cache=args.context_cache,
+                )
+                use_case = GeneratePostUseCase(
+                    post_repository=post_repository,
+                    content_generator=content_generator,
+                    image_generator=image_generator,
+                    checkpoints=checkpoints,
+                )
+
+            cli_handler = CLIHandler(use_case, env_config=env)
+            success = cli_handler.execute()
 
         sys.exit(0 if success else 1)
 
@@ -0,0 +1,98 @@
+import json
+
+import pytest
+
+from generate_post.utils import circuit_breaker
+from generate_post.utils.circuit_breaker import (
+    CLOSED,
+    FAILURE_THRESHOLD,
+    HALF_OPEN,
+    OPEN,
+    OPEN_SECONDS,
+    CircuitBreakers,
+)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(circuit_breaker.time, "time", lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def breakers(tmp_path):
+    return CircuitBreakers(tmp_path / "circuits.json")
+
+
+def test_opens_after_consecutive_failures(breakers, clock):
+    circuit = breakers.get("host:x")
+    for _ in range(FAILURE_THRESHOLD - 1):
+        circuit.failure()
+    circuit.success()
+    for _ in range(FAILURE_THRESHOLD - 1):
+        circuit.failure()
+    assert circuit.state == CLOSED and circuit.allow()
+
+    circuit.failure()
+    assert circuit.state == OPEN
+    assert not circuit.available()
+    assert not circuit.allow()
+
+
+def test_half_open_allows_a_single_probe(breakers, clock):
+    circuit = breakers.get("host:x")
+    for _ in range(FAILURE_THRESHOLD):
+        circuit.failure()
+    clock[0] += OPEN_SECONDS
+
+    assert circuit.available()
+    assert circuit.allow()
+    assert circuit.state == HALF_OPEN
+    assert not circuit.available()
+    assert not circuit.allow()
+
+    circuit.success()
+    assert circuit.state == CLOSED
+    assert circuit.failures == 0
+
+
+def test_failed_probe_reopens(breakers, clock):
+    circuit = breakers.get("host:x")
+    for _ in range(FAILURE_THRESHOLD):
+        circuit.failure()
+    clock[0] += OPEN_SECONDS
+    assert circuit.allow()
+
+    circuit.failure()
+
+    assert circuit.state == OPEN
+    assert circuit.opened_at == clock[0]
+    assert not circuit.allow()
+
+
+def test_release_returns_an_unused_probe(breakers, clock):
+    circuit = breakers.get("host:x")
+    for _ in range(FAILURE_THRESHOLD):
+        circuit.failure()
+    clock[0] += OPEN_SECONDS
+    assert circuit.allow()
+
+    circuit.release()
+
+    assert circuit.state == HALF_OPEN
+    assert circuit.allow()
+
+
+def test_state_persists_between_runs(tmp_path, clock):
+    path = tmp_path / "circuits.json"
+    circuit = CircuitBreakers(path).get("m/a")
+    for _ in range(FAILURE_THRESHOLD):
+        circuit.failure()
+    assert json.loads(path.read_text())["m/a"]["state"] == OPEN
+
+    reloaded = CircuitBreakers(path).get("m/a")
+    assert reloaded.state == OPEN
+    assert not reloaded.allow()
+    clock[0] += OPEN_SECONDS
+    assert reloaded.allow()
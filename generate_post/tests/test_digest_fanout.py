@@ -0,0 +1,83 @@
+from generate_post.adapters.api.digest_fanout import (
+    NewsItem,
+    drop_covered,
+    format_items,
+    link_citations,
+    merge_items,
+    parse_items,
+)
+
+
+def _source(n):
+    return {"title": f"Fonte {n}", "uri": f"https://example.com/{n}"}
+
+
+def test_parse_items_assigns_supports_by_utf8_end_index():
+    text = "Intro\n- Lançamento: versão 2 saiu.\n- Outra notícia: algo.\n"
+    first_end = len("Intro\n- Lançamento: versão 2 saiu.".encode("utf-8"))
+    grounding = {
+        "groundingChunks": [
+            {"web": {"uri": "https://a", "title": "A"}},
+            {"web": {"uri": "https://b"}},
+        ],
+        "groundingSupports": [
+            {"segment": {"endIndex": first_end}, "groundingChunkIndices": [0, 0]},
+            {"segment": {"endIndex": len(text.encode())}, "groundingChunkIndices": [1]},
+            {"segment": {"endIndex": 3}, "groundingChunkIndices": [5]},
+        ],
+    }
+
+    items = parse_items("IA", text, grounding)
+
+    assert [i.headline for i in items] == ["Lançamento", "Outra notícia"]
+    assert items[0].sources == [{"title": "A", "uri": "https://a"}]
+    assert items[1].sources == [{"title": "https://b", "uri": "https://b"}]
+
+
+def test_merge_items_keeps_first_duplicate_and_numbers_sources():
+    items = [
+        NewsItem("IA", "**Google lança Gemini 3**: detalhes", [_source(1)]),
+        NewsItem("Cloud", "Rust 2.0 anunciado: detalhes", [_source(2)]),
+        NewsItem(
+            "Cloud", "Google lança Gemini 3 na cloud: x", [_source(1), _source(3)]
+        ),
+    ]
+
+    merged, sources = merge_items(items)
+
+    assert [i.topic for i in merged] == ["IA", "Cloud"]
+    assert merged[0].sources == [_source(1), _source(3)]
+    assert sources == [_source(1), _source(3), _source(2)]
+    assert format_items(merged, sources).splitlines() == [
+        "- (IA) **Google lança Gemini 3**: detalhes [1][2]",
+        "- (Cloud) Rust 2.0 anunciado: detalhes [3]",
+    ]
+
+
+def test_drop_covered_by_headline_or_sources():
+    items = [
+        NewsItem("IA", "Google lança Gemini 3: x", [_source(9)]),
+        NewsItem("DevTools", "Python 3.14 sai: x", [_source(1), _source(2)]),
+        NewsItem("DevTools", "Go 1.25 sai: x", [_source(2), _source(3)]),
+        NewsItem("Cloud", "Sem fontes: x", []),
+    ]
+    covered_urls = {_source(1)["uri"], _source(2)["uri"]}
+
+    fresh = drop_covered(items, ["Google lança o Gemini 3"], covered_urls)
+
+    assert [i.headline for i in fresh] == ["Go 1.25 sai", "Sem fontes"]
+
+
+def test_drop_covered_keeps_everything_when_nothing_is_new():
+    items = [NewsItem("IA", "Gemini 3: x", [_source(1)])]
+    assert drop_covered(items, [], {_source(1)["uri"]}) == items
+
+
+def test_link_citations():
+    sources = [_source(1), _source(2)]
+    text = "Um fato [1]. Dois [1, 2]. Nada [7]. Já linkado [2](https://x)."
+    assert link_citations(text, sources) == (
+        "Um fato [1](https://example.com/1). "
+        "Dois [1](https://example.com/1) [2](https://example.com/2). "
+        "Nada . Já linkado [2](https://x)."
+    )
@@ -0,0 +1,215 @@
+import json
+import os
+import time
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+from generate_post.adapters.repositories.digest_history import DigestHistoryIndex
+from generate_post.utils.url_resolver import UrlResolver
+
+DIGEST = """---
+title: Resumo
+categories: [noticias,tecnologia,resumo-semanal]
+tags: [resumo-semanal,noticias]
+---
+
+## Google lança Gemini 3 [1](https://x)
+
+Texto.
+
+- **Rust 2.0 anunciado**: detalhes.
+- **Rust 2.0 anunciado**: repetido.
+
+## Conclusão
+
+Fim.
+
+## Fontes
+
+1. [A](https://Example.com/a?utm_source=x#frag)
+2. [B](https://example.com/b/)
+3. [A de novo](https://example.com/a)
+
+---
+
+Rodapé.
+"""
+
+
+@pytest.fixture
+def posts_dir(tmp_path):
+    posts = tmp_path / "_posts"
+    posts.mkdir()
+    for date in ("2025-05-05", "2025-06-02"):
+        (posts / f"{date}-resumo-da-semana-x.md").write_text(DIGEST, encoding="utf-8")
+    (posts / "2025-06-03-outro-post.md").write_text(
+        DIGEST.replace("resumo-semanal", "rust"), encoding="utf-8"
+    )
+    return posts
+
+
+def test_refresh_parses_headlines_and_canonical_sources(posts_dir, tmp_path):
+    index = DigestHistoryIndex(posts_dir, tmp_path / "history.json")
+    entries = index.refresh()
+
+    assert sorted(entries) == [
+        "2025-05-05-resumo-da-semana-x.md",
+        "2025-06-02-resumo-da-semana-x.md",
+    ]
+    entry = entries["2025-06-02-resumo-da-semana-x.md"]
+    assert entry.date == "2025-06-02"
+    assert entry.headlines == ["Google lança Gemini 3", "Rust 2.0 anunciado"]
+    assert entry.urls == ["https://example.com/a", "https://example.com/b/"]
+
+
+def test_recent_and_covered(posts_dir, tmp_path):
+    index = DigestHistoryIndex(posts_dir, tmp_path / "history.json")
+    now = datetime(2025, 6, 10)
+
+    assert [e.date for e in index.recent(weeks=2, now=now)] == ["2025-06-02"]
+    assert [e.date for e in index.recent(weeks=6, now=now)] == [
+        "2025-06-02",
+        "2025-05-05",
+    ]
+    headlines, urls = index.covered(weeks=1000)
+    assert headlines.count("Rust 2.0 anunciado") == 2
+    assert urls == {"https://example.com/a", "https://example.com/b/"}
+
+
+def test_refresh_rereads_only_changed_posts(posts_dir, tmp_path, monkeypatch):
+    path = tmp_path / "history.json"
+    DigestHistoryIndex(posts_dir, path).refresh()
+    saved = json.loads(path.read_text(encoding="utf-8"))
+    assert len(saved) == 3
+
+    changed = posts_dir / "2025-05-05-resumo-da-semana-x.md"
+    changed.write_text(DIGEST.replace("Gemini 3", "Gemini 4"), encoding="utf-8")
+    os.utime(changed, (1, 1))
+    (posts_dir / "2025-06-02-resumo-da-semana-x.md").unlink()
+
+    reads = []
+    read_text = Path.read_text
+
+    def counting(self, *args, **kwargs):
+        reads.append(self.name)
+        return read_text(self, *args, **kwargs)
+
+    monkeypatch.setattr(Path, "read_text", counting)
+    entries = DigestHistoryIndex(posts_dir, path).refresh()
+
+    assert reads == ["history.json", changed.name]
+    assert list(entries) == [changed.name]
+    assert entries[changed.name].headlines[0] == "Google lança Gemini 4"
+    saved = json.loads(read_text(path, encoding="utf-8"))
+    assert sorted(saved) == [changed.name, "2025-06-03-outro-post.md"]
+    assert saved["2025-06-03-outro-post.md"]["digest"] is False
+
+
+def test_digest_is_selected_by_category_not_filename(posts_dir, tmp_path):
+    (posts_dir / "2025-06-09-ia-agente-e-seguranca.md").write_text(
+        DIGEST, encoding="utf-8"
+    )
+    (posts_dir / "2025-06-10-so-a-tag.md").write_text(
+        DIGEST.replace("categories: [noticias,tecnologia,resumo-semanal]", ""),
+        encoding="utf-8",
+    )
+
+    entries = DigestHistoryIndex(posts_dir, tmp_path / "history.json").refresh()
+
+    assert sorted(entries) == [
+        "2025-05-05-resumo-da-semana-x.md",
+        "2025-06-02-resumo-da-semana-x.md",
+        "2025-06-09-ia-agente-e-seguranca.md",
+        "2025-06-10-so-a-tag.md",
+    ]
+
+
+def test_old_format_entries_are_reread(posts_dir, tmp_path):
+    path = tmp_path / "history.json"
+    name = "2025-06-02-resumo-da-semana-x.md"
+    stat = (posts_dir / name).stat()
+    old = {"filename": name, "date": "2025-06-02", "mtime": stat.st_mtime}
+    old.update(size=stat.st_size, headlines=["velha"], urls=[])
+    path.write_text(json.dumps({name: old}), encoding="utf-8")
+
+    entries = DigestHistoryIndex(posts_dir, path).refresh()
+
+    assert entries[name].headlines == ["Google lança Gemini 3", "Rust 2.0 anunciado"]
+
+
+# Fontes de _posts/2026-06-28-ia-agente-dominando-crise-de-segurança-e-o-freio-...
+REDIRECT = "https://vertexaisearch.cloud.google.com/grounding-api-redirect/"
+GROUNDED_SOURCES = f"""## Fontes
+
+1. [googlecloudpresscorner.com]({REDIRECT}AUZIYQEtWde7u4QXrfEdXmuV0qvsq18X4TjZ5v4dWbJ9MS5GpMQfouU0tA1GSYeqnKIYYil0X-j9qk063Xin9RDWgGHQOiVb4_Hj_Quoc8INrc6qya2iEqbAP-qTMsT8etgS9BA7BJRXK4qJbgwW95YbyRI=){{:target="_blank"}}
+2. [google.com]({REDIRECT}AUZIYQE5XxcNQy1Dx52o0fleAK014770HdvenbIN0u_cNWU4uhV91dNtIgcLPxjb_fJw_oqTAudkvai21Tg6CI7je-Mfut1-7-LdpDmZgjhCYemJLPgFLyHih2mRKgGi_F_O3w400ZSoYoNpxQGoJelqDD1-5abyr-MBMQ6TsOqTgIWkOfxgyPYSCUfnDA==){{:target="_blank"}}
+3. [microsoft.com]({REDIRECT}AUZIYQGIVwsx4CRrl-1v804MBqi8_8wQYb7lBs0U0Rzoe4B7AzVUuMo1AURooccaK6qinX4XUSgHtiOLry-tkS3kcCquM7SvnYWXCHvhCa3hrFUuDwx4UQ5xDZNnj3bQ7cIV67hGfjOvWsti){{:target="_blank"}}
+4. [microsoft.com]({REDIRECT}AUZIYQHP8NXBHWLxmivexE1USHfczbCz1VyqpF5LqYTNmLZcHuvDUwqiaDXohvRr2QdGEaL2u3Uu9nEaBuO94SQO3zCXsx9cHArzf5TrorztTtEgtqrYJP2hje-u3HfGMYNox6-BxJ3oQSnu){{:target="_blank"}}
+5. [publisher.example](https://Publisher.example/post?utm_source=x){{:target="_blank"}}
+"""
+GROUNDED_URIS = [
+    line.split("](", 1)[1].split(")", 1)[0]
+    for line in GROUNDED_SOURCES.splitlines()
+    if line[:1].isdigit()
+]
+
+
+@pytest.fixture
+def grounded_posts(tmp_path):
+    posts = tmp_path / "_posts"
+    posts.mkdir()
+    content = DIGEST.split("## Fontes")[0] + GROUNDED_SOURCES
+    (posts / "2025-06-02-resumo-da-semana-x.md").write_text(content, encoding="utf-8")
+    return posts
+
+
+def test_redirect_sources_resolved_from_url_cache(grounded_posts, tmp_path):
+    cache = tmp_path / "resolved_urls.json"
+    at = round(time.time())
+    cache.write_text(
+        json.dumps(
+            {
+                GROUNDED_URIS[0]: {"url": "https://cloud.google/a", "at": at},
+                GROUNDED_URIS[1]: {"url": "https://cloud.google/a", "at": at},
+                GROUNDED_URIS[2]: {"url": "https://microsoft.com/b", "at": at},
+            }
+        ),
+        encoding="utf-8",
+    )
+    resolver = UrlResolver(path=cache, offline=True)
+    index = DigestHistoryIndex(grounded_posts, tmp_path / "history.json", resolver)
+
+    (entry,) = index.refresh().values()
+
+    assert entry.urls == [
+        "https://cloud.google/a",
+        "https://microsoft.com/b",
+        GROUNDED_URIS[3],
+        "https://publisher.example/post",
+    ]
+
+
+def test_redirect_sources_resolved_once_per_new_post(grounded_posts, tmp_path):
+    calls = []
+
+    class Resolver:
+        def resolve_all(self, urls):
+            urls = list(urls)
+            calls.append(urls)
+            return {u: f"https://final.example/{i}" for i, u in enumerate(urls)}
+
+    path = tmp_path / "history.json"
+    DigestHistoryIndex(grounded_posts, path, Resolver()).refresh()
+    index = DigestHistoryIndex(grounded_posts, path, Resolver())
+    _, urls = index.covered(weeks=100_000)
+
+    assert calls == [GROUNDED_URIS[:4]]
+    assert urls == {
+        "https://final.example/0",
+        "https://final.example/1",
+        "https://final.example/2",
+        "https://final.example/3",
+        "https://publisher.example/post",
+    }
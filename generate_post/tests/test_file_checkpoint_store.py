@@ -0,0 +1,85 @@
+import os
+
+from generate_post.adapters.repositories import file_checkpoint_store
+from generate_post.adapters.repositories.file_checkpoint_store import (
+    FileCheckpointStore,
+)
+from generate_post.core.domain.interfaces.checkpoint_store import DONE_STAGE
+
+
+def _run(runs_dir, run_id, stages, mtime):
+    run_dir = runs_dir / run_id
+    run_dir.mkdir(parents=True)
+    for stage in stages:
+        (run_dir / f"{stage}.json").write_text("{}", encoding="utf-8")
+    os.utime(run_dir, (mtime, mtime))
+    return run_dir
+
+
+def test_save_and_load_round_trip(tmp_path):
+    store = FileCheckpointStore(tmp_path / "run")
+
+    assert store.load("generated") is None
+    store.save("generated", {"text": "olá", "n": 1})
+
+    assert store.load("generated") == {"text": "olá", "n": 1}
+    assert [p.name for p in store.run_dir.iterdir()] == ["generated.json"]
+
+
+def test_without_resume_starts_from_scratch(tmp_path):
+    _run(tmp_path, "r1", ["generated"], 1_000)
+
+    store = FileCheckpointStore.for_run("r1", runs_dir=tmp_path)
+
+    assert store.load("generated") is None
+
+
+def test_resume_picks_latest_incomplete_run(tmp_path):
+    _run(tmp_path, "old", ["generated"], 1_000)
+    _run(tmp_path, "incomplete", ["generated", "parsed"], 2_000)
+    _run(tmp_path, "finished", ["generated", DONE_STAGE], 3_000)
+
+    store = FileCheckpointStore.for_run(resume=True, runs_dir=tmp_path)
+
+    assert store.run_id == "incomplete"
+    assert store.load("parsed") == {}
+
+
+def test_resume_without_incomplete_run_starts_new_one(tmp_path):
+    _run(tmp_path, "finished", [DONE_STAGE], 1_000)
+
+    store = FileCheckpointStore.for_run(resume=True, runs_dir=tmp_path)
+
+    assert store.run_id != "finished"
+    assert store.load(DONE_STAGE) is None
+
+
+def test_prune_keeps_newest_runs_and_current(tmp_path, monkeypatch):
+    monkeypatch.setattr(file_checkpoint_store, "KEEP_RUNS", 3)
+    for i in range(5):
+        _run(tmp_path, f"r{i}", [DONE_STAGE], 1_000 + i)
+
+    FileCheckpointStore.for_run("r0", resume=True, runs_dir=tmp_path)
+
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["r0", "r3", "r4"]
+
+
+def test_resume_of_finished_run_is_left_untouched(tmp_path):
+    run_dir = _run(tmp_path, "finished", ["generated_text", "post_data"], 1_000)
+    (run_dir / f"{DONE_STAGE}.json").write_text(
+        '{"filename": "_posts/2025-01-01-x.md"}', encoding="utf-8"
+    )
+    before = {p.name: p.stat().st_mtime_ns for p in run_dir.iterdir()}
+
+    store = FileCheckpointStore.for_run("finished", resume=True, runs_dir=tmp_path)
+
+    assert store.done == {"filename": "_posts/2025-01-01-x.md"}
+    assert {p.name: p.stat().st_mtime_ns for p in run_dir.iterdir()} == before
+
+
+def test_incomplete_run_is_not_done(tmp_path):
+    _run(tmp_path, "incomplete", ["generated_text"], 1_000)
+
+    store = FileCheckpointStore.for_run("incomplete", resume=True, runs_dir=tmp_path)
+
+    assert store.done is None
@@ -0,0 +1,121 @@
+import time
+
+import requests
+
+from generate_post.adapters.api import gemini_context_cache
+from generate_post.adapters.api.gemini_content_service import GeminiContentService
+from generate_post.adapters.api.gemini_context_cache import (
+    GeminiContextCache,
+    build_request,
+)
+from generate_post.config.env_config import EnvConfig
+from generate_post.utils.hedging import Cancellation
+from generate_post.utils.response_cache import READTHROUGH, REPLAY, CachingSession
+
+
+class _Response:
+    def __init__(self, status_code, data=None, text=""):
+        self.status_code = status_code
+        self._data = data or {}
+        self.text = text
+
+    def json(self):
+        return self._data
+
+
+class _Session:
+    """Sessão falsa que registra as chamadas de gerenciamento do cache."""
+
+    def __init__(self, create=None, patch=None):
+        self.calls = []
+        self._create = create or _Response(200, {"name": "cachedContents/abc"})
+        self._patch = patch or _Response(200)
+
+    def post(self, url, **kwargs):
+        self.calls.append(("POST", url, kwargs["json"]))
+        return self._create
+
+    def patch(self, url, **kwargs):
+        self.calls.append(("PATCH", url, kwargs["json"]))
+        return self._patch
+
+
+def _cache(tmp_path, session, ttl=3600):
+    return GeminiContextCache(
+        "key", ttl=ttl, path=tmp_path / "caches.json", session=session
+    )
+
+
+def test_creates_once_and_reuses_the_name(tmp_path):
+    session = _Session()
+    cache = _cache(tmp_path, session)
+
+    assert cache.get("m", "sys", "prefixo") == "cachedContents/abc"
+    assert _cache(tmp_path, session).get("m", "sys", "prefixo") == "cachedContents/abc"
+
+    assert [c[0] for c in session.calls] == ["POST"]
+    assert session.calls[0][2]["model"] == "models/m"
+
+
+def test_refreshes_ttl_when_close_to_expiry(tmp_path, monkeypatch):
+    session = _Session()
+    _cache(tmp_path, session).get("m", "sys", "prefixo")
+    later = time.time() + 3600 - gemini_context_cache.REFRESH_MARGIN + 1
+    monkeypatch.setattr(gemini_context_cache.time, "time", lambda: later)
+
+    assert _cache(tmp_path, session).get("m", "sys", "prefixo") == "cachedContents/abc"
+    assert [c[:2] for c in session.calls][1:] == [
+        (
+            "PATCH",
+            f"https://{gemini_context_cache.GEMINI_HOST}/v1beta/cachedContents/abc",
+        )
+    ]
+
+
+def test_remembers_prefixes_below_the_token_minimum(tmp_path):
+    session = _Session(create=_Response(400, text="Cached content is too small"))
+
+    assert _cache(tmp_path, session).get("m", "sys", "curto") is None
+    assert _cache(tmp_path, session).get("m", "sys", "curto") is None
+    assert len(session.calls) == 1
+
+
+def test_too_small_is_checked_again_for_another_model(tmp_path):
+    small = _Session(create=_Response(400, text="Cached content is too small"))
+    assert _cache(tmp_path, small).get("gemini-2.5-pro", "sys", "prefixo") is None
+
+    # O mínimo de tokens é por modelo: o mesmo prefixo pode caber em outro
+    session = _Session()
+    name = _cache(tmp_path, session).get("gemini-2.5-flash", "sys", "prefixo")
+
+    assert name == "cachedContents/abc"
+    assert [call[2]["model"] for call in session.calls] == ["models/gemini-2.5-flash"]
+    assert _cache(tmp_path, session).get("gemini-2.5-pro", "sys", "prefixo") is None
+    assert len(session.calls) == 1
+
+
+def test_build_request_sends_only_the_tail_when_cached(tmp_path):
+    cache = _cache(tmp_path, _Session())
+    body = build_request(
+        "m", "TEMPLATE contexto", "TEMPLATE", "sys", {"x": 1}, None, cache
+    )
+    assert body == {
+        "cachedContent": "cachedContents/abc",
+        "contents": [{"role": "user", "parts": [{"text": "contexto"}]}],
+        "x": 1,
+    }
+
+
+def _env(mode):
+    return EnvConfig("key", None, None, None, http_cache=mode)
+
+
+def test_management_calls_bypass_the_response_cache():
+    service = GeminiContentService(_env(READTHROUGH), context_cache=True)
+
+    assert isinstance(service._attempt_session(Cancellation()), CachingSession)
+    assert type(service._context_cache._session) is requests.Session
+
+
+def test_replay_disables_the_context_cache():
+    assert GeminiContentService(_env(REPLAY), context_cache=True)._context_cache is None
@@ -0,0 +1,108 @@
+from generate_post.adapters.api.gemini_continuation import (
+    Generation,
+    continue_truncated,
+    merge_grounding,
+)
+from generate_post.adapters.api.grounding_citations import render_citations
+
+
+def _chunk(uri):
+    return {"web": {"uri": uri, "title": uri}}
+
+
+def _support(start, end, *indices):
+    return {
+        "segment": {"startIndex": start, "endIndex": end},
+        "groundingChunkIndices": list(indices),
+    }
+
+
+def test_merge_grounding_shifts_segments_and_remaps_chunks():
+    base = {
+        "groundingChunks": [_chunk("https://a"), _chunk("https://b")],
+        "groundingSupports": [_support(0, 5, 1)],
+        "webSearchQueries": ["q1"],
+    }
+    extra = {
+        "groundingChunks": [_chunk("https://b"), {"web": {}}, _chunk("https://c")],
+        "groundingSupports": [
+            _support(2, 8, 0, 2),
+            {"segment": {"endIndex": 4}, "groundingChunkIndices": [1, 9]},
+        ],
+        "webSearchQueries": ["q1", "q2"],
+    }
+
+    merged = merge_grounding(base, extra, offset=100)
+
+    assert [c["web"].get("uri") for c in merged["groundingChunks"]] == [
+        "https://a",
+        "https://b",
+        None,
+        "https://c",
+    ]
+    assert merged["groundingSupports"] == [
+        _support(0, 5, 1),
+        _support(102, 108, 1, 3),
+        _support(100, 104, 2),
+    ]
+    assert merged["webSearchQueries"] == ["q1", "q2"]
+    # A entrada não é alterada
+    assert base["groundingSupports"] == [_support(0, 5, 1)]
+    assert extra["groundingSupports"][0]["segment"] == {"startIndex": 2, "endIndex": 8}
+
+
+def test_merge_grounding_without_extra_returns_base():
+    base = {"groundingChunks": [_chunk("https://a")]}
+    assert merge_grounding(base, {}, offset=10) is base
+
+
+def test_continue_truncated_concatenates_and_keeps_citations_in_place():
+    first = "Ação um."
+    second = " Notícia dois."
+    generation = Generation(
+        first,
+        "MAX_TOKENS",
+        {
+            "groundingChunks": [_chunk("https://a")],
+            "groundingSupports": [_support(0, len(first.encode()), 0)],
+        },
+    )
+    requests = []
+
+    def request(body):
+        requests.append(body)
+        return Generation(
+            second,
+            "STOP",
+            {
+                "groundingChunks": [_chunk("https://b"), _chunk("https://a")],
+                "groundingSupports": [_support(1, len(second.encode()), 0, 1)],
+            },
+        )
+
+    result = continue_truncated(
+        generation, {"contents": [{"parts": [{"text": "p"}]}]}, request
+    )
+
+    assert result.text == first + second
+    assert not result.truncated
+    assert requests[0]["contents"][1] == {"role": "model", "parts": [{"text": first}]}
+    assert render_citations(result.text, result.grounding) == (
+        "Ação um. [1](https://a) Notícia dois. [2](https://b) [1](https://a)"
+    )
+
+
+def test_continue_truncated_stops_after_the_limit():
+    calls = []
+
+    def request(body):
+        calls.append(body)
+        return Generation("+", "MAX_TOKENS")
+
+    result = continue_truncated(
+        Generation("x", "MAX_TOKENS"), {"contents": []}, request, max_continuations=2
+    )
+
+    assert result.text == "x++"
+    assert result.truncated
+    assert len(calls) == 2
@@ -0,0 +1,187 @@
+import json
+
+import pytest
+import requests
+
+from generate_post.adapters.api import gemini_streaming
+from generate_post.adapters.api.gemini_streaming import (
+    StreamingPostParser,
+    iter_sse_events,
+    stream_text,
+)
+
+
+class _Raw:
+    """`response.raw` que entrega o corpo nos pedaços dados, como a rede."""
+
+    def __init__(self, chunks):
+        self._chunks = list(chunks)
+
+    def read(self, *args, **kwargs):
+        return self._chunks.pop(0) if self._chunks else b""
+
+    def close(self):
+        pass
+
+
+def _response(chunks, status=200):
+    response = requests.Response()
+    response.status_code = status
+    response.raw = _Raw(chunks)
+    return response
+
+
+def _event(text="", thought=False, **extra):
+    part = {"text": text, "thought": True} if thought else {"text": text}
+    return {"candidates": [{"content": {"parts": [part]}, **extra}]}
+
+
+def _sse(*events):
+    return b"".join(b"data: " + json.dumps(e).encode() + b"\r\n\r\n" for e in events)
+
+
+def test_sse_events_split_across_chunks():
+    body = _sse({"n": 1}, {"n": 2}, {"n": 3})
+    # Pedaços de 7 bytes: cortam o JSON, o "data:" e o "\r\n" no meio
+    chunks = [body[i : i + 7] for i in range(0, len(body), 7)]
+
+    assert list(iter_sse_events(_response(chunks))) == [{"n": 1}, {"n": 2}, {"n": 3}]
+
+
+def test_sse_multiline_data_comments_and_done():
+    body = (
+        b": keep-alive\n\n"
+        b'data: {"a":\n'
+        b"data: 1}\n"
+        b"event: message\n"
+        b"\n"
+        b": ping\n"
+        b"\n"
+        b'data: {"b": 2}\n'
+        b"\n"
+        b"data: [DONE]\n"
+        b"\n"
+    )
+
+    assert list(iter_sse_events(_response([body]))) == [{"a": 1}, {"b": 2}]
+
+
+def test_sse_last_event_without_blank_line():
+    assert list(iter_sse_events(_response([b'data: {"a": 1}']))) == [{"a": 1}]
+
+
+class _Session:
+    def __init__(self, response):
+        self.response = response
+        self.kwargs = None
+
+    def post(self, url, **kwargs):
+        self.kwargs = kwargs
+        return self.response
+
+
+def test_stream_text_skips_thoughts_and_reports_events():
+    events = [
+        _event("pensando", thought=True),
+        _event("Olá, "),
+        _event("mundo", finishReason="STOP"),
+    ]
+    session = _Session(_response([_sse(*events)]))
+    seen = []
+
+    chunks = list(
+        stream_text(session, "url", {}, {}, first_token_timeout=5, on_event=seen.append)
+    )
+
+    assert chunks == ["Olá, ", "mundo"]
+    assert seen == events
+    assert session.kwargs["stream"] is True
+    assert session.kwargs["timeout"] == (10, 5)
+
+
+def test_stream_text_first_token_deadline(monkeypatch):
+    clock = iter([0, 20, 40, 61])
+    monkeypatch.setattr(gemini_streaming.time, "monotonic", lambda: next(clock))
+    thoughts = [_event("hmm", thought=True)] * 3
+    session = _Session(_response([_sse(*thoughts)]))
+
+    with pytest.raises(requests.Timeout, match="Nenhum token de texto em 60s"):
+        list(stream_text(session, "url", {}, {}, first_token_timeout=60))
+
+
+def test_stream_text_deadline_only_before_first_token(monkeypatch):
+    clock = iter([0, 1, 70, 80, 81])
+    monkeypatch.setattr(gemini_streaming.time, "monotonic", lambda: next(clock))
+    events = [_event("a"), _event("", finishReason="STOP"), _event("b")]
+    session = _Session(_response([_sse(*events)]))
+
+    assert list(stream_text(session, "url", {}, {}, first_token_timeout=60)) == [
+        "a",
+        "b",
+    ]
+
+
+def test_stream_text_errors():
+    error = _Session(_response([_sse({"error": {"code": 500}})]))
+    with pytest.raises(requests.RequestException, match="Erro no streaming"):
+        list(stream_text(error, "url", {}, {}))
+
+    status = _Session(_response([b"quota"], status=429))
+    with pytest.raises(requests.RequestException, match="Status: 429"):
+        list(stream_text(status, "url", {}, {}))
+
+    empty = _Session(_response([_sse(_event("", finishReason="SAFETY"))]))
+    with pytest.raises(requests.RequestException, match="SAFETY"):
+        list(stream_text(empty, "url", {}, {}))
+
+
+def _parse_header(text):
+    title, categories, tags = text.split("\n")
+    return {"title": title, "categories": categories, "tags": tags}
+
+
+def test_parser_header_and_preview_after_body_starts(tmp_path):
+    headers, previews = [], []
+    draft = tmp_path / "drafts" / "post.md"
+    parser = StreamingPostParser(
+        _parse_header,
+        on_header=headers.append,
+        draft_path=draft,
+        on_preview=lambda data: previews.append((data, len(parser.text))),
+        preview_chars=10,
+    )
+    text = "Título\n\ncat\ntag\n\nPrimeira linha do corpo\nresto"
+
+    with parser:
+        for i in range(0, len(text), 4):
+            parser.feed(text[i : i + 4])
+
+    assert headers == [{"title": "Título", "categories": "cat", "tags": "tag"}]
+    # A prévia sai quando a primeira linha do corpo termina, antes do fim
+    assert previews == [({**headers[0], "content": "Primeira l"}, 44)]
+    assert parser.text == text
+    assert draft.read_text(encoding="utf-8") == "Primeira linha do corpo\nresto"
+
+
+def test_parser_preview_waits_for_body():
+    previews = []
+    parser = StreamingPostParser(_parse_header, on_preview=previews.append)
+
+    parser.feed("Título\ncat\ntag\n")
+    assert parser.header is not None
+    assert previews == []
+
+    parser.feed("\nCorpo curto")
+    assert previews == []
+    parser.close()
+
+    assert previews == [{**parser.header, "content": "Corpo curto"}]
+
+
+def test_parser_short_stream_without_trailing_newline():
+    parser = StreamingPostParser(_parse_header)
+
+    parser.feed("Título\ncat\ntag")
+    parser.close()
+
+    assert parser.header == {"title": "Título", "categories": "cat", "tags": "tag"}
@@ -0,0 +1,98 @@
+import pytest
+
+from generate_post.adapters.api.grounding_citations import (
+    render_citations,
+    resolve_grounding,
+)
+from generate_post.benchmarks.citations import legacy_render, synthetic_response
+
+
+def _grounding(text, *supports):
+    """groundingMetadata com um support que termina logo após cada trecho."""
+    data = text.encode("utf-8")
+    return {
+        "groundingChunks": [
+            {"web": {"uri": "https://a.example/", "title": "A"}},
+            {"web": {"uri": "https://b.example/", "title": "B"}},
+            {"web": {"title": "sem uri"}},
+        ],
+        "groundingSupports": [
+            {
+                "segment": {
+                    "endIndex": data.index(after.encode()) + len(after.encode())
+                },
+                "groundingChunkIndices": indices,
+            }
+            for after, indices in supports
+        ],
+    }
+
+
+@pytest.mark.parametrize("supports", [1, 50, 400])
+def test_matches_legacy_pipeline_on_plain_paragraphs(supports):
+    text, grounding = synthetic_response(supports)
+    sources = [
+        {"title": c["web"]["title"], "uri": c["web"]["uri"]}
+        for c in grounding["groundingChunks"]
+    ]
+    assert render_citations(text, grounding, sources) == legacy_render(
+        text, grounding, sources
+    )
+
+
+def test_inserts_merged_citations_at_utf8_offsets():
+    text = "Ação rápida.\nOutra frase.\n"
+    grounding = _grounding(
+        text, ("Ação rápida.\n", [0]), ("rápida.", [1, 0]), ("frase.", [2])
+    )
+    assert render_citations(text, grounding) == (
+        "Ação rápida. [1](https://a.example/) [2](https://b.example/)\n"
+        "Outra frase.\n"
+    )
+
+
+def test_citation_moves_after_links_and_inline_code():
+    text = 'Veja [o anúncio](https://x.dev){:target="_blank"} e `cfg` hoje.'
+    grounding = _grounding(text, ("o anún", [0]), ("`cf", [1]))
+    assert render_citations(text, grounding) == (
+        "Veja o anúncio [1](https://a.example/) e `cfg` [2](https://b.example/) hoje."
+    )
+
+
+def test_drops_citations_in_headings_and_fences(caplog):
+    text = "## Título [link](https://x)\n\n```\ncódigo\n```\n\nTexto.\n"
+    grounding = _grounding(text, ("Título", [0]), ("código", [1]), ("Texto.", [1]))
+    with caplog.at_level("INFO"):
+        rendered = render_citations(text, grounding)
+    assert rendered == (
+        "## Título link\n\n```\ncódigo\n```\n\nTexto. [2](https://b.example/)\n"
+    )
+    assert "2 citações" in caplog.text
+
+
+def test_appends_sources_section():
+    sources = [{"title": " A ", "uri": "https://a.example/ "}]
+    assert render_citations("Texto.\n\n", None, sources) == (
+        "Texto.\n\n## Fontes\n\n" '1. [A](https://a.example/){:target="_blank"}\n'
+    )
+
+
+def test_resolve_grounding_merges_chunks_with_same_final_url():
+    grounding = {
+        "groundingChunks": [
+            {"web": {"uri": "https://r/1", "title": "1"}},
+            {"web": {}},
+            {"web": {"uri": "https://r/2", "title": "2"}},
+            {"web": {"uri": "https://r/3", "title": "3"}},
+        ],
+        "groundingSupports": [{"groundingChunkIndices": [3, 1, 2, 0]}],
+    }
+    resolved = {"https://r/1": "https://same/", "https://r/3": "https://same/"}
+
+    result = resolve_grounding(grounding, resolved)
+
+    assert [c["web"]["uri"] for c in result["groundingChunks"]] == [
+        "https://same/",
+        "https://r/2",
+    ]
+    assert result["groundingSupports"][0]["groundingChunkIndices"] == [0, 1]
@@ -0,0 +1,194 @@
+import json
+import select
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from generate_post.utils.hedging import (
+    AttemptCancelled,
+    Cancellation,
+    HedgeBudget,
+    Hedger,
+)
+
+
+class _Router:
+    """Roteador fixo: `primary` primeiro, depois os demais."""
+
+    def __init__(self, models, p95=0.05):
+        self.models = list(models)
+        self._p95 = p95
+        self.successes, self.failures, self.released = [], [], []
+
+    def choose(self, exclude=()):
+        return next(m for m in self.models if m not in exclude)
+
+    def p95(self, model):
+        return self._p95
+
+    @contextmanager
+    def track(self, model):
+        yield
+        self.successes.append(model)
+
+    def record_success(self, model, seconds):
+        self.successes.append(model)
+
+    def record_failure(self, model, seconds, exc):
+        self.failures.append(model)
+
+    def release(self, model):
+        self.released.append(model)
+
+
+@pytest.fixture
+def budget(tmp_path):
+    return HedgeBudget("test", path=tmp_path / "budget.json")
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """`/slow` só responde depois de 10s; `/fast` responde na hora."""
+
+    def do_GET(self):
+        if self.path == "/slow":
+            self.server.slow_started.set()
+            # Readable antes do prazo = cliente fechou a conexão
+            readable, _, _ = select.select([self.connection], [], [], 10)
+            if readable and not self.connection.recv(1):
+                self.server.slow_disconnected.set()
+                return
+        body = self.path.encode()
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    httpd.daemon_threads = True
+    httpd.slow_started = threading.Event()
+    httpd.slow_disconnected = threading.Event()
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_budget_deposits_withdraws_and_persists(budget, tmp_path):
+    assert budget.tokens == 2.0
+    assert budget.withdraw() and budget.withdraw()
+    assert not budget.withdraw()
+    for _ in range(9):
+        budget.deposit()
+    assert not budget.withdraw()
+    budget.deposit()
+    assert budget.withdraw()
+    budget.refund()
+    assert budget.tokens == pytest.approx(1.0)
+
+    saved = json.loads((tmp_path / "budget.json").read_text())
+    assert saved == {"test": 1.0}
+    assert HedgeBudget("test", path=tmp_path / "budget.json").tokens == 1.0
+    assert HedgeBudget("other", path=tmp_path / "budget.json").tokens == 2.0
+
+
+def test_budget_caps_at_burst(budget):
+    for _ in range(50):
+        budget.deposit()
+    assert budget.tokens == 2.0
+
+
+def test_without_budget_calls_once(budget):
+    router = _Router(["a", "b"])
+    calls = []
+    assert Hedger(router).run(lambda m, c: calls.append(m) or m) == "a"
+    assert calls == ["a"]
+    # Com um modelo só não há hedge, mesmo com orçamento
+    assert Hedger(_Router(["a"]), budget)._budget is None
+
+
+def test_fast_primary_needs_no_backup(budget):
+    router = _Router(["a", "b"], p95=1)
+    calls = []
+    assert Hedger(router, budget).run(lambda m, c: calls.append(m) or m) == "a"
+    assert calls == ["a"]
+    assert router.successes == ["a"]
+
+
+def test_loser_connection_is_closed_when_backup_wins(server, budget):
+    base = f"http://127.0.0.1:{server.server_port}"
+    router = _Router(["slow", "fast"])
+    errors = []
+
+    def call(model, cancel):
+        with cancel.attach(requests.Session()) as session:
+            try:
+                return session.get(f"{base}/{model}", timeout=30).text
+            except requests.RequestException as exc:
+                errors.append((model, exc))
+                raise
+
+    started = time.monotonic()
+    assert Hedger(router, budget).run(call) == "/fast"
+
+    assert server.slow_disconnected.wait(5)
+    assert time.monotonic() - started < 5
+    deadline = time.monotonic() + 5
+    while not errors and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert [model for model, _ in errors] == ["slow"]
+    assert isinstance(errors[0][1], requests.ConnectionError)
+    # O cancelamento não conta contra o modelo e libera a chamada de teste
+    assert router.failures == []
+    assert router.successes == ["fast"]
+    assert router.released == ["slow"]
+
+
+def test_cancelled_attempt_stops_before_next_step(budget):
+    router = _Router(["slow", "fast"])
+    steps = []
+    release = threading.Event()
+
+    def call(model, cancel):
+        if model == "fast":
+            return "fast"
+        release.wait(5)
+        steps.append("first")
+        cancel.check()
+        steps.append("continuation")
+
+    assert Hedger(router, budget).run(call) == "fast"
+    release.set()
+    time.sleep(0.1)
+    assert steps == ["first"]
+
+
+def test_connections_opened_after_cancel_fail(server):
+    cancel = Cancellation()
+    cancel.set()
+    with pytest.raises(AttemptCancelled):
+        cancel.check()
+    with cancel.attach(requests.Session()) as session:
+        with pytest.raises(requests.ConnectionError):
+            session.get(f"http://127.0.0.1:{server.server_port}/fast", timeout=5)
+
+
+def test_first_error_is_raised_when_every_attempt_fails(budget):
+    router = _Router(["a", "b"])
+
+    def call(model, cancel):
+        time.sleep(0.1 if model == "a" else 0)
+        raise ValueError(model)
+
+    with pytest.raises(ValueError, match="b"):
+        Hedger(router, budget).run(call)
+    assert sorted(router.failures) == ["a", "b"]
@@ -0,0 +1,186 @@
+import random
+import time
+
+import pytest
+import requests
+
+from generate_post.utils import circuit_breaker
+from generate_post.utils.circuit_breaker import (
+    FAILURE_THRESHOLD,
+    OPEN_SECONDS,
+    CircuitBreakers,
+    CircuitOpenError,
+)
+from generate_post.utils.model_router import MIN_WEIGHT_SHARE, ModelRouter
+from generate_post.utils.retry_decorator import DeadlineExceeded, deadline
+
+
+@pytest.fixture
+def breakers(tmp_path):
+    return CircuitBreakers(tmp_path / "circuits.json")
+
+
+def _router(tmp_path, breakers, models=("a", "b"), **kwargs):
+    kwargs.setdefault("max_timeout", 120)
+    return ModelRouter(
+        "test",
+        models,
+        stats_path=tmp_path / "stats.json",
+        breakers=breakers,
+        **kwargs,
+    )
+
+
+def _open(circuit):
+    for _ in range(FAILURE_THRESHOLD):
+        circuit.failure()
+
+
+def test_weights_favour_fast_reliable_models(tmp_path, breakers):
+    router = _router(tmp_path, breakers, models=("fast", "slow", "new", "flaky"))
+    for _ in range(4):
+        router.record("fast", 1.0, "ok")
+        router.record("slow", 4.0, "ok")
+        router.record("flaky", 1.0, "ok")
+    for _ in range(46):
+        router.record("flaky", 1.0, "error")
+
+    weights = dict(zip(router.models, router._weights(router.models)))
+
+    assert weights["fast"] == pytest.approx(1.0)
+    assert weights["slow"] == pytest.approx(0.25)
+    # Sem histórico: melhor taxa e latência mediana dos conhecidos
+    assert weights["new"] == pytest.approx(1.0)
+    assert weights["flaky"] == pytest.approx(0.08)
+    for _ in range(4):
+        router.record("new", 100.0, "ok")
+    # Um modelo muito lento ainda é sondado de vez em quando
+    assert router._weights(["fast", "new"])[1] == pytest.approx(MIN_WEIGHT_SHARE)
+
+
+def test_models_that_only_failed_get_the_minimum_weight(tmp_path, breakers):
+    router = _router(tmp_path, breakers, models=("good", "broken", "new"))
+    for _ in range(4):
+        router.record("good", 2.0, "ok")
+        router.record("broken", 0.3, "error")
+
+    assert router.p50("broken") is None
+    assert router._weights(router.models) == [
+        pytest.approx(0.5),
+        pytest.approx(0.5 * MIN_WEIGHT_SHARE),
+        pytest.approx(0.5),
+    ]
+
+
+def test_timeout_follows_p95_within_bounds(tmp_path, breakers):
+    router = _router(tmp_path, breakers, max_timeout=100, min_timeout=10)
+    assert router.timeout("a") == 100
+
+    for seconds in (2, 3, 4):
+        router.record("a", seconds, "ok")
+    assert router.p95("a") == 4
+    assert router.timeout("a") == 10
+
+    for seconds in (30, 40, 45):
+        router.record("a", seconds, "timeout")
+    assert router.timeout("a") == 90
+    router.record("a", 80, "timeout")
+    assert router.timeout("a") == 100
+
+
+def test_timeout_never_exceeds_the_deadline(tmp_path, breakers):
+    router = _router(tmp_path, breakers)
+    with deadline(5):
+        assert router.timeout("a") <= 5
+    with deadline(-1):
+        with pytest.raises(DeadlineExceeded):
+            router.timeout("a")
+
+
+def test_choose_skips_failed_and_excluded_models(tmp_path, breakers):
+    router = _router(tmp_path, breakers)
+    router.record("a", 1.0, "error")
+    assert {router.choose() for _ in range(20)} == {"b"}
+    # Com tudo excluído ou com falha, ainda escolhe entre os disponíveis
+    assert router.choose(exclude=["b"]) == "a"
+
+
+def test_choose_raises_when_every_circuit_is_open(tmp_path, breakers):
+    router = _router(tmp_path, breakers)
+    for model in router.models:
+        _open(breakers.get(f"test/{model}"))
+    with pytest.raises(CircuitOpenError):
+        router.choose()
+
+
+def test_choose_redraws_when_probe_is_taken(tmp_path, breakers, monkeypatch):
+    now = [time.time()]
+    monkeypatch.setattr(circuit_breaker.time, "time", lambda: now[0])
+    router = _router(tmp_path, breakers)
+    probe = breakers.get("test/a")
+    _open(probe)
+    now[0] += OPEN_SECONDS
+    draws = []
+
+    def choices(candidates, weights):
+        draws.append(list(candidates))
+        if len(draws) == 1:
+            # Outra thread reserva a chamada de teste de "a" depois do sorteio
+            assert probe.allow()
+            return ["a"]
+        return [candidates[0]]
+
+    monkeypatch.setattr(random, "choices", choices)
+
+    assert router.choose() == "b"
+    assert draws == [["a", "b"], ["b"]]
+
+
+def test_half_open_probe_is_handed_out_once(tmp_path, breakers, monkeypatch):
+    now = [time.time()]
+    monkeypatch.setattr(circuit_breaker.time, "time", lambda: now[0])
+    router = _router(tmp_path, breakers, models=("a",))
+    _open(breakers.get("test/a"))
+    now[0] += OPEN_SECONDS
+
+    assert router.choose() == "a"
+    with pytest.raises(CircuitOpenError):
+        router.choose()
+
+
+def test_open_host_circuit_blocks_and_models_release_host_probe(
+    tmp_path, breakers, monkeypatch
+):
+    now = [time.time()]
+    monkeypatch.setattr(circuit_breaker.time, "time", lambda: now[0])
+    router = _router(tmp_path, breakers, models=("a",), host="api")
+    host = breakers.get("host:api")
+    _open(host)
+    with pytest.raises(CircuitOpenError):
+        router.choose()
+
+    now[0] += OPEN_SECONDS
+    _open(breakers.get("test/a"))
+    # O host libera a chamada de teste, mas nenhum modelo está disponível
+    with pytest.raises(CircuitOpenError):
+        router.choose()
+    assert host.available()
+
+
+def test_only_transient_failures_open_circuits(tmp_path, breakers):
+    router = _router(tmp_path, breakers, host="api")
+    bad_request = requests.HTTPError(response=_response(400))
+    for _ in range(FAILURE_THRESHOLD):
+        router.record_failure("a", 1.0, bad_request)
+    assert breakers.get("test/a").available()
+
+    for _ in range(FAILURE_THRESHOLD):
+        router.record_failure("a", 1.0, requests.Timeout())
+    assert not breakers.get("test/a").available()
+    assert not breakers.get("host:api").available()
+
+
+def _response(status):
+    response = requests.Response()
+    response.status_code = status
+    return response
@@ -0,0 +1,107 @@
+import threading
+import time
+
+import pytest
+
+from generate_post.core.domain.interfaces.content_generator_service import (
+    ContentGeneratorServiceInterface,
+)
+from generate_post.core.domain.interfaces.image_generator_service import (
+    ImageGeneratorServiceInterface,
+)
+from generate_post.core.use_cases.overlapped_generation import (
+    generate_text_and_image,
+)
+
+
+def _post(title):
+    return {"title": title, "categories": "Blog", "tags": "ia", "content": "..."}
+
+
+class _Content(ContentGeneratorServiceInterface):
+    """Chama a prévia com `preview_title` e termina com `final_title` (ou erro)."""
+
+    def __init__(self, preview_title, final_title=None, error=None):
+        self._preview_title = preview_title
+        self._final_title = final_title
+        self._error = error
+
+    def generate_content(self, prompt):
+        raise NotImplementedError
+
+    def generate_content_with_preview(self, prompt, on_preview):
+        on_preview(_post(self._preview_title))
+        if self._error:
+            raise self._error
+        return self._final_title
+
+    def create_prompt(self, last_post=None):
+        return ""
+
+    def parse_generated_content(self, content):
+        return _post(content)
+
+
+class _Images(ImageGeneratorServiceInterface):
+    """Imagens que só terminam quando `release[title]` é marcado."""
+
+    def __init__(self, *blocked):
+        self.release = {title: threading.Event() for title in blocked}
+        self.created, self.deleted = [], []
+        self._lock = threading.Lock()
+
+    def generate_image(self, title, categories, tags, content_preview):
+        if title in self.release:
+            self.release[title].wait(10)
+        with self._lock:
+            self.created.append(f"/img/{title}.png")
+        return f"/img/{title}.png"
+
+    def create_image_prompt(self, title, categories, tags, content_preview):
+        return title
+
+    def delete_image(self, image_path):
+        with self._lock:
+            self.deleted.append(image_path)
+
+
+def _wait_for(condition, timeout=5):
+    limit = time.monotonic() + timeout
+    while not condition() and time.monotonic() < limit:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_image_overlaps_and_is_kept():
+    images = _Images()
+    post, image = generate_text_and_image(_Content("A", "A"), images, "prompt")
+    assert post["title"] == "A"
+    assert image == "/img/A.png"
+    assert images.deleted == []
+
+
+def test_text_failure_does_not_wait_for_image_and_deletes_it():
+    images = _Images("A")
+    started = time.monotonic()
+    with pytest.raises(RuntimeError):
+        generate_text_and_image(
+            _Content("A", error=RuntimeError("texto falhou")), images, "prompt"
+        )
+    assert time.monotonic() - started < 2
+    assert images.created == []
+
+    images.release["A"].set()
+    assert _wait_for(lambda: images.deleted == ["/img/A.png"])
+
+
+def test_stale_preview_image_is_not_awaited_and_is_deleted():
+    images = _Images("Antigo")
+    started = time.monotonic()
+
+    post, image = generate_text_and_image(_Content("Antigo", "Novo"), images, "prompt")
+
+    assert time.monotonic() - started < 2
+    assert (post["title"], image) == ("Novo", "/img/Novo.png")
+    images.release["Antigo"].set()
+    assert _wait_for(lambda: images.deleted == ["/img/Antigo.png"])
+    assert images.created == ["/img/Novo.png", "/img/Antigo.png"]
@@ -0,0 +1,146 @@
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from generate_post.utils.response_cache import (
+    READTHROUGH,
+    RECORD,
+    REPLAY,
+    CacheMissError,
+    CachingSession,
+    ResponseCache,
+)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Responde 200 com o número da requisição, para saber se a rede foi usada."""
+
+    calls = 0
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        type(self).calls += 1
+        body = json.dumps({"call": type(self).calls}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    handler = type("Handler", (_Handler,), {"calls": 0})
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_port}/v1beta/models/m:generateContent"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def _session(mode, tmp_path, **cache_kwargs):
+    return CachingSession(mode, ResponseCache(tmp_path / "cache", **cache_kwargs))
+
+
+def test_readthrough_hits_after_miss(server, tmp_path):
+    session = _session(READTHROUGH, tmp_path)
+
+    first = session.post(server, json={"prompt": "a"})
+    second = session.post(server, json={"prompt": "a"})
+    other = session.post(server, json={"prompt": "b"})
+
+    assert first.json() == second.json() == {"call": 1}
+    assert second.headers["Content-Type"] == "application/json"
+    assert other.json() == {"call": 2}
+
+
+def test_record_overwrites_stored_entry(server, tmp_path):
+    _session(READTHROUGH, tmp_path).post(server, json={"prompt": "a"})
+
+    recorded = _session(RECORD, tmp_path).post(server, json={"prompt": "a"})
+    replayed = _session(READTHROUGH, tmp_path).post(server, json={"prompt": "a"})
+
+    assert recorded.json() == replayed.json() == {"call": 2}
+
+
+def test_replay_miss_raises_without_network(server, tmp_path):
+    _session(READTHROUGH, tmp_path).post(server, json={"prompt": "a"})
+    session = _session(REPLAY, tmp_path)
+
+    assert session.post(server, json={"prompt": "a"}).json() == {"call": 1}
+    with pytest.raises(CacheMissError):
+        session.post(server, json={"prompt": "b"})
+    assert _session(READTHROUGH, tmp_path).post(server, json={}).json() == {"call": 2}
+
+
+def test_replay_falls_back_to_alias_of_other_model(server, tmp_path):
+    def alias(url, body):
+        return ("generateContent", body)
+
+    cache = ResponseCache(tmp_path / "cache")
+    CachingSession(READTHROUGH, cache, alias).post(server, json={"prompt": "a"})
+
+    other_model = server.replace("/m:", "/n:")
+    response = CachingSession(REPLAY, cache, alias).post(
+        other_model, json={"prompt": "a"}
+    )
+
+    assert response.json() == {"call": 1}
+
+
+def test_ttl_expiry(tmp_path):
+    cache = ResponseCache(tmp_path, ttl=60)
+    cache.put("k", 200, {}, b"body")
+    meta_path = tmp_path / "k.bin"
+    meta, body = meta_path.read_bytes().split(b"\n", 1)
+    stale = {**json.loads(meta), "created": time.time() - 61}
+    meta_path.write_bytes(json.dumps(stale).encode() + b"\n" + body)
+
+    assert cache.get("k") is None
+    assert cache.get("k", ignore_ttl=True)["body"] == b"body"
+
+
+def test_lru_eviction_removes_least_recently_used(tmp_path):
+    cache = ResponseCache(tmp_path, max_bytes=3 * 150)
+    for i, key in enumerate(("a", "b", "c")):
+        cache.put(key, 200, {}, b"x" * 64)
+        os.utime(tmp_path / f"{key}.bin", (1_000 + i, 1_000 + i))
+
+    # `a` é usado de novo: `b` passa a ser o menos usado
+    assert cache.get("a") is not None
+    cache.put("d", 200, {}, b"x" * 64)
+
+    assert sorted(p.stem for p in tmp_path.glob("*.bin")) == ["a", "c", "d"]
+
+
+def test_eviction_drops_dangling_aliases(tmp_path):
+    cache = ResponseCache(tmp_path, max_bytes=150)
+    cache.put("a", 200, {}, b"x" * 64, alias="alias-a")
+    os.utime(tmp_path / "a.bin", (1_000, 1_000))
+    cache.put("b", 200, {}, b"x" * 64)
+
+    assert not (tmp_path / "alias-a.alias").exists()
+    assert cache.get_alias("alias-a") is None
+
+
+def test_api_key_header_is_not_part_of_the_key(server, tmp_path):
+    session = _session(READTHROUGH, tmp_path)
+
+    first = session.post(
+        server, json={"prompt": "a"}, headers={"x-goog-api-key": "chave-1"}
+    )
+    second = session.post(
+        server, json={"prompt": "a"}, headers={"x-goog-api-key": "chave-2"}
+    )
+
+    assert first.json() == second.json() == {"call": 1}
+    stored = b"".join(p.read_bytes() for p in (tmp_path / "cache").glob("*.bin"))
+    assert b"chave-" not in stored
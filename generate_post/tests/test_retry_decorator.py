@@ -0,0 +1,179 @@
+import asyncio
+import json
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import pytest
+import requests
+
+from generate_post.utils import retry_decorator
+from generate_post.utils.circuit_breaker import CircuitOpenError
+from generate_post.utils.response_cache import CacheMissError
+from generate_post.utils.retry_decorator import (
+    DeadlineExceeded,
+    RetryPolicy,
+    deadline,
+    is_retryable,
+    remaining,
+    retry_after,
+    retry_metrics,
+)
+
+
+def _http_error(status, headers=None, body=None):
+    response = requests.Response()
+    response.status_code = status
+    response.headers.update(headers or {})
+    response._content = json.dumps(body).encode() if body is not None else b""
+    return requests.HTTPError(response=response)
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    slept = []
+    monkeypatch.setattr(retry_decorator.time, "sleep", slept.append)
+    return slept
+
+
+@pytest.mark.parametrize(
+    "exc, expected",
+    [
+        (requests.Timeout(), True),
+        (requests.ConnectionError(), True),
+        (requests.RequestException(), True),
+        (_http_error(429), True),
+        (_http_error(503), True),
+        (_http_error(400), False),
+        (_http_error(404), False),
+        (ValueError("resposta inválida"), False),
+        (DeadlineExceeded(), False),
+        (CircuitOpenError(), False),
+        (CacheMissError(), False),
+    ],
+)
+def test_is_retryable(exc, expected):
+    assert is_retryable(exc) is expected
+
+
+def test_retry_after_header_seconds_and_date():
+    assert retry_after(_http_error(429, {"Retry-After": "7"})) == 7.0
+    when = datetime.now(timezone.utc) + timedelta(seconds=30)
+    hint = retry_after(_http_error(503, {"Retry-After": format_datetime(when)}))
+    assert 28 <= hint <= 30
+    past = datetime.now(timezone.utc) - timedelta(seconds=30)
+    assert retry_after(_http_error(503, {"Retry-After": format_datetime(past)})) == 0
+
+
+def test_retry_after_gemini_retry_info():
+    body = {"error": {"details": [{"@type": "x"}, {"retryDelay": "31s"}]}}
+    assert retry_after(_http_error(429, body=body)) == 31.0
+    assert retry_after(_http_error(429, body={"error": {}})) is None
+    assert retry_after(_http_error(500)) is None
+    assert retry_after(requests.Timeout()) is None
+
+
+def test_next_delay_is_decorrelated_jitter_within_bounds():
+    policy = RetryPolicy(base_delay=1, max_delay=10)
+    previous = 1.0
+    for _ in range(200):
+        delay = policy.next_delay(previous, requests.Timeout())
+        assert 1 <= delay <= min(10, previous * 3)
+        previous = delay
+
+
+def test_next_delay_honours_retry_after_up_to_max_delay():
+    policy = RetryPolicy(base_delay=1, max_delay=10)
+    assert policy.next_delay(1, _http_error(429, {"Retry-After": "5"})) >= 5
+    assert policy.next_delay(1, _http_error(429, {"Retry-After": "500"})) == 10
+
+
+def test_retries_transient_errors_then_succeeds(sleeps):
+    calls = []
+
+    @RetryPolicy(max_attempts=3, base_delay=0.5)
+    def flaky():
+        calls.append(1)
+        if len(calls) < 3:
+            raise requests.ConnectionError("reset")
+        return "ok"
+
+    before = retry_metrics().get(flaky.__qualname__)
+    assert flaky() == "ok"
+    assert len(sleeps) == 2
+    stats = retry_metrics()[flaky.__qualname__]
+    assert stats.attempts - (before.attempts if before else 0) == 3
+    assert stats.failures - (before.failures if before else 0) == 2
+
+
+def test_gives_up_after_max_attempts_and_on_permanent_errors(sleeps):
+    @RetryPolicy(max_attempts=2, base_delay=0.1)
+    def always_timeout():
+        raise requests.Timeout()
+
+    with pytest.raises(requests.Timeout):
+        always_timeout()
+    assert len(sleeps) == 1
+
+    @RetryPolicy(max_attempts=5, base_delay=0.1)
+    def bad_request():
+        raise _http_error(400)
+
+    with pytest.raises(requests.HTTPError):
+        bad_request()
+    assert len(sleeps) == 1
+
+
+def test_custom_retry_on_predicate(sleeps):
+    calls = []
+
+    @RetryPolicy(max_attempts=3, base_delay=0.1, retry_on=lambda e: True)
+    def parse():
+        calls.append(1)
+        raise ValueError("JSON inválido")
+
+    with pytest.raises(ValueError):
+        parse()
+    assert len(calls) == 3
+
+
+def test_no_wait_starts_past_the_deadline(sleeps):
+    @RetryPolicy(max_attempts=5, base_delay=10)
+    def slow():
+        raise requests.Timeout()
+
+    with deadline(5):
+        with pytest.raises(DeadlineExceeded) as info:
+            slow()
+    assert sleeps == []
+    assert isinstance(info.value.__cause__, requests.Timeout)
+
+
+def test_nested_deadlines_keep_the_shortest():
+    assert remaining() is None
+    with deadline(100):
+        with deadline(1000):
+            assert remaining() <= 100
+        with deadline(1):
+            assert remaining() <= 1
+        assert 1 < remaining() <= 100
+    assert remaining() is None
+
+
+def test_async_functions_are_retried(monkeypatch):
+    slept = []
+
+    async def fake_sleep(seconds):
+        slept.append(seconds)
+
+    monkeypatch.setattr(retry_decorator.asyncio, "sleep", fake_sleep)
+    calls = []
+
+    @RetryPolicy(max_attempts=3, base_delay=0.1)
+    async def flaky():
+        calls.append(1)
+        if len(calls) == 1:
+            raise requests.Timeout()
+        return "ok"
+
+    assert asyncio.run(flaky()) == "ok"
+    assert len(slept) == 1
@@ -0,0 +1,139 @@
+import os
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+from generate_post.adapters.repositories.sqlite_post_repository import (
+    SqlitePostRepository,
+    _front_matter,
+)
+
+POST = """---
+title: "{title}"
+date: {date} 10:00:00 -0300
+categories: [{categories}]
+tags: [{tags}]
+image:
+  path: /assets/img/posts/{date}.png
+---
+
+{body}
+"""
+
+
+def _write(posts_dir, date, title, categories="Blog", tags="ia", body="Corpo."):
+    path = posts_dir / f"{date}-{title.lower().replace(' ', '-')}.md"
+    path.write_text(
+        POST.format(
+            title=title, date=date, categories=categories, tags=tags, body=body
+        ),
+        encoding="utf-8",
+    )
+    return path
+
+
+@pytest.fixture
+def posts_dir(tmp_path):
+    posts = tmp_path / "_posts"
+    posts.mkdir()
+    _write(posts, "2025-01-06", "Primeiro", "Blog, IA", "ia, python")
+    _write(posts, "2025-02-03", "Segundo", "Blog", "Rust")
+    _write(posts, "2025-03-10", "Terceiro", "IA", "ia")
+    return posts
+
+
+@pytest.fixture
+def repo(posts_dir, tmp_path):
+    with SqlitePostRepository(posts_dir, tmp_path / "posts.sqlite3") as repo:
+        yield repo
+
+
+def _reads(monkeypatch):
+    """Conta os arquivos relidos pelo índice."""
+    reads = []
+    read_text = Path.read_text
+
+    def counting(self, *args, **kwargs):
+        reads.append(self.name)
+        return read_text(self, *args, **kwargs)
+
+    monkeypatch.setattr(Path, "read_text", counting)
+    return reads
+
+
+def test_front_matter_fields():
+    fields = _front_matter(
+        'title: "Um: título"\ntags: [a, b]\nimage:\n  path: /x.png\n  alt: y'
+    )
+    assert fields["title"] == "Um: título"
+    assert fields["tags"] == "a, b"
+    assert fields["image.path"] == "/x.png"
+    assert fields["image.alt"] == "y"
+
+
+def test_queries(repo):
+    assert [p.title for p in repo.recent(2)] == ["Terceiro", "Segundo"]
+    assert [p.title for p in repo.by_tag("IA")] == ["Terceiro", "Primeiro"]
+    assert [p.title for p in repo.by_tag("ia", since="2025-02-01")] == ["Terceiro"]
+    assert repo.count_by_category() == {"blog": 2, "ia": 2}
+
+    last = repo.get_last_post()
+    assert last.title == "Terceiro"
+    assert last.content == "Corpo."
+    assert last.image_path == "/assets/img/posts/2025-03-10.png"
+    assert last.filename == "_posts/2025-03-10-terceiro.md"
+
+
+def test_sync_reindexes_only_changed_and_drops_removed(repo, posts_dir, monkeypatch):
+    repo.sync()
+    reads = _reads(monkeypatch)
+
+    repo.sync(force=True)
+    assert reads == []
+
+    _write(posts_dir, "2025-02-03", "Segundo", "Blog", "go")
+    (posts_dir / "2025-01-06-primeiro.md").unlink()
+    repo.sync(force=True)
+    assert reads == ["2025-02-03-segundo.md"]
+    assert [p.title for p in repo.by_tag("go")] == ["Segundo"]
+    assert repo.by_tag("rust") == []
+    assert repo.count_by_category() == {"blog": 1, "ia": 1}
+
+
+def test_sync_skips_rewrite_when_only_mtime_changed(repo, posts_dir, monkeypatch):
+    repo.sync()
+    path = posts_dir / "2025-02-03-segundo.md"
+    stat = path.stat()
+    # Checkout novo: mesmo conteúdo, outro mtime
+    os.utime(path, (stat.st_atime, stat.st_mtime + 3600))
+    writes = []
+    repo._db.set_trace_callback(writes.append)
+
+    repo.sync(force=True)
+
+    assert not [sql for sql in writes if sql.startswith(("DELETE", "INSERT"))]
+    row = repo._db.execute(
+        "SELECT mtime FROM posts WHERE filename = ?", (path.name,)
+    ).fetchone()
+    assert row["mtime"] == stat.st_mtime + 3600
+
+    reads = _reads(monkeypatch)
+    repo.sync(force=True)
+    assert reads == []
+
+
+def test_sync_reindexes_when_body_changes_with_same_front_matter(repo, posts_dir):
+    before = {p.filename: p.body_hash for p in repo.recent()}
+    _write(posts_dir, "2025-02-03", "Segundo", "Blog", "Rust", body="Outro corpo.")
+    repo.sync(force=True)
+    after = {p.filename: p.body_hash for p in repo.recent()}
+    changed = [name for name in after if after[name] != before[name]]
+    assert changed == ["_posts/2025-02-03-segundo.md"]
+
+
+def test_close_releases_connection(posts_dir, tmp_path):
+    with SqlitePostRepository(posts_dir, tmp_path / "posts.sqlite3") as repo:
+        repo.sync()
+    with pytest.raises(sqlite3.ProgrammingError):
+        repo.recent()
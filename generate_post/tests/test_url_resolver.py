@@ -0,0 +1,111 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from generate_post.utils.url_resolver import MAX_AGE, UrlResolver, canonical_url
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """`/go/<caminho>` redireciona para `/<caminho>`; `/no-head/...` recusa HEAD."""
+
+    def do_HEAD(self):
+        if self.path.startswith("/no-head/"):
+            self.send_response(405)
+            self.end_headers()
+        else:
+            self._reply()
+
+    def do_GET(self):
+        self._reply()
+
+    def _reply(self):
+        path = self.path.removeprefix("/no-head")
+        if path.startswith("/go/"):
+            self.send_response(302)
+            self.send_header("Location", path.removeprefix("/go"))
+        elif path.startswith("/missing"):
+            self.send_response(404)
+        else:
+            self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_port}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_canonical_url_drops_tracking_params_and_fragment():
+    url = "HTTPS://Example.COM/a/b?utm_source=x&id=1&fbclid=y&gclid=z#top"
+    assert canonical_url(url) == "https://example.com/a/b?id=1"
+
+
+def test_canonical_url_keeps_trailing_slash_except_for_empty_path():
+    assert canonical_url("https://example.com/docs/") == "https://example.com/docs/"
+    assert canonical_url("https://example.com/docs") == "https://example.com/docs"
+    assert canonical_url("https://example.com") == "https://example.com/"
+
+
+def test_resolve_all_follows_redirects_and_caches(server, tmp_path):
+    path = tmp_path / "resolved.json"
+    resolver = UrlResolver(path=path)
+    urls = [f"{server}/go/final?utm_medium=x", f"{server}/no-head/go/other/"]
+
+    resolved = resolver.resolve_all(urls)
+
+    assert resolved == {urls[0]: f"{server}/final", urls[1]: f"{server}/other/"}
+    saved = json.loads(path.read_text(encoding="utf-8"))
+    assert {u: e["url"] for u, e in saved.items()} == resolved
+    # Offline, o arquivo basta
+    assert UrlResolver(path=path, offline=True).resolve_all(urls) == resolved
+
+
+def test_resolve_all_keeps_original_when_resolution_fails(server, tmp_path):
+    path = tmp_path / "resolved.json"
+    url = f"{server}/go/missing#frag"
+
+    assert UrlResolver(path=path).resolve_all([url]) == {url: f"{server}/go/missing"}
+    assert not path.exists()
+
+
+def test_resolve_all_ignores_expired_entries_on_load(tmp_path):
+    path = tmp_path / "resolved.json"
+    now = time.time()
+    path.write_text(
+        json.dumps(
+            {
+                "https://old.example/x": {"url": "https://stale/", "at": now - MAX_AGE},
+                "https://new.example/y": {"url": "https://fresh/", "at": now},
+            }
+        ),
+        encoding="utf-8",
+    )
+    resolved = UrlResolver(path=path, offline=True).resolve_all(
+        ["https://old.example/x", "https://new.example/y"]
+    )
+    assert resolved == {
+        "https://old.example/x": "https://old.example/x",
+        "https://new.example/y": "https://fresh/",
+    }
+
+
+def test_save_prunes_expired_entries(server, tmp_path):
+    path = tmp_path / "resolved.json"
+    path.write_text(
+        json.dumps({"https://old.example/": {"url": "https://stale/", "at": 0}}),
+        encoding="utf-8",
+    )
+    UrlResolver(path=path).resolve_all([f"{server}/go/final"])
+    assert list(json.loads(path.read_text(encoding="utf-8"))) == [f"{server}/go/final"]
@@ -0,0 +1,153 @@
+import json
+import logging
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+import requests
+
+from generate_post.config.constants import STATE_DIR
+
+logger = logging.getLogger(__name__)
+
+CIRCUITS_PATH = STATE_DIR / "circuits.json"
+
+# Falhas seguidas que abrem o circuito
+FAILURE_THRESHOLD = 3
+# Tempo aberto antes de liberar uma chamada de teste (half-open)
+OPEN_SECONDS = 15 * 60
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half-open"
+
+_FILE_LOCK = threading.Lock()
+
+
+class CircuitOpenError(requests.RequestException):
+    """Circuito aberto: a chamada nem é feita, para cair logo no fallback."""
+
+
+class CircuitBreaker:
+    """Circuito closed/open/half-open de um host ou modelo.
+
+    Abre após `FAILURE_THRESHOLD` falhas seguidas e fica aberto por
+    `OPEN_SECONDS`; depois disso uma única chamada de teste é liberada, e o
+    resultado dela fecha ou reabre o circuito. O estado é compartilhado por
+    `CircuitBreakers` e persistido entre execuções, então uma execução agendada
+    depois de uma queda faz uma chamada de teste em vez de esperar todos os
+    timeouts de novo.
+    """
+
+    def __init__(self, registry: "CircuitBreakers", key: str, data: Dict):
+        self._registry = registry
+        self.key = key
+        self.state = data.get("state", CLOSED)
+        self.failures = int(data.get("failures", 0))
+        self.opened_at = float(data.get("opened_at", 0.0))
+        self._probing = False
+
+    def available(self) -> bool:
+        """Se uma chamada seria liberada agora, sem reservar a chamada de teste."""
+        with self._registry.lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN:
+                return time.time() - self.opened_at >= OPEN_SECONDS
+            return not self._probing
+
+    def allow(self) -> bool:
+        """Se uma chamada pode ser feita agora (e reserva a de teste, se for o caso)."""
+        with self._registry.lock:
+            if not self.available():
+                return False
+            if self.state == OPEN:
+                self.state = HALF_OPEN
+                logger.info(
+                    "Circuito %s meio aberto: liberando chamada de teste", self.key
+                )
+            if self.state == HALF_OPEN:
+                self._probing = True
+            return True
+
+    def release(self) -> None:
+        """Devolve a chamada de teste reservada por `allow()` que não foi feita."""
+        with self._registry.lock:
+            self._probing = False
+
+    def success(self) -> None:
+        with self._registry.lock:
+            if self.state != CLOSED:
+                logger.info("Circuito %s fechado", self.key)
+            self.state = CLOSED
+            self.failures = 0
+            self._probing = False
+        self._registry.save()
+
+    def failure(self) -> None:
+        with self._registry.lock:
+            self.failures += 1
+            self._probing = False
+            if self.state == HALF_OPEN or self.failures >= FAILURE_THRESHOLD:
+                if self.state != OPEN:
+                    logger.warning(
+                        "Circuito %s aberto após %d falhas seguidas",
+                        self.key,
+                        self.failures,
+                    )
+                self.state = OPEN
+                self.opened_at = time.time()
+        self._registry.save()
+
+    def to_dict(self) -> Dict:
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "opened_at": round(self.opened_at, 1),
+        }
+
+
+class CircuitBreakers:
+    """Registro dos circuitos, um por chave (`host:<host>`, `<roteador>/<modelo>`)."""
+
+    def __init__(self, path: Path = CIRCUITS_PATH):
+        self._path = path
+        self.lock = threading.RLock()
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._data: Optional[Dict] = None
+
+    def get(self, key: str) -> CircuitBreaker:
+        with self.lock:
+            if self._data is None:
+                self._data = self._load()
+            if key not in self._breakers:
+                self._breakers[key] = CircuitBreaker(self, key, self._data.get(key, {}))
+            return self._breakers[key]
+
+    def save(self) -> None:
+        with self.lock:
+            circuits = {key: b.to_dict() for key, b in self._breakers.items()}
+        with _FILE_LOCK:
+            try:
+                data = json.loads(self._path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                data = {}
+            data.update(circuits)
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self._path.with_suffix(".tmp")
+            tmp.write_text(json.dumps(data, indent=1), encoding="utf-8")
+            tmp.replace(self._path)
+
+    def _load(self) -> Dict:
+        try:
+            return json.loads(self._path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError):
+            logger.warning("Estado dos circuitos ilegível em %s; ignorando", self._path)
+            return {}
+
+
+# Registro compartilhado pelos adaptadores do processo
+BREAKERS = CircuitBreakers()
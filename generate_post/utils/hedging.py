@@ -0,0 +1,278 @@
+import contextvars
+import json
+import logging
+import socket
+import threading
+import time
+import weakref
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple, TypeVar
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from generate_post.config.constants import STATE_DIR
+from generate_post.utils.circuit_breaker import CircuitOpenError
+from generate_post.utils.model_router import ModelRouter
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+BUDGET_PATH = STATE_DIR / "hedge_budget.json"
+
+# Cada chamada primária rende HEDGE_RATIO ficha; cada hedge gasta uma. Assim os
+# hedges ficam em no máximo ~10% das chamadas, com folga de HEDGE_BURST.
+HEDGE_RATIO = 0.1
+HEDGE_BURST = 2.0
+
+_FILE_LOCK = threading.Lock()
+
+
+class HedgeBudget:
+    """Token bucket que limita quantas requisições extras os hedges podem fazer.
+
+    O saldo fica em `STATE_DIR/hedge_budget.json`, sob a chave `name`, para que
+    o limite valha entre execuções e não só dentro de uma.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        ratio: float = HEDGE_RATIO,
+        burst: float = HEDGE_BURST,
+        path: Path = BUDGET_PATH,
+    ):
+        self.name = name
+        self.ratio = ratio
+        self.burst = burst
+        self._path = path
+        self._lock = threading.Lock()
+        self.tokens = self._load()
+
+    def deposit(self) -> None:
+        with self._lock:
+            # Arredonda para que 10 x 0.1 dê 1 ficha, não 0.999...
+            self.tokens = min(self.burst, round(self.tokens + self.ratio, 6))
+            self._save()
+
+    def refund(self) -> None:
+        with self._lock:
+            self.tokens = min(self.burst, self.tokens + 1)
+            self._save()
+
+    def withdraw(self) -> bool:
+        with self._lock:
+            if self.tokens < 1:
+                return False
+            self.tokens -= 1
+            self._save()
+            return True
+
+    def _load(self) -> float:
+        try:
+            data = json.loads(self._path.read_text(encoding="utf-8"))
+            return float(data.get(self.name, self.burst))
+        except (OSError, ValueError):
+            return self.burst
+
+    def _save(self) -> None:
+        with _FILE_LOCK:
+            try:
+                data = json.loads(self._path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                data = {}
+            data[self.name] = round(self.tokens, 3)
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self._path.with_suffix(".tmp")
+            tmp.write_text(json.dumps(data), encoding="utf-8")
+            tmp.replace(self._path)
+
+
+class AttemptCancelled(requests.RequestException):
+    """A tentativa foi cancelada porque outra venceu o hedge."""
+
+
+class Cancellation(threading.Event):
+    """Sinal de cancelamento de uma tentativa do `Hedger`.
+
+    Além de marcar o evento, `set()` derruba as conexões das sessões passadas
+    por `attach`: uma tentativa parada no `recv` esperando a resposta recebe
+    um erro de conexão na hora, em vez de segurar o socket até o timeout.
+    `check()` levanta `AttemptCancelled` entre uma etapa e outra (ex.: antes
+    de pedir uma continuação).
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._sockets: "weakref.WeakSet[socket.socket]" = weakref.WeakSet()
+        self._sockets_lock = threading.Lock()
+
+    def attach(self, session: requests.Session) -> requests.Session:
+        """Monta em `session` conexões que `set()` consegue derrubar."""
+        adapter = _CancellableAdapter(self._track)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    def check(self) -> None:
+        if self.is_set():
+            raise AttemptCancelled("Tentativa cancelada: outra venceu o hedge")
+
+    def set(self) -> None:
+        with self._sockets_lock:
+            super().set()
+            sockets = list(self._sockets)
+        for sock in sockets:
+            _shutdown(sock)
+
+    def _track(self, sock: socket.socket) -> None:
+        with self._sockets_lock:
+            if not self.is_set():
+                self._sockets.add(sock)
+                return
+        # Conexão aberta depois do cancelamento: a requisição falha no envio.
+        _shutdown(sock)
+
+
+class _CancellableAdapter(HTTPAdapter):
+    """HTTPAdapter que avisa `on_connect` a cada socket conectado."""
+
+    def __init__(self, on_connect: Callable[[socket.socket], None]):
+        self._on_connect = on_connect
+        super().__init__()
+
+    def init_poolmanager(self, *args, **kwargs) -> None:
+        super().init_poolmanager(*args, **kwargs)
+        on_connect = self._on_connect
+
+        def tracked(pool_cls):
+            class Connection(pool_cls.ConnectionCls):
+                def connect(self) -> None:
+                    super().connect()
+                    on_connect(self.sock)
+
+            return type(pool_cls.__name__, (pool_cls,), {"ConnectionCls": Connection})
+
+        # O dicionário padrão é compartilhado pelo urllib3: troca, não altera.
+        self.poolmanager.pool_classes_by_scheme = {
+            scheme: tracked(pool_cls)
+            for scheme, pool_cls in self.poolmanager.pool_classes_by_scheme.items()
+        }
+
+
+def _shutdown(sock: socket.socket) -> None:
+    try:
+        sock.shutdown(socket.SHUT_RDWR)
+    except OSError:
+        pass
+
+
+class Hedger:
+    """Executa uma chamada a um modelo e, se ela passar do p95, dispara outra.
+
+    `call(model, cancel)` faz a requisição a `model` e devolve um resultado já
+    validado. `cancel` é uma `Cancellation`: a chamada deve fazer as
+    requisições numa sessão própria passada por `cancel.attach`, e chamar
+    `cancel.check()` entre etapas. Quando uma tentativa vence, as conexões da
+    outra são derrubadas. Tentativas rodam em threads daemon, então nada
+    segura o fim do processo. Sem `budget`, a chamada nunca é duplicada.
+    """
+
+    def __init__(self, router: ModelRouter, budget: Optional[HedgeBudget] = None):
+        self._router = router
+        # Com um modelo só não há para onde desviar.
+        self._budget = budget if len(router.models) > 1 else None
+
+    def run(self, call: Callable[[str, Cancellation], T]) -> T:
+        primary = self._router.choose()
+        if self._budget is None:
+            with self._router.track(primary):
+                return call(primary, Cancellation())
+
+        self._budget.deposit()
+        cancel = Cancellation()
+        attempts = {self._spawn(call, primary, cancel): (primary, cancel)}
+
+        delay = self._router.p95(primary)
+        done, _ = wait(attempts, timeout=delay)
+        if not done and delay is not None:
+            self._launch_backup(call, primary, delay, attempts)
+
+        pending = set(attempts)
+        errors = []
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                model, _ = attempts[future]
+                if future.exception() is None:
+                    for other in pending:
+                        loser, cancel = attempts[other]
+                        cancel.set()
+                        logger.info("Hedge: %s venceu; cancelando %s", model, loser)
+                    return future.result()
+                errors.append(future.exception())
+        raise errors[0]
+
+    def _launch_backup(
+        self,
+        call: Callable[[str, Cancellation], T],
+        primary: str,
+        delay: float,
+        attempts: Dict[Future, Tuple[str, Cancellation]],
+    ) -> None:
+        if not self._budget.withdraw():
+            logger.info(
+                "Hedge: %s passou do p95 (%.1fs), sem orçamento", primary, delay
+            )
+            return
+        try:
+            backup = self._router.choose(exclude=[primary])
+        except CircuitOpenError as e:
+            logger.info("Hedge: %s passou do p95, mas %s", primary, e)
+            self._budget.refund()
+            return
+        if backup == primary:
+            self._budget.refund()
+            return
+        logger.info(
+            "Hedge: %s passou do p95 (%.1fs); disparando %s", primary, delay, backup
+        )
+        cancel = Cancellation()
+        attempts[self._spawn(call, backup, cancel)] = (backup, cancel)
+
+    def _spawn(
+        self,
+        call: Callable[[str, Cancellation], T],
+        model: str,
+        cancel: Cancellation,
+    ) -> Future:
+        future: Future = Future()
+
+        def attempt() -> None:
+            started = time.perf_counter()
+            try:
+                result = call(model, cancel)
+            except BaseException as exc:
+                # Falha provocada pelo cancelamento não conta contra o modelo,
+                # e a chamada de teste do circuito, se era uma, fica livre.
+                if cancel.is_set():
+                    self._router.release(model)
+                else:
+                    self._router.record_failure(
+                        model, time.perf_counter() - started, exc
+                    )
+                future.set_exception(exc)
+                return
+            self._router.record_success(model, time.perf_counter() - started)
+            future.set_result(result)
+
+        # Roda no contexto atual para herdar o prazo total do caso de uso.
+        threading.Thread(
+            target=contextvars.copy_context().run,
+            args=(attempt,),
+            name=f"hedge-{model}",
+            daemon=True,
+        ).start()
+        return future
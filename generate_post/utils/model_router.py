@@ -0,0 +1,284 @@
+import json
+import logging
+import random
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, Optional
+
+import requests
+
+from generate_post.config.constants import STATE_DIR
+from generate_post.utils.circuit_breaker import (
+    BREAKERS,
+    CircuitBreakers,
+    CircuitOpenError,
+)
+from generate_post.utils.retry_decorator import (
+    DeadlineExceeded,
+    is_retryable,
+    remaining,
+)
+
+logger = logging.getLogger(__name__)
+
+STATS_PATH = STATE_DIR / "model_stats.json"
+
+# Chamadas lembradas por modelo (janela deslizante)
+WINDOW = 50
+# Abaixo disso o modelo ainda é tratado como desconhecido
+MIN_SAMPLES = 3
+# Timeout adaptativo = p95 x fator, dentro de [min_timeout, max_timeout]
+TIMEOUT_FACTOR = 2.0
+# Peso mínimo relativo ao melhor modelo, para que um modelo ruim ainda seja
+# sondado de vez em quando e possa se recuperar
+MIN_WEIGHT_SHARE = 0.05
+
+_OK = "ok"
+_THROTTLED = "throttled"
+_TIMEOUT = "timeout"
+_ERROR = "error"
+
+# Vários roteadores (texto, imagem) gravam no mesmo arquivo
+_FILE_LOCK = threading.Lock()
+
+
+def _percentile(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, max(0, round(q * (len(ordered) - 1))))
+    return ordered[idx]
+
+
+def _outcome_of(exc: BaseException) -> str:
+    if isinstance(exc, requests.Timeout):
+        return _TIMEOUT
+    response = getattr(exc, "response", None)
+    if response is not None and response.status_code == 429:
+        return _THROTTLED
+    return _ERROR
+
+
+class ModelRouter:
+    """Escolhe entre modelos equivalentes com base em latência e erros recentes.
+
+    Para cada modelo guarda as últimas `WINDOW` chamadas (duração e resultado)
+    em `STATE_DIR/model_stats.json`, sob a chave `name`. O peso de cada modelo
+    é a taxa de sucesso dividida pela latência mediana; modelos sem latência
+    medida usam a mediana dos demais, então os sem histórico são testados e os
+    que só falharam ficam no peso mínimo.
+    Um modelo que falhou nesta execução fica fora da próxima escolha, então o
+    `@retry` tenta outro.
+
+    Cada modelo e o `host` têm um circuit breaker: modelos com circuito aberto
+    não são sorteados, e se o host (ou todos os modelos) estiver com circuito
+    aberto, `choose` levanta `CircuitOpenError` sem fazer chamada nenhuma.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        models: Iterable[str],
+        max_timeout: float,
+        min_timeout: float = 30,
+        host: Optional[str] = None,
+        stats_path: Path = STATS_PATH,
+        breakers: CircuitBreakers = BREAKERS,
+    ):
+        self.name = name
+        self.models = list(models)
+        self.max_timeout = max_timeout
+        self.min_timeout = min_timeout
+        self._host_circuit = breakers.get(f"host:{host}") if host else None
+        self._circuits = {m: breakers.get(f"{name}/{m}") for m in self.models}
+        self._stats_path = stats_path
+        self._lock = threading.Lock()
+        self._failed: set[str] = set()
+        self._calls: Dict[str, list] = self._load()
+
+    def choose(self, exclude: Iterable[str] = ()) -> str:
+        """Sorteia um modelo ponderado, evitando `exclude` e falhas desta execução.
+
+        O modelo devolvido já passou por `allow()`: se for a chamada de teste
+        de um circuito meio aberto, ela fica reservada para quem chamou.
+        """
+        if self._host_circuit and not self._host_circuit.allow():
+            raise CircuitOpenError(f"Circuito aberto para {self._host_circuit.key}")
+        refused: set[str] = set()
+        while True:
+            try:
+                model = self._pick(set(exclude), refused)
+            except CircuitOpenError:
+                if self._host_circuit:
+                    self._host_circuit.release()
+                raise
+            # Outra thread pode ter reservado a chamada de teste entre o
+            # sorteio e aqui; nesse caso o modelo sai e o sorteio se repete.
+            if self._circuits[model].allow():
+                break
+            refused.add(model)
+        logger.info(
+            "%s: modelo selecionado %s (%s)", self.name, model, self.describe(model)
+        )
+        return model
+
+    def _pick(self, exclude: set[str], refused: set[str]) -> str:
+        with self._lock:
+            closed = [
+                m
+                for m in self.models
+                if m not in refused and self._circuits[m].available()
+            ]
+            if not closed:
+                raise CircuitOpenError(
+                    f"{self.name}: circuito aberto em todos os modelos"
+                )
+            skip = exclude | self._failed
+            candidates = [m for m in closed if m not in skip]
+            if not candidates:
+                candidates = [m for m in closed if m not in exclude]
+            if not candidates:
+                candidates = closed
+            weights = self._weights(candidates)
+        return random.choices(candidates, weights=weights)[0]
+
+    def timeout(self, model: str) -> float:
+        """Timeout adaptativo: p95 observado vezes `TIMEOUT_FACTOR`, com limites.
+
+        Nunca passa do que resta do prazo total (`retry_decorator.deadline`).
+        """
+        p95 = self.p95(model)
+        if p95 is None:
+            timeout = self.max_timeout
+        else:
+            timeout = min(self.max_timeout, max(self.min_timeout, p95 * TIMEOUT_FACTOR))
+        left = remaining()
+        if left is None:
+            return timeout
+        if left <= 0:
+            raise DeadlineExceeded(f"Prazo total esgotado antes de chamar {model}")
+        return min(timeout, left)
+
+    def p50(self, model: str) -> Optional[float]:
+        return self._latency(model, 0.5)
+
+    def p95(self, model: str) -> Optional[float]:
+        return self._latency(model, 0.95)
+
+    def error_rate(self, model: str) -> float:
+        calls = self._calls.get(model, [])
+        if not calls:
+            return 0.0
+        return sum(1 for _, outcome in calls if outcome != _OK) / len(calls)
+
+    def throttled(self, model: str) -> int:
+        return sum(
+            1 for _, outcome in self._calls.get(model, []) if outcome == _THROTTLED
+        )
+
+    def describe(self, model: str) -> str:
+        p50, p95 = self.p50(model), self.p95(model)
+        if p50 is None:
+            return f"sem histórico, timeout {self.timeout(model):.0f}s"
+        return (
+            f"p50 {p50:.1f}s, p95 {p95:.1f}s, "
+            f"erros {self.error_rate(model):.0%}, 429 {self.throttled(model)}, "
+            f"timeout {self.timeout(model):.0f}s"
+        )
+
+    @contextmanager
+    def track(self, model: str) -> Iterator[None]:
+        """Mede a chamada feita dentro do bloco e registra o resultado."""
+        started = time.perf_counter()
+        try:
+            yield
+        except BaseException as exc:
+            self.record_failure(model, time.perf_counter() - started, exc)
+            raise
+        self.record_success(model, time.perf_counter() - started)
+
+    def record_success(self, model: str, seconds: float) -> None:
+        self.record(model, seconds, _OK)
+        for circuit in self._circuits_of(model):
+            circuit.success()
+
+    def record_failure(self, model: str, seconds: float, exc: BaseException) -> None:
+        self.record(model, seconds, _outcome_of(exc))
+        # Só falhas transitórias (timeout, 429, 5xx) dizem algo sobre a saúde
+        # do serviço; um 400 ou uma resposta inválida não abrem o circuito.
+        if is_retryable(exc):
+            for circuit in self._circuits_of(model):
+                circuit.failure()
+
+    def release(self, model: str) -> None:
+        """Devolve a chamada de teste reservada por `choose` para uma chamada abortada."""
+        for circuit in self._circuits_of(model):
+            circuit.release()
+
+    def _circuits_of(self, model: str) -> list:
+        circuits = [self._circuits[model]]
+        if self._host_circuit:
+            circuits.append(self._host_circuit)
+        return circuits
+
+    def record(self, model: str, seconds: float, outcome: str) -> None:
+        with self._lock:
+            calls = self._calls.setdefault(model, [])
+            calls.append([round(seconds, 2), outcome])
+            del calls[:-WINDOW]
+            if outcome == _OK:
+                self._failed.discard(model)
+            else:
+                self._failed.add(model)
+            self._save()
+        if outcome != _OK:
+            logger.warning(
+                "%s: %s terminou com %s após %.1fs", self.name, model, outcome, seconds
+            )
+
+    def _latency(self, model: str, q: float) -> Optional[float]:
+        # Timeouts entram como latência (censurada), senão o p95 só encolheria.
+        samples = [
+            s for s, outcome in self._calls.get(model, []) if outcome in (_OK, _TIMEOUT)
+        ]
+        if len(samples) < MIN_SAMPLES:
+            return None
+        return _percentile(samples, q)
+
+    def _weights(self, candidates: list[str]) -> list[float]:
+        known = [m for m in candidates if self.p50(m) is not None]
+        default_p50 = _percentile([self.p50(m) for m in known], 0.5) if known else 1.0
+        weights = []
+        for model in candidates:
+            p50 = self.p50(model)
+            if p50 is None:
+                # Sem latência medida: só erros (ex.: 500, 429) ou nenhum histórico
+                weights.append((1.0 - self.error_rate(model)) / max(default_p50, 0.1))
+            else:
+                weights.append((1.0 - self.error_rate(model)) / max(p50, 0.1))
+        floor = (max(weights) or 1.0) * MIN_WEIGHT_SHARE
+        return [max(w, floor) for w in weights]
+
+    def _load(self) -> Dict[str, list]:
+        try:
+            data = json.loads(self._stats_path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError):
+            logger.warning(
+                "Estatísticas de modelos ilegíveis em %s; ignorando", self._stats_path
+            )
+            return {}
+        return data.get(self.name, {})
+
+    def _save(self) -> None:
+        with _FILE_LOCK:
+            try:
+                data = json.loads(self._stats_path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                data = {}
+            data[self.name] = self._calls
+            self._stats_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self._stats_path.with_suffix(".tmp")
+            tmp.write_text(json.dumps(data, indent=1), encoding="utf-8")
+            tmp.replace(self._stats_path)
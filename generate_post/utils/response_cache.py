@@ -0,0 +1,220 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from generate_post.config.constants import STATE_DIR
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = STATE_DIR / "http_cache"
+
+OFF = "off"
+READTHROUGH = "readthrough"
+RECORD = "record"
+REPLAY = "replay"
+MODES = (OFF, READTHROUGH, RECORD, REPLAY)
+
+# Respostas mais velhas que isso são ignoradas (exceto no replay)
+DEFAULT_TTL = 7 * 24 * 3600  # segundos
+# Acima disso as entradas menos usadas recentemente são removidas
+DEFAULT_MAX_BYTES = 200 * 1024 * 1024
+
+# (url, corpo JSON) -> chave que ignora o modelo; ver `CachingSession`
+AliasFn = Callable[[str, Any], Tuple[Any, ...]]
+
+_KEPT_HEADERS = ("Content-Type",)
+
+
+class CacheMissError(requests.RequestException):
+    """Modo replay sem resposta gravada para a requisição."""
+
+
+def request_key(*parts: Any) -> str:
+    """Hash SHA-256 de JSON canônico (chaves ordenadas) das partes."""
+    canonical = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """Respostas HTTP em disco, endereçadas pelo hash da requisição.
+
+    Cada entrada é um arquivo `<hash>.bin`: uma linha JSON com status, headers
+    e data de criação, seguida do corpo cru. O mtime do arquivo marca o último
+    uso; quando o diretório passa de `max_bytes`, os menos usados saem
+    primeiro. Escritas vão para um temporário renomeado no fim.
+    """
+
+    def __init__(
+        self,
+        directory: Path = CACHE_DIR,
+        ttl: float = DEFAULT_TTL,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+    ):
+        self._dir = directory
+        self._ttl = ttl
+        self._max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    def get(self, key: str, ignore_ttl: bool = False) -> Optional[Dict]:
+        path = self._dir / f"{key}.bin"
+        try:
+            with path.open("rb") as f:
+                meta = json.loads(f.readline())
+                body = f.read()
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError):
+            logger.warning("Entrada de cache corrompida: %s", path.name)
+            return None
+        if not ignore_ttl and time.time() - meta["created"] > self._ttl:
+            return None
+        os.utime(path)
+        return {**meta, "body": body}
+
+    def get_alias(self, alias: str, ignore_ttl: bool = False) -> Optional[Dict]:
+        try:
+            key = (self._dir / f"{alias}.alias").read_text(encoding="utf-8").strip()
+        except FileNotFoundError:
+            return None
+        return self.get(key, ignore_ttl)
+
+    def put(
+        self,
+        key: str,
+        status: int,
+        headers: Dict[str, str],
+        body: bytes,
+        alias: Optional[str] = None,
+    ) -> None:
+        meta = {"created": time.time(), "status": status, "headers": headers}
+        data = json.dumps(meta).encode("utf-8") + b"\n" + body
+        with self._lock:
+            self._dir.mkdir(parents=True, exist_ok=True)
+            self._write(self._dir / f"{key}.bin", data)
+            if alias:
+                self._write(self._dir / f"{alias}.alias", key.encode("ascii"))
+            self._evict()
+
+    def _write(self, path: Path, data: bytes) -> None:
+        fd, tmp = tempfile.mkstemp(dir=self._dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+
+    def _evict(self) -> None:
+        entries = [(p.stat(), p) for p in self._dir.glob("*.bin")]
+        total = sum(st.st_size for st, _ in entries)
+        if total <= self._max_bytes:
+            return
+        for st, path in sorted(entries, key=lambda e: e[0].st_mtime):
+            path.unlink(missing_ok=True)
+            total -= st.st_size
+            logger.info("Cache: removida entrada antiga %s", path.name[:12])
+            if total <= self._max_bytes:
+                break
+        # Aliases que apontam para entradas removidas
+        for alias in self._dir.glob("*.alias"):
+            key = alias.read_text(encoding="utf-8").strip()
+            if not (self._dir / f"{key}.bin").exists():
+                alias.unlink(missing_ok=True)
+
+
+class CachingSession(requests.Session):
+    """`requests.Session` com cache de respostas 200, para desenvolvimento.
+
+    A chave é o hash de método, URL e corpo JSON (o modelo está na URL); os
+    headers, onde ficam as credenciais, não entram. Modos:
+
+    - `readthrough`: usa a resposta gravada se houver, senão chama e grava;
+    - `record`: sempre chama a API e regrava;
+    - `replay`: só responde do cache, ignorando o TTL, e levanta
+      `CacheMissError` se não houver resposta gravada.
+
+    Como o `ModelRouter` sorteia o modelo, `alias(url, json)` pode gerar uma
+    segunda chave sem o modelo: no replay, uma requisição igual gravada com
+    outro modelo também serve. Respostas em streaming são lidas inteiras
+    antes de gravar e devolvidas de uma vez.
+    """
+
+    def __init__(
+        self,
+        mode: str = READTHROUGH,
+        cache: Optional[ResponseCache] = None,
+        alias: Optional[AliasFn] = None,
+    ):
+        super().__init__()
+        if mode not in MODES:
+            raise ValueError(f"Modo de cache inválido: {mode} (use {', '.join(MODES)})")
+        self.mode = mode
+        self._cache = cache or ResponseCache()
+        self._alias = alias
+
+    def request(self, method, url, *args, **kwargs):
+        if self.mode == OFF:
+            return super().request(method, url, *args, **kwargs)
+
+        body = kwargs.get("json")
+        key = request_key(method.upper(), url, body)
+        alias = request_key(*self._alias(url, body)) if self._alias else None
+
+        if self.mode in (READTHROUGH, REPLAY):
+            replay = self.mode == REPLAY
+            entry = self._cache.get(key, ignore_ttl=replay)
+            if entry is None and replay and alias:
+                entry = self._cache.get_alias(alias, ignore_ttl=True)
+            if entry is not None:
+                logger.info("Cache: resposta gravada para %s", _short(url))
+                return _cached_response(entry, url)
+            if replay:
+                raise CacheMissError(
+                    f"Sem resposta gravada para {method} {_short(url)}"
+                )
+
+        response = super().request(method, url, *args, **kwargs)
+        if response.status_code == 200:
+            headers = {
+                h: response.headers[h] for h in _KEPT_HEADERS if h in response.headers
+            }
+            # `.content` lê o stream inteiro; depois disso iter_lines() usa o
+            # conteúdo em memória.
+            self._cache.put(key, response.status_code, headers, response.content, alias)
+            logger.info("Cache: resposta gravada de %s", _short(url))
+        return response
+
+
+def create_session(
+    mode: str = OFF, alias: Optional[AliasFn] = None
+) -> requests.Session:
+    """Sessão HTTP dos adaptadores: comum com `off`, com cache nos outros modos."""
+    if mode == OFF:
+        return requests.Session()
+    return CachingSession(mode, alias=alias)
+
+
+def _cached_response(entry: Dict, url: str) -> requests.Response:
+    response = requests.Response()
+    response.status_code = entry["status"]
+    response.reason = "OK"
+    response.headers = CaseInsensitiveDict(entry["headers"])
+    response.url = url
+    response.encoding = "utf-8"
+    response._content = entry["body"]
+    response._content_consumed = True
+    return response
+
+
+def _short(url: str) -> str:
+    return url.split("?", 1)[0].rsplit("/", 2)[-1]
@@ -1,44 +1,259 @@
+import asyncio
+import contextvars
+import email.utils
+import inspect
 import logging
+import random
+import re
+import threading
 import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
 from functools import wraps
+from typing import Callable, Dict, Iterator, Optional
+
+import requests
 
 from generate_post.config.constants import MAX_RETRIES, RETRY_DELAY
+from generate_post.utils.circuit_breaker import CircuitOpenError
+from generate_post.utils.response_cache import CacheMissError
 
 logger = logging.getLogger(__name__)
 
+# Teto de cada espera entre tentativas (também limita o Retry-After)
+MAX_RETRY_DELAY = 60.0
+
+_RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+_RETRY_DELAY_RE = re.compile(r"^(\d+(?:\.\d+)?)s$")
+
+# Instante (time.monotonic) em que o trabalho atual precisa terminar
+_DEADLINE: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar(
+    "retry_deadline", default=None
+)
+
+
+class DeadlineExceeded(requests.Timeout):
+    """O prazo total do caso de uso acabou antes de uma nova tentativa."""
+
+
+@contextmanager
+def deadline(seconds: float) -> Iterator[None]:
+    """Define um prazo total para o bloco; prazos aninhados valem o menor.
+
+    O prazo fica numa ContextVar: threads abertas dentro do bloco só o herdam
+    se rodarem em `contextvars.copy_context()`.
+    """
+    current = _DEADLINE.get()
+    limit = time.monotonic() + seconds
+    token = _DEADLINE.set(limit if current is None else min(current, limit))
+    try:
+        yield
+    finally:
+        _DEADLINE.reset(token)
+
+
+def remaining() -> Optional[float]:
+    """Segundos até o prazo atual, ou None se não houver prazo."""
+    limit = _DEADLINE.get()
+    return None if limit is None else limit - time.monotonic()
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """Erros de rede, timeouts, 408/429/5xx e falhas sem status são transitórios.
+
+    `ValueError` (credencial ausente, resposta em formato inválido) e os demais
+    4xx se repetiriam igual em uma nova tentativa, e um circuito aberto deve
+    cair logo no fallback. No replay, a falta de uma resposta gravada também
+    não muda com o tempo.
+    """
+    if isinstance(exc, (DeadlineExceeded, CircuitOpenError, CacheMissError)):
+        return False
+    if isinstance(exc, (requests.Timeout, requests.ConnectionError)):
+        return True
+    if isinstance(exc, requests.RequestException):
+        response = exc.response
+        return response is None or response.status_code in _RETRYABLE_STATUS
+    return False
+
+
+def retry_after(exc: BaseException) -> Optional[float]:
+    """Espera sugerida pelo servidor: header Retry-After ou RetryInfo do Google."""
+    response = getattr(exc, "response", None)
+    if response is None:
+        return None
+
+    header = response.headers.get("Retry-After")
+    if header:
+        if header.strip().isdigit():
+            return float(header)
+        try:
+            when = email.utils.parsedate_to_datetime(header)
+        except (TypeError, ValueError):
+            when = None
+        if when is not None:
+            return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+    # 429 da API Gemini: {"error": {"details": [{"retryDelay": "31s", ...}]}}
+    try:
+        details = response.json().get("error", {}).get("details", [])
+    except (ValueError, AttributeError):
+        return None
+    for detail in details:
+        match = _RETRY_DELAY_RE.match(str(detail.get("retryDelay", "")))
+        if match:
+            return float(match.group(1))
+    return None
+
+
+@dataclass
+class RetryStats:
+    """Contadores de uma função decorada, somados ao longo da execução."""
+
+    calls: int = 0
+    attempts: int = 0
+    failures: int = 0
+    slept: float = 0.0
+
+
+_METRICS: Dict[str, RetryStats] = {}
+_METRICS_LOCK = threading.Lock()
+
+
+def retry_metrics() -> Dict[str, RetryStats]:
+    """Cópia das métricas de retry por função (`__qualname__`)."""
+    with _METRICS_LOCK:
+        return {name: RetryStats(**vars(s)) for name, s in _METRICS.items()}
 
-def retry(max_attempts=MAX_RETRIES, delay=RETRY_DELAY):
-    """Decorator para implementar retry com exponential backoff."""
 
-    def decorator(func):
+def log_retry_metrics() -> None:
+    for name, stats in retry_metrics().items():
+        logger.info(
+            "Retry %s: %d chamadas, %d tentativas, %d falhas, %.1fs de espera",
+            name,
+            stats.calls,
+            stats.attempts,
+            stats.failures,
+            stats.slept,
+        )
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """Política de retry com jitter decorrelacionado e respeito ao Retry-After.
+
+    A espera após cada falha é sorteada entre `base_delay` e 3x a espera
+    anterior (limitada a `max_delay`); se o servidor sugerir mais tempo, vale a
+    sugestão. Só exceções aceitas por `retry_on` são repetidas, e nenhuma espera
+    começa se for estourar o prazo de `deadline()`.
+    """
+
+    max_attempts: int = MAX_RETRIES
+    base_delay: float = RETRY_DELAY
+    max_delay: float = MAX_RETRY_DELAY
+    retry_on: Callable[[BaseException], bool] = field(default=is_retryable)
+
+    def __call__(self, func: Callable) -> Callable:
+        name = func.__qualname__
+
+        if inspect.iscoroutinefunction(func):
+
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                attempts = _Attempts(self, name)
+                while True:
+                    attempts.start()
+                    try:
+                        return await func(*args, **kwargs)
+                    except Exception as e:
+                        wait_time = attempts.failed(e)
+                    await asyncio.sleep(wait_time)
+
+            return async_wrapper
+
         @wraps(func)
         def wrapper(*args, **kwargs):
-            last_exception = None
-
-            for attempt in range(1, max_attempts + 1):
+            attempts = _Attempts(self, name)
+            while True:
+                attempts.start()
                 try:
                     return func(*args, **kwargs)
                 except Exception as e:
-                    last_exception = e
-                    if attempt < max_attempts:
-                        wait_time = delay * (2 ** (attempt - 1))
-                        logger.warning(
-                            "Tentativa %d/%d de %s falhou: %s. " "Aguardando %ds...",
-                            attempt,
-                            max_attempts,
-                            func.__qualname__,
-                            e,
-                            wait_time,
-                        )
-                        time.sleep(wait_time)
+                    wait_time = attempts.failed(e)
+                time.sleep(wait_time)
+
+        return wrapper
 
+    def next_delay(self, previous: float, exc: BaseException) -> float:
+        wait_time = min(self.max_delay, random.uniform(self.base_delay, previous * 3))
+        hint = retry_after(exc)
+        if hint is not None:
+            wait_time = max(wait_time, min(hint, self.max_delay))
+        return wait_time
+
+
+class _Attempts:
+    """Estado de uma chamada decorada, comum às versões sync e async."""
+
+    def __init__(self, policy: RetryPolicy, name: str):
+        self._policy = policy
+        self._name = name
+        self._stats = _stats_for(name)
+        self._attempt = 0
+        self._previous = policy.base_delay
+        with _METRICS_LOCK:
+            self._stats.calls += 1
+
+    def start(self) -> None:
+        self._attempt += 1
+        with _METRICS_LOCK:
+            self._stats.attempts += 1
+
+    def failed(self, exc: Exception) -> float:
+        """Quanto esperar antes da próxima tentativa; relança se não houver uma."""
+        policy, name = self._policy, self._name
+        with _METRICS_LOCK:
+            self._stats.failures += 1
+
+        if not policy.retry_on(exc):
+            logger.error("%s falhou com erro não recuperável: %s", name, exc)
+            raise exc
+        if self._attempt >= policy.max_attempts:
+            logger.error("Todas as %d tentativas de %s falharam.", self._attempt, name)
+            raise exc
+
+        wait_time = policy.next_delay(self._previous, exc)
+        left = remaining()
+        if left is not None and wait_time >= left:
             logger.error(
-                "Todas as %d tentativas de %s falharam.",
-                max_attempts,
-                func.__qualname__,
+                "Prazo total esgotado em %s (%.0fs restantes, espera de %.0fs)",
+                name,
+                max(left, 0),
+                wait_time,
             )
-            raise last_exception  # type: ignore[misc]
+            raise DeadlineExceeded(
+                f"Prazo esgotado após {self._attempt} tentativas de {name}"
+            ) from exc
+
+        logger.warning(
+            "Tentativa %d/%d de %s falhou: %s. Aguardando %.1fs...",
+            self._attempt,
+            policy.max_attempts,
+            name,
+            exc,
+            wait_time,
+        )
+        with _METRICS_LOCK:
+            self._stats.slept += wait_time
+        self._previous = wait_time
+        return wait_time
 
-        return wrapper
 
-    return decorator
+def _stats_for(name: str) -> RetryStats:
+    with _METRICS_LOCK:
+        return _METRICS.setdefault(name, RetryStats())
+
+
+def retry(max_attempts=MAX_RETRIES, delay=RETRY_DELAY):
+    """Decorator de retry; atalho para `RetryPolicy(max_attempts, delay)`."""
+    return RetryPolicy(max_attempts=max_attempts, base_delay=delay)
@@ -0,0 +1,153 @@
+import json
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from generate_post.config.constants import STATE_DIR
+
+logger = logging.getLogger(__name__)
+
+RESOLVED_URLS_PATH = STATE_DIR / "resolved_urls.json"
+
+# Requisições simultâneas e prazo de cada uma (conexão, leitura)
+MAX_WORKERS = 8
+TIMEOUT = (3, 5)
+# Prazo da rodada inteira; o que não terminar fica com a URL original
+BUDGET = 20  # segundos
+# Resoluções mais velhas que isso são descartadas do arquivo
+MAX_AGE = 180 * 24 * 3600  # segundos
+
+_TRACKING_PARAMS = ("utm_", "fbclid", "gclid")
+_USER_AGENT = "Mozilla/5.0 (compatible; generate-post/2.0)"
+
+_FILE_LOCK = threading.Lock()
+
+
+def canonical_url(url: str) -> str:
+    """URL sem fragmento, sem parâmetros de rastreamento e com host minúsculo.
+
+    O caminho fica como veio (`/a/` e `/a` podem ser recursos diferentes); só o
+    caminho vazio vira `/`.
+    """
+    parts = urlsplit(url.strip())
+    query = [
+        (key, value)
+        for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith(_TRACKING_PARAMS)
+    ]
+    path = parts.path or "/"
+    return urlunsplit(
+        (parts.scheme.lower(), parts.netloc.lower(), path, urlencode(query), "")
+    )
+
+
+class UrlResolver:
+    """Segue redirecionamentos (ex.: `vertexaisearch` do grounding) até a URL final.
+
+    As URLs são resolvidas em paralelo, num pool limitado a `max_workers`,
+    com HEAD primeiro e GET (sem baixar o corpo) quando o servidor recusa o
+    HEAD; a rodada toda tem `BUDGET` segundos. Os resultados ficam em
+    `STATE_DIR/resolved_urls.json` e valem entre execuções. Uma URL que não
+    resolve (timeout, erro, loop) fica como está e é tentada de novo na
+    próxima vez. Com `offline`, só o arquivo é usado.
+    """
+
+    def __init__(
+        self,
+        path: Path = RESOLVED_URLS_PATH,
+        max_workers: int = MAX_WORKERS,
+        offline: bool = False,
+    ):
+        self._path = path
+        self._max_workers = max_workers
+        self._offline = offline
+        self._session = requests.Session()
+        self._session.headers["User-Agent"] = _USER_AGENT
+        adapter = HTTPAdapter(pool_maxsize=max_workers)
+        self._session.mount("https://", adapter)
+        self._session.mount("http://", adapter)
+
+    def resolve_all(self, urls: Iterable[str]) -> Dict[str, str]:
+        """Mapa URL original -> URL final canônica, para todas as `urls`."""
+        urls = list(dict.fromkeys(u for u in urls if u))
+        cache = self._load()
+        resolved = {u: cache[u]["url"] for u in urls if u in cache}
+        pending = [u for u in urls if u not in resolved]
+
+        if pending and not self._offline:
+            started = time.perf_counter()
+            executor = ThreadPoolExecutor(
+                max_workers=min(self._max_workers, len(pending)),
+                thread_name_prefix="url-resolver",
+            )
+            futures = {executor.submit(self._resolve, u): u for u in pending}
+            done, _ = wait(futures, timeout=BUDGET)
+            executor.shutdown(wait=False, cancel_futures=True)
+            found = {
+                futures[future]: future.result() for future in done if future.result()
+            }
+            logger.info(
+                "URLs: %d em cache, %d resolvidas, %d sem resposta em %.1fs",
+                len(resolved),
+                len(found),
+                len(pending) - len(found),
+                time.perf_counter() - started,
+            )
+            resolved.update(found)
+            self._save(found)
+
+        return {u: resolved.get(u, canonical_url(u)) for u in urls}
+
+    def _resolve(self, url: str) -> Optional[str]:
+        try:
+            response = self._session.head(url, allow_redirects=True, timeout=TIMEOUT)
+            if response.status_code >= 400:
+                # Servidores que não aceitam HEAD (403/405): GET sem ler o corpo
+                response = self._session.get(
+                    url, allow_redirects=True, timeout=TIMEOUT, stream=True
+                )
+                response.close()
+        except requests.RequestException as e:
+            logger.debug("Falha ao resolver %s: %s", url, e)
+            return None
+        if response.status_code >= 400:
+            logger.debug("URL %s terminou em %d", response.url, response.status_code)
+            return None
+        return canonical_url(response.url)
+
+    def _load(self) -> Dict[str, Dict]:
+        """Resoluções do arquivo com menos de `MAX_AGE`; as vencidas são ignoradas."""
+        try:
+            data = json.loads(self._path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError):
+            logger.warning("URLs resolvidas ilegíveis em %s; ignorando", self._path)
+            return {}
+        now = time.time()
+        return {
+            url: entry
+            for url, entry in data.items()
+            if now - entry.get("at", 0) < MAX_AGE
+        }
+
+    def _save(self, found: Dict[str, str]) -> None:
+        if not found:
+            return
+        now = time.time()
+        with _FILE_LOCK:
+            data = self._load()
+            data.update(
+                {url: {"url": final, "at": round(now)} for url, final in found.items()}
+            )
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self._path.with_suffix(".tmp")
+            tmp.write_text(json.dumps(data, indent=1), encoding="utf-8")
+            tmp.replace(self._path)
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""Benchmark the TTS engines on a fixed set of posts.
+
+Each engine runs in its own subprocess so peak RSS is not polluted by the other
+engine's imports. Reports model load time, real-time factor (synthesis seconds
+per second of audio) and peak RSS:
+
+    python tools/narrate/bench_engines.py --posts 3
+    python tools/narrate/bench_engines.py --engine torch \\
+        --engine onnx:$HOME/.cache/kokoro-onnx/kokoro-v1.0.int8.onnx
+
+Posts are narrated without the segment cache and without encoding, so only
+synthesis is measured.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from engines import DEFAULT_ONNX_MODEL, DEFAULT_ONNX_VOICES, EngineSpec, create_engine
+from narrate import (DEFAULT_LANG, DEFAULT_SPEED, DEFAULT_VOICE, SAMPLE_RATE,
+                     discover_posts, parse_post, strip_for_narration)
+
+
+def parse_engine(value: str, voices: Path) -> EngineSpec:
+    """`torch`, `onnx` or `onnx:<model path>`."""
+    name, _, model = value.partition(":")
+    return EngineSpec(name, Path(model) if model else DEFAULT_ONNX_MODEL, voices)
+
+
+def run_child(spec: EngineSpec, posts: list[Path], voice: str, lang: str,
+              speed: float) -> dict:
+    texts = [strip_for_narration(parse_post(p).body) for p in posts]
+    started = time.perf_counter()
+    engine = create_engine(spec, lang)
+    load = time.perf_counter() - started
+
+    samples = 0
+    started = time.perf_counter()
+    for text in texts:
+        for chunk in engine.synthesize(text, voice=voice, speed=speed):
+            samples += len(chunk)
+    synth = time.perf_counter() - started
+    audio = samples / SAMPLE_RATE
+    # ru_maxrss is in KiB on Linux.
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return {"engine": spec.cache_tag, "load_s": load, "audio_s": audio,
+            "synth_s": synth, "rtf": synth / audio if audio else 0.0,
+            "peak_rss_mb": peak_mb}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--engine", action="append", dest="engines",
+                        help="Engine to benchmark (repeatable; default: torch and onnx)")
+    parser.add_argument("--onnx-voices", default=DEFAULT_ONNX_VOICES, type=Path)
+    parser.add_argument("--posts-dir", default=Path("_posts"), type=Path)
+    parser.add_argument("--posts", default=3, type=int,
+                        help="Narrate the N oldest posts (a fixed, reproducible set)")
+    parser.add_argument("--voice", default=DEFAULT_VOICE)
+    parser.add_argument("--lang", default=DEFAULT_LANG)
+    parser.add_argument("--speed", default=DEFAULT_SPEED, type=float)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    posts = discover_posts(args.posts_dir)[: args.posts]
+    if not posts:
+        print(f"No posts found in {args.posts_dir}", file=sys.stderr)
+        return 1
+    engines = args.engines or ["torch", "onnx"]
+
+    if args.child:
+        spec = parse_engine(engines[0], args.onnx_voices)
+        print(json.dumps(run_child(spec, posts, args.voice, args.lang, args.speed)))
+        return 0
+
+    rows = []
+    for value in engines:
+        cmd = [sys.executable, __file__, "--child", "--engine", value,
+               "--onnx-voices", str(args.onnx_voices),
+               "--posts-dir", str(args.posts_dir), "--posts", str(args.posts),
+               "--voice", args.voice, "--lang", args.lang, "--speed", str(args.speed)]
+        proc = subprocess.run(cmd, capture_output=True, text=True)
+        if proc.returncode != 0:
+            print(f"{value}: failed\n{proc.stderr.strip()}", file=sys.stderr)
+            continue
+        rows.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+
+    print(f"{len(posts)} posts, voice={args.voice} lang={args.lang}")
+    print(f"  {'engine':<28} {'load':>7} {'audio':>8} {'synth':>8} {'rtf':>6} {'peak RSS':>9}")
+    for row in rows:
+        print(f"  {row['engine']:<28} {row['load_s']:6.1f}s {row['audio_s']:7.1f}s "
+              f"{row['synth_s']:7.1f}s {row['rtf']:6.3f} {row['peak_rss_mb']:7.0f}MB")
+    return 0 if rows else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""Benchmark the single-pass speech tokenizer against the old regex chain.
+
+Runs both over every post body in `_posts/` and reports per-corpus timings:
+
+    python tools/narrate/bench_tokenizer.py --repeat 20
+"""
+from __future__ import annotations
+
+import argparse
+import re
+import sys
+import time
+from pathlib import Path
+
+from speech_tokenizer import tokenize
+
+FRONTMATTER_RE = re.compile(r"^---\n(.*?)\n---\n", re.DOTALL)
+
+# The 13-pass chain strip_for_narration used before speech_tokenizer.
+_LEGACY_PASSES = [
+    (re.compile(r"```.*?```", re.DOTALL), " "),
+    (re.compile(r"!\[[^\]]*\]\([^)]*\)"), " "),
+    (re.compile(r"\[([^\]]+)\]\([^)]*\)"), r"\1"),
+    (re.compile(r"`[^`]*`"), " "),
+    (re.compile(r"\{:[^}]*\}"), ""),
+    (re.compile(r"<[^>]+>"), " "),
+    (re.compile(r"^#{1,6}\s+", re.MULTILINE), ""),
+    (re.compile(r"(\*{1,3}|_{1,3})(.+?)\1"), r"\2"),
+    (re.compile(r"^\s*>\s?", re.MULTILINE), ""),
+    (re.compile(r"^\s*[-*+]\s+", re.MULTILINE), ""),
+    (re.compile(r"^\s*\d+\.\s+", re.MULTILINE), ""),
+    (re.compile(r"[ \t]+"), " "),
+    (re.compile(r"\n{3,}"), "\n\n"),
+]
+
+
+def legacy_strip(markdown: str) -> str:
+    text = markdown
+    for pattern, repl in _LEGACY_PASSES:
+        text = pattern.sub(repl, text)
+    return text.strip()
+
+
+def load_bodies(posts_dir: Path) -> list[str]:
+    bodies = []
+    for path in sorted(posts_dir.glob("*.md")):
+        text = path.read_text(encoding="utf-8")
+        match = FRONTMATTER_RE.match(text)
+        bodies.append(text[match.end():] if match else text)
+    return bodies
+
+
+def best_of(func, bodies: list[str], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for body in bodies:
+            func(body)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--posts-dir", default=Path("_posts"), type=Path)
+    parser.add_argument("--repeat", default=10, type=int)
+    args = parser.parse_args()
+
+    bodies = load_bodies(args.posts_dir)
+    if not bodies:
+        print(f"No posts found in {args.posts_dir}", file=sys.stderr)
+        return 1
+    size_kb = sum(len(b.encode("utf-8")) for b in bodies) / 1024
+
+    legacy = best_of(legacy_strip, bodies, args.repeat)
+    single = best_of(lambda body: tokenize(body).text, bodies, args.repeat)
+
+    print(f"{len(bodies)} posts, {size_kb:.0f} KB of markdown, best of {args.repeat}")
+    print(f"  regex chain (13 passes): {legacy * 1000:8.2f} ms "
+          f"({legacy / len(bodies) * 1e6:7.1f} us/post)")
+    print(f"  single-pass tokenizer:   {single * 1000:8.2f} ms "
+          f"({single / len(bodies) * 1e6:7.1f} us/post)")
+    print(f"  speedup: {legacy / single:.2f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,86 @@
+"""Chapter markers at the post's markdown headings.
+
+Offsets are taken from the running sample count of the processed audio when
+each heading's segment starts, so they stay exact after silence trimming. Once
+the audio is encoded the chapters are embedded with a stream-copy remux (ID3v2
+CHAP frames in the MP3, vorbis-comment chapters in the Opus file) and written
+to a small JSON file the player uses to seek:
+
+    [{"start": 0.0, "title": "Introdução"}, {"start": 41.27, "title": "..."}]
+"""
+from __future__ import annotations
+
+import json
+import re
+import subprocess
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+
+# Headings closer than this to the previous chapter are merged into it.
+MIN_CHAPTER_SECONDS = 1.0
+
+_FFMETA_ESCAPE_RE = re.compile(r"([=;#\\\n])")
+
+
+@dataclass
+class Chapter:
+    start: int  # sample offset into the processed audio
+    title: str
+
+
+def add_chapter(chapters: list[Chapter], start: int, title: str,
+                sample_rate: int) -> None:
+    if chapters and start - chapters[-1].start < MIN_CHAPTER_SECONDS * sample_rate:
+        # Back-to-back headings ("## Parte 1" then "### Setup") become one
+        # chapter named after the outer heading.
+        return
+    chapters.append(Chapter(start, title))
+
+
+def ffmetadata(chapters: list[Chapter], total_samples: int, sample_rate: int) -> str:
+    """Render chapters as an FFMETADATA1 document (millisecond timebase)."""
+    lines = [";FFMETADATA1"]
+    for i, chapter in enumerate(chapters):
+        end = chapters[i + 1].start if i + 1 < len(chapters) else total_samples
+        lines += [
+            "[CHAPTER]",
+            "TIMEBASE=1/1000",
+            f"START={chapter.start * 1000 // sample_rate}",
+            f"END={end * 1000 // sample_rate}",
+            "title=" + _FFMETA_ESCAPE_RE.sub(r"\\\1", chapter.title),
+        ]
+    return "\n".join(lines) + "\n"
+
+
+def embed_chapters(path: Path, chapters: list[Chapter], total_samples: int,
+                   sample_rate: int) -> None:
+    """Remux `path` in place (no re-encode) with `chapters` attached."""
+    part_path = path.with_name(path.name + ".part")
+    with tempfile.NamedTemporaryFile("w", suffix=".txt", encoding="utf-8",
+                                     delete=False) as meta:
+        meta.write(ffmetadata(chapters, total_samples, sample_rate))
+        meta_path = Path(meta.name)
+    cmd = [
+        "ffmpeg", "-y", "-loglevel", "error", "-i", str(path), "-i", str(meta_path),
+        "-map", "0", "-map_metadata", "0", "-map_chapters", "1", "-c", "copy",
+    ]
+    if path.suffix == ".mp3":
+        cmd += ["-id3v2_version", "3", "-f", "mp3"]
+    else:
+        cmd += ["-f", "ogg"]
+    cmd.append(str(part_path))
+    try:
+        subprocess.run(cmd, check=True, capture_output=True)
+        part_path.replace(path)
+    finally:
+        meta_path.unlink(missing_ok=True)
+        part_path.unlink(missing_ok=True)
+
+
+def write_json(path: Path, chapters: list[Chapter], sample_rate: int) -> None:
+    data = [{"start": round(c.start / sample_rate, 2), "title": c.title}
+            for c in chapters]
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(data, ensure_ascii=False, separators=(",", ":")),
+                    encoding="utf-8")
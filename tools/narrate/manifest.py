@@ -0,0 +1,190 @@
+"""Incremental narration manifest (`assets/audio/manifest.json`).
+
+Records, per post, the stat signature, git blob id and hash of the file, a
+hash of the markdown body, its narratable word count, the audio URL and the
+body hash the audio was rendered from. Discovery then only lists the git index
+and stats `_posts/`: a post is read again only when its blob id is unknown or
+changed and its size or mtime changed too, and fully re-parsed only when its
+bytes changed. The blob id is what keeps a fresh CI checkout (where every
+mtime is new) down to a single `git ls-files`. Posts whose body no longer
+matches the hash their audio was rendered from are reported as stale.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import re
+import subprocess
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable
+
+LOGGER = logging.getLogger("narrate")
+
+DEFAULT_MANIFEST_PATH = Path("assets/audio/manifest.json")
+MANIFEST_VERSION = 1
+
+AUDIO_KEY_RE = re.compile(r"^audio:[ \t]*(\S.*?)[ \t]*$", re.MULTILINE)
+
+
+@dataclass
+class Candidate:
+    path: Path
+    action: str  # "narrate", "stale" or "skip"
+    reason: str
+
+
+def _sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _git_blob_id(data: bytes) -> str:
+    return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+
+
+def git_blob_ids(directory: Path) -> dict[str, str]:
+    """Blob ids of the files directly in `directory` whose working copy matches
+    the index. Empty outside a git checkout or if git is unavailable."""
+    try:
+        listed = subprocess.run(["git", "ls-files", "-s", "-z", "--", "."],
+                                cwd=directory, capture_output=True, check=True)
+        modified = subprocess.run(["git", "diff", "--name-only", "--relative",
+                                   "-z", "--", "."],
+                                  cwd=directory, capture_output=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return {}
+    dirty = set(modified.stdout.decode("utf-8").split("\0"))
+    blobs = {}
+    for record in listed.stdout.decode("utf-8").split("\0"):
+        meta, _, name = record.partition("\t")
+        if name and "/" not in name and name not in dirty:
+            blobs[name] = meta.split()[1]
+    return blobs
+
+
+class Manifest:
+    def __init__(self, path: Path, entries: dict[str, dict] | None = None):
+        self.path = path
+        self.entries = entries or {}
+        self._dirty = False
+
+    @classmethod
+    def load(cls, path: Path) -> "Manifest":
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return cls(path)
+        except ValueError:
+            LOGGER.warning("Ignoring unreadable manifest %s", path)
+            return cls(path)
+        if data.get("version") != MANIFEST_VERSION:
+            return cls(path)
+        return cls(path, data.get("posts", {}))
+
+    def save(self) -> None:
+        if not self._dirty:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        payload = {"version": MANIFEST_VERSION,
+                   "posts": dict(sorted(self.entries.items()))}
+        fd, tmp_name = tempfile.mkstemp(dir=self.path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as fh:
+                json.dump(payload, fh, ensure_ascii=False, indent=2)
+                fh.write("\n")
+            os.replace(tmp_name, self.path)
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+        self._dirty = False
+
+    def refresh(self, post: Path, split: Callable[[str], tuple[str, str]],
+                count_words: Callable[[str], int], blob: str | None = None) -> dict:
+        """Return the up-to-date entry for `post`, re-reading it only if needed.
+
+        `split` maps the file text to (raw frontmatter, body) and `count_words`
+        maps the body to its narratable word count. `blob` is the git blob id
+        of the unmodified working copy, if known (see `git_blob_ids`).
+        """
+        entry = self.entries.get(post.name)
+        if entry and blob and entry.get("blob") == blob:
+            return entry
+        st = post.stat()
+        if entry and entry["mtime_ns"] == st.st_mtime_ns and entry["size"] == st.st_size:
+            return entry
+
+        raw = post.read_bytes()
+        file_sha = _sha256(raw)
+        blob = blob or _git_blob_id(raw)
+        if entry and entry["file_sha"] == file_sha:
+            # Same bytes under a new mtime (fresh checkout). Keep the stored
+            # stat so the committed manifest doesn't churn; only record the
+            # blob id, which is stable across checkouts.
+            if entry.get("blob") != blob:
+                entry["blob"] = blob
+                self._dirty = True
+            return entry
+
+        raw_fm, body = split(raw.decode("utf-8"))
+        audio_match = AUDIO_KEY_RE.search(raw_fm)
+        body_sha = _sha256(body.encode("utf-8"))
+        if entry and entry["body_sha"] == body_sha:
+            words = entry["words"]
+        else:
+            words = count_words(body)
+        audio = audio_match.group(1).strip("\"'") if audio_match else None
+        audio_body_sha = entry.get("audio_body_sha") if entry else None
+        if audio and audio_body_sha is None:
+            # First sighting of a narrated post: trust the existing audio.
+            audio_body_sha = body_sha
+        entry = {
+            "mtime_ns": st.st_mtime_ns,
+            "size": st.st_size,
+            "file_sha": file_sha,
+            "blob": blob,
+            "body_sha": body_sha,
+            "words": words,
+            "audio": audio,
+            "audio_body_sha": audio_body_sha if audio else None,
+        }
+        self.entries[post.name] = entry
+        self._dirty = True
+        return entry
+
+    def record_narration(self, post: Path, split: Callable[[str], tuple[str, str]],
+                         count_words: Callable[[str], int]) -> None:
+        """Mark the current body of `post` as the one its audio was rendered from."""
+        entry = self.refresh(post, split, count_words)
+        if entry["audio_body_sha"] != entry["body_sha"]:
+            entry["audio_body_sha"] = entry["body_sha"]
+            self._dirty = True
+
+    def prune(self, keep: set[str]) -> None:
+        for name in set(self.entries) - keep:
+            del self.entries[name]
+            self._dirty = True
+
+    def scan(self, posts: list[Path], min_words: int, force: bool,
+             split: Callable[[str], tuple[str, str]],
+             count_words: Callable[[str], int]) -> list[Candidate]:
+        candidates = []
+        blobs = git_blob_ids(posts[0].parent) if posts else {}
+        for post in posts:
+            entry = self.refresh(post, split, count_words, blobs.get(post.name))
+            words = entry["words"]
+            stale = entry["audio"] and entry["audio_body_sha"] != entry["body_sha"]
+            if entry["audio"] and not stale and not force:
+                candidates.append(Candidate(post, "skip", "already has audio"))
+            elif words < min_words:
+                candidates.append(Candidate(post, "skip",
+                                            f"only {words} words (< {min_words})"))
+            elif stale:
+                candidates.append(Candidate(post, "stale",
+                                            "body changed since audio was rendered"))
+            else:
+                candidates.append(Candidate(post, "narrate", f"{words} words"))
+        self.prune({p.name for p in posts})
+        return candidates
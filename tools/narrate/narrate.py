@@ -9,19 +9,35 @@ from __future__ import annotations
 
 import argparse
 import logging
+import multiprocessing
 import os
 import re
 import subprocess
 import sys
 import tempfile
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Iterable
+from typing import Any, Callable, Iterable, Iterator
 
 import numpy as np
 import soundfile as sf
 import yaml
 
+import chapters as chaptering
+from chapters import Chapter
+from engines import (DEFAULT_ENGINE, DEFAULT_ONNX_MODEL, DEFAULT_ONNX_VOICES,
+                     ENGINES, EngineSpec, create_engine)
+from manifest import DEFAULT_MANIFEST_PATH, Candidate, Manifest
+from peaks import PeaksBuilder
+from postprocess import (DEFAULT_MAX_PAUSE, DEFAULT_SILENCE_DB, DEFAULT_TARGET_DB,
+                         PostProcessor)
+from segment_cache import (DEFAULT_CACHE_DIR, DEFAULT_CACHE_MAX_MB, SegmentCache,
+                           segment_key)
+from speech_tokenizer import tokenize
+
 LOGGER = logging.getLogger("narrate")
 
 SAMPLE_RATE = 24_000
@@ -32,22 +48,11 @@ DEFAULT_MIN_WORDS = 200
 DEFAULT_AUDIO_DIR = Path("assets/audio/posts")
 DEFAULT_AUDIO_URL_PREFIX = "/assets/audio/posts"
 DEFAULT_BITRATE = "64k"
+DEFAULT_OPUS_BITRATE = "24k"
 
 
 FRONTMATTER_RE = re.compile(r"^---\n(.*?)\n---\n", re.DOTALL)
-FENCED_CODE_RE = re.compile(r"```.*?```", re.DOTALL)
-INLINE_CODE_RE = re.compile(r"`[^`]*`")
-IMAGE_RE = re.compile(r"!\[[^\]]*\]\([^)]*\)")
-LINK_RE = re.compile(r"\[([^\]]+)\]\([^)]*\)")
-IAL_RE = re.compile(r"\{:[^}]*\}")
-HTML_TAG_RE = re.compile(r"<[^>]+>")
-HEADER_MARK_RE = re.compile(r"^#{1,6}\s+", re.MULTILINE)
-BOLD_ITALIC_RE = re.compile(r"(\*{1,3}|_{1,3})(.+?)\1")
-BLOCKQUOTE_RE = re.compile(r"^\s*>\s?", re.MULTILINE)
-LIST_BULLET_RE = re.compile(r"^\s*[-*+]\s+", re.MULTILINE)
-LIST_NUM_RE = re.compile(r"^\s*\d+\.\s+", re.MULTILINE)
-WHITESPACE_RE = re.compile(r"[ \t]+")
-BLANK_LINES_RE = re.compile(r"\n{3,}")
+PARAGRAPH_SPLIT_RE = re.compile(r"\n\s*\n")
 
 
 @dataclass
@@ -57,105 +62,303 @@ class PostParts:
     raw_frontmatter: str
 
 
-def parse_post(path: Path) -> PostParts:
-    text = path.read_text(encoding="utf-8")
+@dataclass
+class NarrationResult:
+    post: Path
+    mp3_path: Path
+    audio_url: str
+    words: int
+    audio_seconds: float
+    synth_seconds: float
+    finalize_seconds: float = 0.0
+    trimmed_seconds: float = 0.0
+
+    @property
+    def rtf(self) -> float:
+        """Real-time factor: seconds of compute per second of audio (lower is better)."""
+        return self.synth_seconds / self.audio_seconds if self.audio_seconds else 0.0
+
+
+@dataclass
+class RenderedPost:
+    """A synthesized post waiting for `finalize_post` (encode + frontmatter)."""
+    post: Path
+    mp3_path: Path
+    audio_url: str
+    words: int
+    bitrate: str
+    metadata: dict
+    opus_path: Path | None = None
+    opus_url: str | None = None
+    opus_bitrate: str = DEFAULT_OPUS_BITRATE
+    chapters: list[Chapter] | None = None
+    chapters_path: Path | None = None
+    chapters_url: str | None = None
+    peaks_path: Path | None = None
+    peaks_url: str | None = None
+    peaks: PeaksBuilder | None = None
+    samples: int = 0
+    trimmed_samples: int = 0
+    synth_seconds: float = 0.0
+    waveform: np.ndarray | None = None  # buffered mode
+    encoder: StreamEncoder | None = None  # streaming mode
+
+
+# Loaded engines keyed by (spec, lang code). Populated in the parent before the
+# worker pool forks so every worker shares the weights copy-on-write.
+_ENGINES: dict[tuple[EngineSpec, str], Any] = {}
+
+
+def split_post(text: str) -> tuple[str, str]:
+    """Split a post into (raw frontmatter, body) without parsing the YAML."""
     match = FRONTMATTER_RE.match(text)
     if not match:
-        raise ValueError(f"No YAML frontmatter found in {path}")
-    raw_fm = match.group(1)
+        raise ValueError("No YAML frontmatter found")
+    return match.group(1), text[match.end():]
+
+
+def parse_post(path: Path) -> PostParts:
+    try:
+        raw_fm, body = split_post(path.read_text(encoding="utf-8"))
+    except ValueError:
+        raise ValueError(f"No YAML frontmatter found in {path}") from None
     fm = yaml.safe_load(raw_fm) or {}
-    body = text[match.end():]
     return PostParts(frontmatter=fm, body=body, raw_frontmatter=raw_fm)
 
 
 def strip_for_narration(markdown: str) -> str:
-    """Convert markdown into a clean, narratable plain-text stream."""
-    text = markdown
-    text = FENCED_CODE_RE.sub(" ", text)
-    text = IMAGE_RE.sub(" ", text)
-    text = LINK_RE.sub(r"\1", text)
-    text = INLINE_CODE_RE.sub(" ", text)
-    text = IAL_RE.sub("", text)
-    text = HTML_TAG_RE.sub(" ", text)
-    text = HEADER_MARK_RE.sub("", text)
-    text = BOLD_ITALIC_RE.sub(r"\2", text)
-    text = BLOCKQUOTE_RE.sub("", text)
-    text = LIST_BULLET_RE.sub("", text)
-    text = LIST_NUM_RE.sub("", text)
-    text = WHITESPACE_RE.sub(" ", text)
-    text = BLANK_LINES_RE.sub("\n\n", text)
-    return text.strip()
+    """Convert markdown into a clean, narratable plain-text stream.
+
+    Paragraphs and headings are separated by blank lines and every sentence
+    sits on its own line, which is where Kokoro splits its input.
+    """
+    return tokenize(markdown).text
+
+
+def split_segments(text: str) -> list[str]:
+    """Split narration text into paragraph segments (the unit of caching)."""
+    return [seg.strip() for seg in PARAGRAPH_SPLIT_RE.split(text) if seg.strip()]
 
 
 def word_count(text: str) -> int:
     return len(re.findall(r"\b\w+\b", text))
 
 
+def narration_words(body: str) -> int:
+    return word_count(strip_for_narration(body))
+
+
 def slug_for_post(path: Path) -> str:
     name = path.stem
     name = re.sub(r"^\d{4}-\d{2}-\d{2}-", "", name)
     return name
 
 
-def synthesize(text: str, voice: str, lang: str, speed: float) -> np.ndarray:
-    """Run Kokoro and return a single concatenated waveform."""
-    from kokoro import KPipeline  # imported lazily — heavy dep
-
-    pipeline = KPipeline(lang_code=lang)
-    chunks: list[np.ndarray] = []
-    for _, _, audio in pipeline(text, voice=voice, speed=speed):
-        if audio is None:
+def load_engine(engine: EngineSpec, lang: str) -> Any:
+    """Return the TTS engine for `lang`, loading it on first use."""
+    loaded = _ENGINES.get((engine, lang))
+    if loaded is None:
+        loaded = _ENGINES[(engine, lang)] = create_engine(engine, lang)
+    return loaded
+
+
+def _run_tts(text: str, voice: str, lang: str, speed: float,
+             engine: EngineSpec) -> Iterator[np.ndarray]:
+    yield from load_engine(engine, lang).synthesize(text, voice=voice, speed=speed)
+
+
+def iter_chunks(text: str, voice: str, lang: str, speed: float,
+                cache: SegmentCache | None = None,
+                engine: EngineSpec = EngineSpec(),
+                on_segment: Callable[[int], None] | None = None) -> Iterator[np.ndarray]:
+    """Run Kokoro and yield each float32 chunk as soon as it is produced.
+
+    The text is narrated paragraph by paragraph. With a `cache`, cached
+    segments are replayed from disk and only the misses go through Kokoro.
+    `on_segment(i)` is called right before the audio of segment `i` is
+    requested, i.e. once everything before it has been consumed.
+    """
+    produced = False
+    for index, segment in enumerate(split_segments(text)):
+        if on_segment is not None:
+            on_segment(index)
+        if cache is None:
+            for audio in _run_tts(segment, voice, lang, speed, engine):
+                produced = True
+                yield audio
+            continue
+        key = segment_key(segment, voice, lang, speed, engine.cache_tag)
+        cached = cache.get(key)
+        if cached is not None:
+            if len(cached):
+                produced = True
+                yield cached
             continue
-        if hasattr(audio, "detach"):
-            audio = audio.detach().cpu().numpy()
-        chunks.append(np.asarray(audio, dtype=np.float32))
-    if not chunks:
+        rendered: list[np.ndarray] = []
+        for audio in _run_tts(segment, voice, lang, speed, engine):
+            rendered.append(audio)
+            produced = True
+            yield audio
+        cache.put(key, np.concatenate(rendered) if rendered
+                  else np.zeros(0, dtype=np.float32))
+    if not produced:
         raise RuntimeError("Kokoro produced no audio chunks")
-    return np.concatenate(chunks)
-
-
-def encode_mp3(wav_path: Path, mp3_path: Path, bitrate: str, metadata: dict) -> None:
-    mp3_path.parent.mkdir(parents=True, exist_ok=True)
-    cmd = [
-        "ffmpeg", "-y", "-loglevel", "error",
-        "-i", str(wav_path),
-        "-ac", "1",
-        "-b:a", bitrate,
-        "-codec:a", "libmp3lame",
-    ]
+
+
+class _Timed:
+    """Iterator wrapper that accumulates the time spent producing items."""
+
+    def __init__(self, iterable: Iterable[np.ndarray]):
+        self._it = iter(iterable)
+        self.seconds = 0.0
+
+    def __iter__(self) -> "_Timed":
+        return self
+
+    def __next__(self) -> np.ndarray:
+        started = time.perf_counter()
+        try:
+            return next(self._it)
+        finally:
+            self.seconds += time.perf_counter() - started
+
+
+def _bitrate_bps(bitrate: str) -> int:
+    """ffmpeg bitrate string ("64k", "1.5M", "96000") to bits per second."""
+    scale = {"k": 1_000, "m": 1_000_000}.get(bitrate[-1:].lower(), 1)
+    return int(float(bitrate.rstrip("kKmM")) * scale)
+
+
+def _metadata_args(metadata: dict) -> list[str]:
+    args = []
     for key, value in metadata.items():
         if value:
-            cmd.extend(["-metadata", f"{key}={value}"])
-    cmd.append(str(mp3_path))
-    subprocess.run(cmd, check=True)
+            args.extend(["-metadata", f"{key}={value}"])
+    return args
+
+
+def _mp3_args(bitrate: str, metadata: dict) -> list[str]:
+    return (["-ac", "1", "-b:a", bitrate, "-codec:a", "libmp3lame"]
+            + _metadata_args(metadata) + ["-f", "mp3"])
+
+
+def _opus_args(bitrate: str, metadata: dict) -> list[str]:
+    return (["-ac", "1", "-b:a", bitrate, "-codec:a", "libopus",
+             "-application", "voip"] + _metadata_args(metadata) + ["-f", "ogg"])
 
 
-def write_audio(text: str, mp3_path: Path, voice: str, lang: str, speed: float,
-                bitrate: str, metadata: dict) -> None:
-    waveform = synthesize(text, voice=voice, lang=lang, speed=speed)
-    with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as tmp:
-        tmp_path = Path(tmp.name)
+def _rendition_args(rendered: RenderedPost) -> list[tuple[Path, list[str]]]:
+    """(output path, ffmpeg output options) for every file encoded for a post."""
+    outputs = [(rendered.mp3_path, _mp3_args(rendered.bitrate, rendered.metadata))]
+    if rendered.opus_path is not None:
+        outputs.append((rendered.opus_path,
+                        _opus_args(rendered.opus_bitrate, rendered.metadata)))
+    return outputs
+
+
+def _part(path: Path) -> Path:
+    return path.with_name(path.name + ".part")
+
+
+def encode_file(wav_path: Path, outputs: list[tuple[Path, list[str]]]) -> None:
+    """Encode a WAV into every output in a single ffmpeg pass."""
+    cmd = ["ffmpeg", "-y", "-loglevel", "error", "-i", str(wav_path)]
+    for path, args in outputs:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        cmd += args + [str(_part(path))]
     try:
-        sf.write(tmp_path, waveform, SAMPLE_RATE)
-        encode_mp3(tmp_path, mp3_path, bitrate=bitrate, metadata=metadata)
+        subprocess.run(cmd, check=True)
+        for path, _ in outputs:
+            _part(path).replace(path)
     finally:
-        tmp_path.unlink(missing_ok=True)
-
+        for path, _ in outputs:
+            _part(path).unlink(missing_ok=True)
+
+
+class StreamEncoder:
+    """A running ffmpeg that encodes raw float32 chunks fed over stdin.
+
+    Only one chunk is resident at a time and ffmpeg encodes while the next
+    chunk is being synthesized; every output (MP3, optionally Opus) comes out
+    of the same pass. Outputs go to `.part` files that `finish` renames into
+    place once ffmpeg exits cleanly.
+    """
+
+    def __init__(self, outputs: list[tuple[Path, list[str]]]):
+        self.paths = [path for path, _ in outputs]
+        self.cmd = [
+            "ffmpeg", "-y", "-loglevel", "error",
+            "-f", "f32le", "-ar", str(SAMPLE_RATE), "-ac", "1", "-i", "pipe:0",
+        ]
+        for path, args in outputs:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self.cmd += args + [str(_part(path))]
+        self.samples = 0
+        self._proc = subprocess.Popen(self.cmd, stdin=subprocess.PIPE,
+                                      stderr=subprocess.PIPE)
+
+    def write(self, chunk: np.ndarray) -> None:
+        try:
+            self._proc.stdin.write(np.asarray(chunk, dtype="<f4").tobytes())
+        except BrokenPipeError:
+            raise self._failed() from None
+        self.samples += len(chunk)
 
-def update_frontmatter(path: Path, audio_url: str) -> None:
-    """Insert an `audio:` key into the post frontmatter, preserving formatting."""
+    def finish(self) -> None:
+        """Flush stdin, wait for ffmpeg and move the outputs into place."""
+        try:
+            self._proc.stdin.close()
+        except BrokenPipeError:
+            pass
+        stderr = self._proc.stderr.read()
+        if self._proc.wait() != 0:
+            self.abort()
+            raise subprocess.CalledProcessError(self._proc.returncode, self.cmd,
+                                                stderr=stderr)
+        self._proc.stderr.close()
+        for path in self.paths:
+            _part(path).replace(path)
+
+    def abort(self) -> None:
+        if self._proc.poll() is None:
+            self._proc.kill()
+        self._proc.wait()
+        for pipe in (self._proc.stdin, self._proc.stderr):
+            try:
+                pipe.close()
+            except (BrokenPipeError, OSError):
+                pass
+        for path in self.paths:
+            _part(path).unlink(missing_ok=True)
+
+    def _failed(self) -> subprocess.CalledProcessError:
+        self._proc.wait()
+        stderr = self._proc.stderr.read()
+        self.abort()
+        return subprocess.CalledProcessError(self._proc.returncode, self.cmd,
+                                             stderr=stderr)
+
+
+def update_frontmatter(path: Path, fields: dict[str, str]) -> None:
+    """Set top-level keys (e.g. `audio:`) in the post frontmatter, preserving formatting.
+
+    Existing keys are rewritten in place; new ones are appended in order.
+    """
     text = path.read_text(encoding="utf-8")
     match = FRONTMATTER_RE.match(text)
     if not match:
         raise ValueError(f"No frontmatter to update in {path}")
-    raw_fm = match.group(1)
+    new_fm = match.group(1)
     body = text[match.end():]
 
-    line = f"audio: {audio_url}"
-    if re.search(r"^audio:\s*.*$", raw_fm, re.MULTILINE):
-        new_fm = re.sub(r"^audio:\s*.*$", line, raw_fm, count=1, flags=re.MULTILINE)
-    else:
-        new_fm = raw_fm.rstrip() + "\n" + line
+    for key, value in fields.items():
+        line = f"{key}: {value}"
+        pattern = rf"^{re.escape(key)}:\s*.*$"
+        if re.search(pattern, new_fm, re.MULTILINE):
+            new_fm = re.sub(pattern, lambda _: line, new_fm, count=1,
+                            flags=re.MULTILINE)
+        else:
+            new_fm = new_fm.rstrip() + "\n" + line
 
     path.write_text(f"---\n{new_fm}\n---\n{body}", encoding="utf-8")
 
@@ -164,9 +367,9 @@ def discover_posts(posts_dir: Path) -> list[Path]:
     return sorted(p for p in posts_dir.glob("*.md") if p.is_file())
 
 
-def needs_audio(post: Path, min_words: int) -> tuple[bool, str]:
+def needs_audio(post: Path, min_words: int, force: bool = False) -> tuple[bool, str]:
     parts = parse_post(post)
-    if parts.frontmatter.get("audio"):
+    if parts.frontmatter.get("audio") and not force:
         return False, "already has audio"
     text = strip_for_narration(parts.body)
     wc = word_count(text)
@@ -175,36 +378,261 @@ def needs_audio(post: Path, min_words: int) -> tuple[bool, str]:
     return True, f"{wc} words"
 
 
-def narrate_one(post: Path, *, audio_dir: Path, url_prefix: str, voice: str,
+def render_post(post: Path, *, audio_dir: Path, url_prefix: str, voice: str,
                 lang: str, speed: float, bitrate: str, min_words: int,
-                site_title: str | None) -> Path | None:
+                site_title: str | None, stream: bool = True, force: bool = False,
+                cache: SegmentCache | None = None,
+                engine: EngineSpec = EngineSpec(),
+                max_pause: float = DEFAULT_MAX_PAUSE,
+                silence_db: float = DEFAULT_SILENCE_DB,
+                target_db: float | None = DEFAULT_TARGET_DB,
+                peaks: bool = True, opus: bool = False,
+                opus_bitrate: str = DEFAULT_OPUS_BITRATE,
+                chapters: bool = True) -> RenderedPost | None:
+    """Parse, strip and synthesize `post`: the CPU-bound half of narration.
+
+    When streaming, the audio is already flowing into ffmpeg by the time this
+    returns; otherwise the waveform is handed to `finalize_post` to encode.
+    """
     LOGGER.info("Processing %s", post)
     parts = parse_post(post)
-    if parts.frontmatter.get("audio"):
+    if parts.frontmatter.get("audio") and not force:
         LOGGER.info("  skip: already has audio (%s)", parts.frontmatter["audio"])
         return None
-    text = strip_for_narration(parts.body)
+    narration = tokenize(parts.body)
+    text = narration.text
     wc = word_count(text)
     if wc < min_words:
         LOGGER.info("  skip: %d words below threshold %d", wc, min_words)
         return None
-    LOGGER.info("  narrating %d words with voice=%s lang=%s speed=%s",
-                wc, voice, lang, speed)
+    LOGGER.info("  narrating %d words with voice=%s lang=%s speed=%s engine=%s",
+                wc, voice, lang, speed, engine.name)
 
     slug = slug_for_post(post)
-    mp3_path = audio_dir / f"{slug}.mp3"
+    url_prefix = url_prefix.rstrip("/")
+    rendered = RenderedPost(
+        post=post,
+        mp3_path=audio_dir / f"{slug}.mp3",
+        audio_url=f"{url_prefix}/{slug}.mp3",
+        words=wc,
+        bitrate=bitrate,
+        metadata={
+            "title": parts.frontmatter.get("title", slug),
+            "artist": parts.frontmatter.get("author", ""),
+            "album": site_title or "",
+        },
+    )
+    if opus:
+        rendered.opus_path = audio_dir / f"{slug}.opus"
+        rendered.opus_url = f"{url_prefix}/{slug}.opus"
+        rendered.opus_bitrate = opus_bitrate
+    processor = PostProcessor(SAMPLE_RATE, max_pause=max_pause,
+                              silence_db=silence_db, target_db=target_db)
+
+    on_segment = None
+    if chapters:
+        # Segments are the tokenizer's blocks, one per paragraph or heading.
+        blocks = narration.blocks
+        marks: list[Chapter] = []
+        rendered.chapters = marks
+        rendered.chapters_path = audio_dir / f"{slug}.chapters.json"
+        rendered.chapters_url = f"{url_prefix}/{slug}.chapters.json"
+
+        def on_segment(index: int) -> None:
+            block = blocks[index]
+            if block.kind == "heading":
+                title = block.text.rstrip(".")
+            elif index == 0:
+                title = rendered.metadata["title"]
+            else:
+                return
+            # Everything emitted so far precedes this segment's audio.
+            chaptering.add_chapter(marks, processor.samples_out, title, SAMPLE_RATE)
+
+    hits, misses = (cache.hits, cache.misses) if cache else (0, 0)
+    chunks = _Timed(iter_chunks(text, voice=voice, lang=lang, speed=speed,
+                                cache=cache, engine=engine, on_segment=on_segment))
+    audio = processor.run(chunks)
+    if peaks:
+        rendered.peaks = PeaksBuilder(SAMPLE_RATE)
+        rendered.peaks_path = audio_dir / f"{slug}.peaks.json"
+        rendered.peaks_url = f"{url_prefix}/{slug}.peaks.json"
+        audio = rendered.peaks.tap(audio)
+    if stream:
+        encoder = StreamEncoder(_rendition_args(rendered))
+        try:
+            for chunk in audio:
+                encoder.write(chunk)
+        except BaseException:
+            encoder.abort()
+            raise
+        rendered.encoder = encoder
+        rendered.samples = encoder.samples
+    else:
+        rendered.waveform = np.concatenate(list(audio))
+        rendered.samples = len(rendered.waveform)
+    rendered.synth_seconds = chunks.seconds
+    rendered.trimmed_samples = processor.samples_in - processor.samples_out
+    if cache:
+        LOGGER.info("  segments: %d cached, %d synthesized",
+                    cache.hits - hits, cache.misses - misses)
+    trimmed = rendered.trimmed_samples / SAMPLE_RATE
+    LOGGER.info("  trimmed %.1fs of silence (%.0f%%, ~%.0f KB of MP3)", trimmed,
+                100 * rendered.trimmed_samples / max(1, processor.samples_in),
+                trimmed * _bitrate_bps(bitrate) / 8 / 1024)
+    return rendered
+
+
+def finalize_post(rendered: RenderedPost) -> NarrationResult:
+    """Encode, tag and update the frontmatter: the I/O-bound half of narration."""
+    started = time.perf_counter()
+    if rendered.encoder is not None:
+        rendered.encoder.finish()
+    else:
+        with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as tmp:
+            tmp_path = Path(tmp.name)
+        try:
+            sf.write(tmp_path, rendered.waveform, SAMPLE_RATE)
+            encode_file(tmp_path, _rendition_args(rendered))
+        finally:
+            tmp_path.unlink(missing_ok=True)
+        rendered.waveform = None
+    fields = {"audio": rendered.audio_url}
+    if rendered.opus_path is not None:
+        fields["audio_opus"] = rendered.opus_url
+    if rendered.chapters and len(rendered.chapters) > 1:
+        for path, _ in _rendition_args(rendered):
+            chaptering.embed_chapters(path, rendered.chapters, rendered.samples,
+                                      SAMPLE_RATE)
+        chaptering.write_json(rendered.chapters_path, rendered.chapters, SAMPLE_RATE)
+        fields["audio_chapters"] = rendered.chapters_url
+        LOGGER.info("  %d chapters", len(rendered.chapters))
+    if rendered.peaks is not None:
+        rendered.peaks.write(rendered.peaks_path)
+        fields["audio_peaks"] = rendered.peaks_url
+    update_frontmatter(rendered.post, fields)
+    result = NarrationResult(
+        post=rendered.post,
+        mp3_path=rendered.mp3_path,
+        audio_url=rendered.audio_url,
+        words=rendered.words,
+        audio_seconds=rendered.samples / SAMPLE_RATE,
+        synth_seconds=rendered.synth_seconds,
+        finalize_seconds=time.perf_counter() - started,
+        trimmed_seconds=rendered.trimmed_samples / SAMPLE_RATE,
+    )
+    LOGGER.info("  wrote %s (%.1f KB) rtf=%.2f (%.1fs audio in %.1fs)",
+                result.mp3_path, result.mp3_path.stat().st_size / 1024, result.rtf,
+                result.audio_seconds, result.synth_seconds)
+    return result
 
-    metadata = {
-        "title": parts.frontmatter.get("title", slug),
-        "artist": parts.frontmatter.get("author", ""),
-        "album": site_title or "",
-    }
-    write_audio(text, mp3_path, voice=voice, lang=lang, speed=speed,
-                bitrate=bitrate, metadata=metadata)
-    url = f"{url_prefix.rstrip('/')}/{slug}.mp3"
-    update_frontmatter(post, url)
-    LOGGER.info("  wrote %s (%.1f KB)", mp3_path, mp3_path.stat().st_size / 1024)
-    return mp3_path
+
+def narrate_one(post: Path, **kwargs: Any) -> NarrationResult | None:
+    rendered = render_post(post, **kwargs)
+    return finalize_post(rendered) if rendered else None
+
+
+def _init_worker(torch_threads: int) -> None:
+    """Pool initializer: split the CPU between workers instead of oversubscribing."""
+    try:
+        import torch
+    except ImportError:
+        return
+    torch.set_num_threads(torch_threads)
+
+
+def _narrate_job(job: tuple[Path, dict]) -> tuple[Path, NarrationResult | None, bool]:
+    """Run `narrate_one` inside a pool worker; report failures instead of raising."""
+    post, kwargs = job
+    try:
+        return post, narrate_one(post, **kwargs), True
+    except Exception:  # noqa: BLE001
+        LOGGER.exception("Failed to narrate %s", post)
+        return post, None, False
+
+
+def run_pool(jobs: list[tuple[Path, dict]], workers: int, lang: str,
+             engine: EngineSpec) -> Iterable[tuple[Path, NarrationResult | None, bool]]:
+    """Narrate `jobs` across `workers` forked processes sharing one model load."""
+    if engine.name == "torch":
+        # Load once in the parent; forked children inherit the weights
+        # copy-on-write. ONNX Runtime thread pools don't survive fork, so ONNX
+        # workers each open their own (much smaller) session instead.
+        load_engine(engine, lang)
+    torch_threads = max(1, (os.cpu_count() or 1) // workers)
+    LOGGER.info("Starting %d workers (%d torch threads each)", workers, torch_threads)
+    ctx = multiprocessing.get_context("fork")
+    with ctx.Pool(workers, initializer=_init_worker,
+                  initargs=(torch_threads,)) as pool:
+        yield from pool.imap_unordered(_narrate_job, jobs)
+
+
+def run_jobs(jobs: list[tuple[Path, dict]], workers: int, lang: str,
+             engine: EngineSpec, encoders: int = 0,
+             depth: int = 1) -> Iterable[tuple[Path, NarrationResult | None, bool]]:
+    """Narrate `jobs` in a forked pool, pipelined, or one after the other.
+
+    Yields `(post, result, ok)`: `result` is None for a skipped post, and
+    `ok` is False when narrating it raised.
+    """
+    if workers > 1:
+        return run_pool(jobs, workers, lang, engine)
+    if encoders > 0 and len(jobs) > 1:
+        return run_pipelined(jobs, encoders, max(1, depth))
+    return (_narrate_job(job) for job in jobs)
+
+
+def _collect(post: Path, future: Future) -> tuple[Path, NarrationResult | None, bool]:
+    try:
+        return post, future.result(), True
+    except Exception:  # noqa: BLE001
+        LOGGER.exception("Failed to narrate %s", post)
+        return post, None, False
+
+
+def run_pipelined(jobs: list[tuple[Path, dict]], encoders: int,
+                  depth: int) -> Iterator[tuple[Path, NarrationResult | None, bool]]:
+    """Synthesize post N+1 while `encoders` threads finalize post N.
+
+    Synthesis stays on the calling thread (it owns the model and the segment
+    cache); ffmpeg, tagging and frontmatter rewrites run in the thread pool. At
+    most `depth` rendered posts wait to be finalized, which bounds memory when
+    each one holds a full waveform (`--no-stream`). Results come out in job
+    order. A failed finalize is usually not the post's fault (ffmpeg missing,
+    disk full), so once one fails the remaining posts are reported as failed
+    instead of being synthesized only to fail the same way.
+    """
+    pending: deque[tuple[Path, Future]] = deque()
+    finalize_failed = False
+    with ThreadPoolExecutor(encoders, thread_name_prefix="encode") as pool:
+        for post, kwargs in jobs:
+            while pending and (len(pending) >= depth or pending[0][1].done()):
+                outcome = _collect(*pending.popleft())
+                finalize_failed = finalize_failed or not outcome[2]
+                yield outcome
+            if finalize_failed:
+                LOGGER.error("Not narrating %s: finalizing an earlier post failed",
+                             post)
+                yield post, None, False
+                continue
+            try:
+                rendered = render_post(post, **kwargs)
+            except Exception:  # noqa: BLE001
+                LOGGER.exception("Failed to narrate %s", post)
+                outcome = post, None, False
+            else:
+                if rendered is not None:
+                    pending.append((post, pool.submit(finalize_post, rendered)))
+                    continue
+                outcome = post, None, True
+            # Posts still being finalized come out first, to keep job order.
+            while pending:
+                earlier = _collect(*pending.popleft())
+                finalize_failed = finalize_failed or not earlier[2]
+                yield earlier
+            yield outcome
+        while pending:
+            yield _collect(*pending.popleft())
 
 
 def parse_args() -> argparse.Namespace:
@@ -221,26 +649,101 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument("--lang", default=DEFAULT_LANG,
                         help="Kokoro language code (p=pt-br, a=en-us, ...)")
     parser.add_argument("--speed", default=DEFAULT_SPEED, type=float)
+    parser.add_argument("--engine", default=DEFAULT_ENGINE, choices=ENGINES,
+                        help="TTS backend: PyTorch Kokoro or Kokoro on ONNX Runtime")
+    parser.add_argument("--onnx-model", default=DEFAULT_ONNX_MODEL, type=Path,
+                        help="Kokoro ONNX export for --engine onnx "
+                             "(e.g. kokoro-v1.0.int8.onnx for the quantized model)")
+    parser.add_argument("--onnx-voices", default=DEFAULT_ONNX_VOICES, type=Path,
+                        help="Voice embeddings file for --engine onnx")
     parser.add_argument("--bitrate", default=DEFAULT_BITRATE)
+    parser.add_argument("--max-pause", default=DEFAULT_MAX_PAUSE, type=float,
+                        help="Cap every silence at this many seconds "
+                             "(0 = keep pauses as synthesized)")
+    parser.add_argument("--silence-db", default=DEFAULT_SILENCE_DB, type=float,
+                        help="RMS level (dBFS) below which a 10 ms window is silence")
+    parser.add_argument("--target-db", default=DEFAULT_TARGET_DB, type=float,
+                        help="Speech RMS level (dBFS) to normalize towards")
+    parser.add_argument("--no-normalize", action="store_true",
+                        help="Leave the synthesized loudness untouched")
+    parser.add_argument("--opus", action="store_true",
+                        help="Also encode <slug>.opus in the same ffmpeg pass "
+                             "and record it as audio_opus:")
+    parser.add_argument("--opus-bitrate", default=DEFAULT_OPUS_BITRATE)
+    parser.add_argument("--chapters", default=True,
+                        action=argparse.BooleanOptionalAction,
+                        help="Mark a chapter at every heading (ID3 CHAP frames "
+                             "plus <slug>.chapters.json as audio_chapters:)")
+    parser.add_argument("--peaks", default=True, action=argparse.BooleanOptionalAction,
+                        help="Write <slug>.peaks.json for the player waveform "
+                             "and record it as audio_peaks:")
     parser.add_argument("--min-words", default=DEFAULT_MIN_WORDS, type=int)
     parser.add_argument("--max-posts", default=0, type=int,
                         help="Cap how many posts to narrate this run (0 = no cap)")
     parser.add_argument("--site-title", default=os.environ.get("SITE_TITLE", ""))
+    parser.add_argument("--stream", default=True,
+                        action=argparse.BooleanOptionalAction,
+                        help="Pipe audio chunks straight into ffmpeg (default) "
+                             "instead of buffering the waveform in a temp WAV")
+    parser.add_argument("--manifest", default=DEFAULT_MANIFEST_PATH, type=Path,
+                        help="Per-post hash manifest used to skip unchanged "
+                             "posts and flag stale audio")
+    parser.add_argument("--force", action="store_true",
+                        help="Re-narrate posts even if they already have audio")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, type=Path,
+                        help="Paragraph-level PCM cache reused across re-renders")
+    parser.add_argument("--cache-max-mb", default=DEFAULT_CACHE_MAX_MB, type=int,
+                        help="Evict least recently used segments beyond this size")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Synthesize every paragraph from scratch")
+    parser.add_argument("--workers", default=1, type=int,
+                        help="Narrate posts in N forked processes sharing one "
+                             "model load (Unix only)")
+    parser.add_argument("--encoders", default=2, type=int,
+                        help="Threads that encode and tag post N while post N+1 "
+                             "is synthesized (0 = encode inline); single worker only")
+    parser.add_argument("--pipeline-depth", default=2, type=int,
+                        help="Max synthesized posts waiting for an encoder")
     parser.add_argument("--dry-run", action="store_true",
                         help="List what would be narrated without generating audio")
     parser.add_argument("--verbose", action="store_true")
     return parser.parse_args()
 
 
-def select_posts(args: argparse.Namespace) -> Iterable[Path]:
+def select_posts(args: argparse.Namespace, manifest: Manifest) -> list[Candidate]:
     if args.posts:
-        return [p.resolve() for p in args.posts]
+        return [Candidate(p.resolve(), "narrate", "requested") for p in args.posts]
     if args.all_missing:
-        candidates = discover_posts(args.posts_dir)
-        return [p for p in candidates if needs_audio(p, args.min_words)[0]]
+        candidates = manifest.scan(discover_posts(args.posts_dir), args.min_words,
+                                   args.force, split_post, narration_words)
+        return [c for c in candidates if c.action != "skip"]
     raise SystemExit("Pass post paths or --all-missing")
 
 
+def log_summary(results: list[NarrationResult], wall_seconds: float,
+                workers: int) -> None:
+    if not results:
+        return
+    audio = sum(r.audio_seconds for r in results)
+    synth = sum(r.synth_seconds for r in results)
+    finalize = sum(r.finalize_seconds for r in results)
+    trimmed = sum(r.trimmed_seconds for r in results)
+    LOGGER.info(
+        "Narrated %d post(s) with %d worker(s): %.1f min audio (%.1f min of "
+        "silence trimmed), %.1f min synthesis, %.1f min wall "
+        "(rtf %.2f synth / %.2f wall)",
+        len(results), workers, audio / 60, trimmed / 60, synth / 60,
+        wall_seconds / 60, synth / audio if audio else 0.0,
+        wall_seconds / audio if audio else 0.0,
+    )
+    # Run back to back, synthesis and finalize would take at least this long.
+    serial = synth + finalize
+    LOGGER.info(
+        "Encode/tag/frontmatter took %.1fs; overlap saved %.1fs of wall clock "
+        "(%.1fs serial)", finalize, max(0.0, serial - wall_seconds), serial,
+    )
+
+
 def main() -> int:
     args = parse_args()
     logging.basicConfig(
@@ -249,39 +752,85 @@ def main() -> int:
         datefmt="%H:%M:%S",
     )
 
-    posts = list(select_posts(args))
-    if not posts:
+    manifest = Manifest.load(args.manifest)
+    candidates = select_posts(args, manifest)
+    if not candidates:
         LOGGER.info("Nothing to narrate.")
+        manifest.save()
         return 0
 
-    if args.max_posts and len(posts) > args.max_posts:
-        LOGGER.info("Capping to %d of %d posts", args.max_posts, len(posts))
-        posts = posts[: args.max_posts]
+    stale = [c.path for c in candidates if c.action == "stale"]
+    if stale:
+        LOGGER.info("%d post(s) have audio older than their text", len(stale))
+
+    if args.max_posts and len(candidates) > args.max_posts:
+        LOGGER.info("Capping to %d of %d posts", args.max_posts, len(candidates))
+        candidates = candidates[: args.max_posts]
 
     if args.dry_run:
-        for post in posts:
-            ok, reason = needs_audio(post, args.min_words)
-            LOGGER.info("%s -> %s (%s)", post, "narrate" if ok else "skip", reason)
+        for c in candidates:
+            if args.posts:
+                ok, reason = needs_audio(c.path, args.min_words, args.force)
+                action = "narrate" if ok else "skip"
+            else:
+                action, reason = c.action, c.reason
+            LOGGER.info("%s -> %s (%s)", c.path, action, reason)
         return 0
 
+    posts = [c.path for c in candidates]
+
     args.audio_dir.mkdir(parents=True, exist_ok=True)
+    cache = None if args.no_cache else SegmentCache(
+        args.cache_dir, args.cache_max_mb * 1_048_576)
+    workers = max(1, min(args.workers, len(posts)))
+    if workers > 1 and "fork" not in multiprocessing.get_all_start_methods():
+        LOGGER.warning("fork start method unavailable; narrating sequentially")
+        workers = 1
+
+    engine = EngineSpec(args.engine, args.onnx_model, args.onnx_voices,
+                        threads=max(1, (os.cpu_count() or 1) // workers)
+                        if workers > 1 else 0)
+    kwargs = dict(
+        audio_dir=args.audio_dir,
+        url_prefix=args.url_prefix,
+        voice=args.voice,
+        lang=args.lang,
+        speed=args.speed,
+        bitrate=args.bitrate,
+        min_words=args.min_words,
+        site_title=args.site_title or None,
+        stream=args.stream,
+        force=args.force,
+        cache=cache,
+        engine=engine,
+        max_pause=args.max_pause,
+        silence_db=args.silence_db,
+        target_db=None if args.no_normalize else args.target_db,
+        peaks=args.peaks,
+        opus=args.opus,
+        opus_bitrate=args.opus_bitrate,
+        chapters=args.chapters,
+    )
+
+    started = time.perf_counter()
+    jobs = [(c.path, {**kwargs, "force": kwargs["force"] or c.action == "stale"})
+            for c in candidates]
+    outcomes = run_jobs(jobs, workers, args.lang, engine, args.encoders,
+                        args.pipeline_depth)
+
     failures: list[Path] = []
-    for post in posts:
-        try:
-            narrate_one(
-                post,
-                audio_dir=args.audio_dir,
-                url_prefix=args.url_prefix,
-                voice=args.voice,
-                lang=args.lang,
-                speed=args.speed,
-                bitrate=args.bitrate,
-                min_words=args.min_words,
-                site_title=args.site_title or None,
-            )
-        except Exception:  # noqa: BLE001
-            LOGGER.exception("Failed to narrate %s", post)
+    results: list[NarrationResult] = []
+    for post, result, ok in outcomes:
+        if not ok:
             failures.append(post)
+        elif result is not None:
+            results.append(result)
+            if result.post.parent.resolve() == args.posts_dir.resolve():
+                manifest.record_narration(result.post, split_post, narration_words)
+    manifest.save()
+    log_summary(results, time.perf_counter() - started, workers)
+    if cache:
+        cache.evict()
 
     if failures:
         LOGGER.error("%d post(s) failed: %s", len(failures), failures)
@@ -0,0 +1,88 @@
+"""Waveform peaks for the audio player, computed while the audio is encoded.
+
+`PeaksBuilder` sees every post-processed chunk on its way to ffmpeg and keeps
+the min/max of each 10 ms window (two floats per window, so a long post costs
+a few hundred KB of RAM at most). `to_json` then folds those into at most
+`DEFAULT_BARS` buckets, scales them so the loudest peak hits ±127 and returns
+an audiowaveform-compatible document (version 2, 8 bits, one channel):
+
+    {"version": 2, "channels": 1, "sample_rate": 24000,
+     "samples_per_pixel": 9600, "bits": 8, "length": 400,
+     "samples": 3838080, "data": [min0, max0, min1, max1, ...]}
+
+`samples` is not part of the audiowaveform format: it is the exact length of
+the audio, since `length * samples_per_pixel` overshoots by up to one padded
+bucket. A few KB of JSON lets the player draw the waveform without fetching the MP3.
+"""
+from __future__ import annotations
+
+import json
+import math
+from pathlib import Path
+from typing import Iterable, Iterator
+
+import numpy as np
+
+DEFAULT_BARS = 400
+WINDOW_SECONDS = 0.01
+
+
+class PeaksBuilder:
+    def __init__(self, sample_rate: int):
+        self.sample_rate = sample_rate
+        self.window = max(1, int(sample_rate * WINDOW_SECONDS))
+        self.samples = 0
+        self._mins: list[np.ndarray] = []
+        self._maxs: list[np.ndarray] = []
+        self._rest = np.zeros(0, dtype=np.float32)
+
+    def tap(self, chunks: Iterable[np.ndarray]) -> Iterator[np.ndarray]:
+        """Pass `chunks` through unchanged, recording their peaks."""
+        for chunk in chunks:
+            self.add(chunk)
+            yield chunk
+        self.flush()
+
+    def add(self, chunk: np.ndarray) -> None:
+        self.samples += len(chunk)
+        audio = np.concatenate((self._rest, chunk)) if len(self._rest) else chunk
+        full = len(audio) // self.window * self.window
+        if full:
+            frames = audio[:full].reshape(-1, self.window)
+            self._mins.append(frames.min(axis=1))
+            self._maxs.append(frames.max(axis=1))
+        self._rest = audio[full:].copy()
+
+    def flush(self) -> None:
+        if len(self._rest):
+            self._mins.append(self._rest.min(keepdims=True))
+            self._maxs.append(self._rest.max(keepdims=True))
+            self._rest = np.zeros(0, dtype=np.float32)
+
+    def to_json(self, bars: int = DEFAULT_BARS) -> dict:
+        mins = np.concatenate(self._mins) if self._mins else np.zeros(1, np.float32)
+        maxs = np.concatenate(self._maxs) if self._maxs else np.zeros(1, np.float32)
+        per_bar = max(1, math.ceil(len(mins) / bars))
+        pad = -len(mins) % per_bar
+        mins = np.pad(mins, (0, pad), constant_values=0).reshape(-1, per_bar).min(axis=1)
+        maxs = np.pad(maxs, (0, pad), constant_values=0).reshape(-1, per_bar).max(axis=1)
+
+        peak = float(max(np.abs(mins).max(), np.abs(maxs).max())) or 1.0
+        data = np.empty(2 * len(mins), dtype=np.int8)
+        data[0::2] = np.clip(np.round(mins / peak * 127), -128, 127)
+        data[1::2] = np.clip(np.round(maxs / peak * 127), -128, 127)
+        return {
+            "version": 2,
+            "channels": 1,
+            "sample_rate": self.sample_rate,
+            "samples_per_pixel": per_bar * self.window,
+            "bits": 8,
+            "length": len(mins),
+            "samples": self.samples,
+            "data": data.tolist(),
+        }
+
+    def write(self, path: Path, bars: int = DEFAULT_BARS) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.to_json(bars), separators=(",", ":")),
+                        encoding="utf-8")
@@ -0,0 +1,154 @@
+"""Streaming clean-up of synthesized speech before it reaches the encoder.
+
+Kokoro pads every chunk with leading and trailing silence, and concatenated
+chunks add up to long stretches of dead air between sentences and paragraphs.
+`PostProcessor` takes the raw chunks one at a time and:
+
+- measures RMS over 10 ms windows (one reshape + mean per chunk) to find the
+  silent windows;
+- caps every pause, whether it spans a chunk boundary or sits inside a chunk,
+  at `max_pause` seconds, keeping the original silence samples on each side so
+  room tone stays continuous;
+- scales speech towards a target RMS level with a gain smoothed across chunks
+  and limited so peaks stay under a ceiling.
+
+It holds back at most one pending pause, so it works on a stream; the segment
+cache keeps storing the raw PCM and processing is redone on every render.
+"""
+from __future__ import annotations
+
+from typing import Iterable, Iterator
+
+import numpy as np
+
+DEFAULT_MAX_PAUSE = 0.6
+DEFAULT_SILENCE_DB = -45.0
+DEFAULT_TARGET_DB = -20.0
+PEAK_CEILING_DB = -1.0
+WINDOW_SECONDS = 0.01
+# Weight of the newest chunk in the running gain, so levels drift instead of
+# jumping from sentence to sentence.
+GAIN_SMOOTHING = 0.3
+
+
+def db_to_amplitude(db: float) -> float:
+    return float(10 ** (db / 20))
+
+
+def window_rms(audio: np.ndarray, window: int) -> np.ndarray:
+    """RMS of consecutive `window`-sample frames (the last one may be partial)."""
+    full = len(audio) // window * window
+    frames = audio[:full].reshape(-1, window).astype(np.float64)
+    rms = np.sqrt(np.mean(np.square(frames), axis=1))
+    if full < len(audio):
+        rest = audio[full:].astype(np.float64)
+        rms = np.append(rms, np.sqrt(np.mean(np.square(rest))))
+    return rms
+
+
+def _silent_runs(loud: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Start and end (exclusive) window indices of every run of silent windows."""
+    edges = np.diff(np.concatenate(([0], (~loud).astype(np.int8), [0])))
+    return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+
+class PostProcessor:
+    def __init__(self, sample_rate: int, max_pause: float = DEFAULT_MAX_PAUSE,
+                 silence_db: float = DEFAULT_SILENCE_DB,
+                 target_db: float | None = DEFAULT_TARGET_DB):
+        self.window = max(1, int(sample_rate * WINDOW_SECONDS))
+        self.max_pause = int(sample_rate * max_pause) if max_pause > 0 else None
+        self.threshold = db_to_amplitude(silence_db)
+        self.target = db_to_amplitude(target_db) if target_db is not None else None
+        self.ceiling = db_to_amplitude(PEAK_CEILING_DB)
+        self.samples_in = 0
+        self.samples_out = 0
+        self._gain: float | None = None
+        self._pause: list[np.ndarray] = []  # silence waiting for the next speech
+        self._started = False
+
+    def run(self, chunks: Iterable[np.ndarray]) -> Iterator[np.ndarray]:
+        for chunk in chunks:
+            yield from self.process(chunk)
+        yield from self.flush()
+
+    def process(self, chunk: np.ndarray) -> list[np.ndarray]:
+        chunk = np.asarray(chunk, dtype=np.float32)
+        self.samples_in += len(chunk)
+        if not len(chunk):
+            return []
+        rms = window_rms(chunk, self.window)
+        loud = rms >= self.threshold
+        if not loud.any():
+            self._pause.append(chunk)
+            return []
+
+        first = int(np.argmax(loud))
+        last = len(loud) - int(np.argmax(loud[::-1]))
+        start, end = first * self.window, last * self.window
+        self._pause.append(chunk[:start])
+        speech = self._compress(chunk[start:end], loud[first:last])
+        gain = self._update_gain(rms[first:last][loud[first:last]], speech)
+
+        out = [self._emit_pause(leading=not self._started), speech]
+        self._started = True
+        self._pause = [chunk[end:]]
+        return self._finish(out, gain)
+
+    def flush(self) -> list[np.ndarray]:
+        if not self._started:
+            # Nothing but silence: pass it through untouched.
+            out, self._pause = self._pause, []
+            return self._finish(out, 1.0)
+        out = [self._emit_pause(trailing=True)]
+        return self._finish(out, self._gain or 1.0)
+
+    def _finish(self, out: list[np.ndarray], gain: float) -> list[np.ndarray]:
+        out = [part * np.float32(gain) if gain != 1.0 else part
+               for part in out if len(part)]
+        self.samples_out += sum(len(part) for part in out)
+        return out
+
+    def _emit_pause(self, leading: bool = False, trailing: bool = False) -> np.ndarray:
+        pause = (np.concatenate(self._pause) if self._pause
+                 else np.zeros(0, dtype=np.float32))
+        self._pause = []
+        limit = self.max_pause
+        if limit is None or len(pause) <= limit:
+            return pause
+        if leading:
+            return pause[-(limit // 2):] if limit > 1 else pause[:0]
+        if trailing:
+            return pause[: limit // 2]
+        # Keep the edges next to the speech on both sides.
+        head = limit // 2
+        return np.concatenate((pause[:head], pause[len(pause) - (limit - head):]))
+
+    def _compress(self, speech: np.ndarray, loud: np.ndarray) -> np.ndarray:
+        """Shorten pauses inside a chunk (e.g. between sentences) to `max_pause`."""
+        if self.max_pause is None:
+            return speech
+        cap = max(1, self.max_pause // self.window)
+        starts, ends = _silent_runs(loud)
+        long = (ends - starts) > cap
+        if not long.any():
+            return speech
+        # Mark the middle of each long run for removal with a +1/-1 difference
+        # array; windows with a non-zero running sum are dropped.
+        delta = np.zeros(len(loud) + 1, dtype=np.int32)
+        np.add.at(delta, starts[long] + cap // 2, 1)
+        np.add.at(delta, ends[long] - (cap - cap // 2), -1)
+        keep = np.cumsum(delta[:-1]) == 0
+        return speech[np.repeat(keep, self.window)[: len(speech)]]
+
+    def _update_gain(self, speech_rms: np.ndarray, speech: np.ndarray) -> float:
+        if self.target is None:
+            return 1.0
+        level = float(np.sqrt(np.mean(np.square(speech_rms))))
+        wanted = self.target / level
+        if self._gain is None:
+            self._gain = wanted
+        else:
+            self._gain += GAIN_SMOOTHING * (wanted - self._gain)
+        peak = float(np.max(np.abs(speech)))
+        return min(self._gain, self.ceiling / peak) if peak else self._gain
@@ -0,0 +1,88 @@
+"""Content-addressed on-disk cache of synthesized PCM segments.
+
+Each narration segment (a paragraph of `strip_for_narration` output) is keyed by
+hash(text, voice, lang, speed, engine) and stored as a float32 `.npy` file. Hits bump
+the file mtime, so eviction can drop the least recently used segments once the
+cache grows past its size budget.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+LOGGER = logging.getLogger("narrate")
+
+DEFAULT_CACHE_DIR = Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache")) / "narrate"
+DEFAULT_CACHE_MAX_MB = 2048
+
+
+def segment_key(text: str, voice: str, lang: str, speed: float, engine: str) -> str:
+    payload = json.dumps([text, voice, lang, float(speed), engine], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class SegmentCache:
+    def __init__(self, root: Path, max_bytes: int):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.npy"
+
+    def get(self, key: str) -> np.ndarray | None:
+        path = self._path(key)
+        try:
+            audio = np.load(path, allow_pickle=False)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        try:
+            os.utime(path)  # mark as recently used for LRU eviction
+        except OSError:
+            pass
+        self.hits += 1
+        return audio
+
+    def put(self, key: str, audio: np.ndarray) -> None:
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as fh:
+                np.save(fh, np.asarray(audio, dtype=np.float32), allow_pickle=False)
+            os.replace(tmp_name, path)
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+
+    def evict(self) -> int:
+        """Delete least recently used segments until the cache fits its budget."""
+        entries = []
+        total = 0
+        for path in self.root.glob("*/*.npy"):
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+            total += st.st_size
+        removed = 0
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            removed += 1
+        if removed:
+            LOGGER.info("Segment cache: evicted %d segment(s), %.1f MB kept",
+                        removed, total / 1_048_576)
+        return removed
@@ -0,0 +1,144 @@
+"""Single-pass markdown-to-speech tokenizer.
+
+One master regex walks the post body left to right and every token is handled
+as it is seen: code fences and images are dropped, link targets and kramdown
+attribute lists vanish while link text keeps flowing through the same scanner
+(so emphasis inside links is unwrapped too), emphasis delimiters are removed
+only when they flank words (so `snake_case` identifiers survive) and line
+prefixes (headings, quotes, list markers) are recognised at line starts.
+
+The result keeps the block structure: each heading or paragraph becomes a
+`Block` with its sentences, which is what narrate.py feeds to Kokoro.
+"""
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+
+_TOKEN_RE = re.compile(
+    r"""
+    (?P<text>(?<=[^\n])[^\n`*_~\[\]!<{\\|]+)
+  | (?P<fence>^[ ]{0,3}(?P<ticks>`{3,}|~{3,})[^\n]*(?:\n[\s\S]*?^[ ]{0,3}(?P=ticks)[ \t]*$|[\s\S]*\Z))
+  | (?P<blank>\n(?:[ \t]*\n)+)
+  | (?P<newline>\n)
+  | (?P<rule>^[ \t]*(?P<rule_char>[-*_])(?:[ \t]*(?P=rule_char)){2,}[ \t]*$)
+  | (?P<table_sep>^[ \t]*\|?(?:[ \t]*:?-+:?[ \t]*\|)+[ \t]*:?-*:?[ \t]*$)
+  | (?P<heading>^[ \t]*\#{1,6}[ \t]+(?:\d+\.[ \t]+)?)
+  | (?P<prefix>^[ \t]*(?:>[ \t]?)+(?:[-*+][ \t]+|\d+[.)][ \t]+)?|^[ \t]*(?:[-*+][ \t]+|\d+[.)][ \t]+|(?:\*{1,3}|_{1,3})\d+\.[ \t]+))
+  | (?P<image>!\[[^\]\n]*\]\([^)\n]*\))
+  | (?P<link_open>\[(?=[^\]\n]*\](?:\(|\[)))
+  | (?P<link_close>\](?:\([^)\n]*\)|\[[^\]\n]*\]))
+  | (?P<code>`[^`]*`)
+  | (?P<ial>\{:[^}]*\})
+  | (?P<html></?[A-Za-z!][^>]*>)
+  | (?P<escape>\\(?P<escaped>[\\`*_{}\[\]()\#+\-.!>|~]))
+  | (?P<pipe>\|)
+  | (?P<emphasis>(?<![0-9A-Za-zÀ-ɏ])(?:\*+|_+)(?!\s)|(?<!\s)(?:\*+|_+)(?![0-9A-Za-zÀ-ɏ])|~~)
+  | (?P<line_text>[^\n`*_~\[\]!<{\\|]+|.)
+    """,
+    re.MULTILINE | re.VERBOSE,
+)
+
+_SENTENCE_END = ".!?…:;"
+# Split after sentence-final punctuation, but not after initials ("R. Daneel")
+# or before a lowercase continuation.
+_SENTENCE_SPLIT_RE = re.compile(r"(?<=[.!?…:;])(?<!\b[A-Z]\.) (?![a-zà-ÿ])")
+# A piece ending in one of these (lowercased, without the final dot) is glued
+# to the next one: "Dr. Smith" stays one sentence, as it did when whole
+# paragraphs went to Kokoro.
+_ABBREVIATIONS = frozenset((
+    "dr", "dra", "sr", "sra", "srta", "prof", "profa", "mr", "mrs", "ms", "jr",
+    "st", "vs", "etc", "e.g", "i.e", "ex", "p.ex", "aprox", "nº", "no", "fig",
+    "inc", "ltd", "co", "corp", "cap", "pág", "vol", "obs",
+))
+
+
+@dataclass
+class Block:
+    kind: str  # "heading" or "paragraph"
+    lines: list[str]
+    sentences: list[str] = field(default_factory=list)
+
+    @property
+    def text(self) -> str:
+        return "\n".join(self.sentences)
+
+
+@dataclass
+class NarrationText:
+    blocks: list[Block]
+
+    @property
+    def text(self) -> str:
+        """Blocks separated by blank lines, one sentence per line."""
+        return "\n\n".join(block.text for block in self.blocks)
+
+    @property
+    def paragraphs(self) -> list[str]:
+        return [block.text for block in self.blocks]
+
+
+def split_sentences(line: str) -> list[str]:
+    """Split one cleaned line at sentence-final punctuation followed by a space."""
+    pieces = _SENTENCE_SPLIT_RE.split(line)
+    if len(pieces) == 1:
+        return pieces
+    sentences = [pieces[0]]
+    for piece in pieces[1:]:
+        last = sentences[-1]
+        if last.endswith(".") and last[:-1].rsplit(" ", 1)[-1].lower() in _ABBREVIATIONS:
+            sentences[-1] = f"{last} {piece}"
+        else:
+            sentences.append(piece)
+    return sentences
+
+
+# Separators written into the output buffer while scanning; blocks are cut
+# out of the joined buffer afterwards.
+_BLOCK = "\x00"
+_HEADING = "\x00\x01"
+_DROPPED = frozenset(("emphasis", "link_open", "link_close", "ial", "prefix",
+                      "table_sep"))
+_SPACED = frozenset(("image", "code", "html", "pipe"))
+
+
+def tokenize(markdown: str) -> NarrationText:
+    out: list[str] = []
+    append = out.append
+    in_heading = False
+    for match in _TOKEN_RE.finditer(markdown):
+        kind = match.lastgroup
+        if kind == "text" or kind == "line_text":
+            append(match.group())
+        elif kind in _DROPPED:
+            continue
+        elif kind == "newline":
+            append(_BLOCK if in_heading else "\n")
+            in_heading = False
+        elif kind == "blank" or kind == "fence" or kind == "rule":
+            append(_BLOCK)
+            in_heading = False
+        elif kind == "heading":
+            append(_HEADING)
+            in_heading = True
+        elif kind in _SPACED:
+            append(" ")
+        elif kind == "escape":
+            append(match.group("escaped"))
+
+    blocks: list[Block] = []
+    for raw in "".join(out).split(_BLOCK):
+        heading = raw.startswith("\x01")
+        lines = [" ".join(line.split()) for line in raw.lstrip("\x01").split("\n")]
+        lines = [line for line in lines if line]
+        if not lines:
+            continue
+        if heading:
+            line = " ".join(lines)
+            if line[-1] not in _SENTENCE_END:
+                line += "."
+            blocks.append(Block("heading", [line], [line]))
+        else:
+            sentences = [s for line in lines for s in split_sentences(line)]
+            blocks.append(Block("paragraph", lines, sentences))
+    return NarrationText(blocks)
@@ -0,0 +1,6 @@
+import sys
+from pathlib import Path
+
+# The narrate modules import each other as top-level modules (`from manifest
+# import ...`), the same way narrate.py is run from its own directory.
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
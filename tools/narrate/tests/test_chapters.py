@@ -0,0 +1,111 @@
+import json
+import subprocess
+from pathlib import Path
+
+import pytest
+
+import chapters as chaptering
+from chapters import Chapter, add_chapter, embed_chapters, ffmetadata, write_json
+
+RATE = 1000
+
+
+def parse_ffmetadata(text: str) -> list[dict]:
+    """Minimal FFMETADATA1 reader: unescapes `\\x` and joins escaped newlines."""
+    assert text.startswith(";FFMETADATA1\n")
+    lines, current, escaped = [], "", False
+    for ch in text[len(";FFMETADATA1\n"):]:
+        if escaped:
+            current += ch
+            escaped = False
+        elif ch == "\\":
+            escaped = True
+        elif ch == "\n":
+            lines.append(current)
+            current = ""
+        else:
+            current += ch
+    sections = []
+    for line in lines:
+        if line == "[CHAPTER]":
+            sections.append({})
+        else:
+            key, value = line.split("=", 1)
+            sections[-1][key] = value
+    return sections
+
+
+def test_add_chapter_merges_headings_closer_than_one_second():
+    marks: list[Chapter] = []
+    add_chapter(marks, 0, "Intro", RATE)
+    add_chapter(marks, 400, "Setup", RATE)
+    add_chapter(marks, 1000, "Parte 1", RATE)
+    assert marks == [Chapter(0, "Intro"), Chapter(1000, "Parte 1")]
+
+
+def test_ffmetadata_escapes_special_characters():
+    title = "a=b; c#d \\ e\nf"
+    [section] = parse_ffmetadata(ffmetadata([Chapter(0, title)], 500, RATE))
+    assert section["title"] == title
+    raw = ffmetadata([Chapter(0, title)], 500, RATE).splitlines()
+    assert "title=a\\=b\\; c\\#d \\\\ e\\" in raw
+
+
+def test_ffmetadata_chapters_are_contiguous_and_end_at_total():
+    marks = [Chapter(0, "A"), Chapter(12_345, "B"), Chapter(40_000, "C")]
+    sections = parse_ffmetadata(ffmetadata(marks, 48_000, 24_000))
+    assert [s["TIMEBASE"] for s in sections] == ["1/1000"] * 3
+    assert [(s["START"], s["END"]) for s in sections] == [
+        ("0", "514"), ("514", "1666"), ("1666", "2000"),
+    ]
+    for prev, nxt in zip(sections, sections[1:]):
+        assert prev["END"] == nxt["START"]
+
+
+def test_write_json(tmp_path):
+    path = tmp_path / "audio" / "post.chapters.json"
+    write_json(path, [Chapter(0, "Introdução"), Chapter(41_270, "Fim")], RATE)
+    assert json.loads(path.read_text(encoding="utf-8")) == [
+        {"start": 0.0, "title": "Introdução"}, {"start": 41.27, "title": "Fim"},
+    ]
+
+
+@pytest.fixture
+def mp3(tmp_path):
+    path = tmp_path / "post.mp3"
+    path.write_bytes(b"original")
+    return path
+
+
+def test_embed_chapters_remuxes_in_place(mp3, monkeypatch):
+    seen = {}
+
+    def run(cmd, check, capture_output):
+        meta = Path(cmd[cmd.index("-i", cmd.index("-i") + 1) + 1])
+        seen["meta_path"] = meta
+        seen["meta"] = meta.read_text(encoding="utf-8")
+        seen["cmd"] = cmd
+        Path(cmd[-1]).write_bytes(b"with chapters")
+
+    monkeypatch.setattr(chaptering.subprocess, "run", run)
+    embed_chapters(mp3, [Chapter(0, "A"), Chapter(2000, "B")], 3000, RATE)
+
+    assert mp3.read_bytes() == b"with chapters"
+    assert seen["cmd"][-1] == str(mp3) + ".part"
+    assert ["-id3v2_version", "3"] == seen["cmd"][-5:-3]
+    assert parse_ffmetadata(seen["meta"])[-1]["END"] == "3000"
+    assert not Path(seen["cmd"][-1]).exists()
+    assert not seen["meta_path"].exists()
+
+
+def test_embed_chapters_failure_keeps_original(mp3, monkeypatch):
+    def run(cmd, check, capture_output):
+        Path(cmd[-1]).write_bytes(b"half")
+        raise subprocess.CalledProcessError(1, cmd)
+
+    monkeypatch.setattr(chaptering.subprocess, "run", run)
+    with pytest.raises(subprocess.CalledProcessError):
+        embed_chapters(mp3, [Chapter(0, "A")], 3000, RATE)
+
+    assert mp3.read_bytes() == b"original"
+    assert [p.name for p in mp3.parent.iterdir()] == ["post.mp3"]
@@ -0,0 +1,58 @@
+import pickle
+from pathlib import Path
+
+import pytest
+
+import engines
+from engines import EngineSpec, create_engine
+from segment_cache import segment_key
+
+
+def test_torch_and_onnx_tags_differ():
+    tags = {
+        EngineSpec("torch").cache_tag,
+        EngineSpec("onnx", onnx_model=Path("m/kokoro-v1.0.onnx")).cache_tag,
+        EngineSpec("onnx", onnx_model=Path("m/kokoro-v1.0.int8.onnx")).cache_tag,
+    }
+    assert len(tags) == 3
+
+
+def test_same_spec_same_tag():
+    spec = EngineSpec("onnx", onnx_model=Path("/a/kokoro-v1.0.int8.onnx"))
+    again = EngineSpec("onnx", onnx_model=Path("/a/kokoro-v1.0.int8.onnx"))
+    assert spec == again and hash(spec) == hash(again)
+    assert spec.cache_tag == again.cache_tag == "onnx:kokoro-v1.0.int8.onnx"
+    # Workers get the spec pickled; the tag must survive the trip.
+    assert pickle.loads(pickle.dumps(spec)).cache_tag == spec.cache_tag
+
+
+def test_tag_ignores_settings_that_do_not_change_the_audio():
+    base = EngineSpec("onnx", onnx_model=Path("/a/kokoro-v1.0.onnx"),
+                      onnx_voices=Path("/a/voices.bin"))
+    assert EngineSpec("onnx", onnx_model=Path("/b/kokoro-v1.0.onnx"),
+                      onnx_voices=Path("/b/voices.bin"),
+                      threads=4).cache_tag == base.cache_tag
+    assert EngineSpec("torch", onnx_model=Path("/x.onnx")).cache_tag == "torch"
+
+
+def test_segment_keys_differ_between_engines():
+    torch_key = segment_key("Olá.", "pf_dora", "p", 1.0, EngineSpec("torch").cache_tag)
+    onnx_key = segment_key("Olá.", "pf_dora", "p", 1.0, EngineSpec("onnx").cache_tag)
+    assert torch_key != onnx_key
+
+
+def test_create_engine_dispatches_on_name(monkeypatch):
+    made = []
+    monkeypatch.setattr(engines, "TorchEngine",
+                        lambda lang: made.append(("torch", lang)) or "t")
+    monkeypatch.setattr(engines, "OnnxEngine",
+                        lambda lang, model, voices, threads:
+                        made.append(("onnx", lang, model.name, threads)) or "o")
+
+    assert create_engine(EngineSpec("torch"), "p") == "t"
+    spec = EngineSpec("onnx", onnx_model=Path("k.onnx"), threads=2)
+    assert create_engine(spec, "a") == "o"
+    assert made == [("torch", "p"), ("onnx", "a", "k.onnx", 2)]
+
+    with pytest.raises(ValueError, match="Unknown engine"):
+        create_engine(EngineSpec("tflite"), "p")
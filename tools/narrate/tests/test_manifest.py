@@ -0,0 +1,133 @@
+import os
+import shutil
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from manifest import Manifest, git_blob_ids
+
+BODY = "word " * 50
+
+
+def split(text: str) -> tuple[str, str]:
+    _, fm, body = text.split("---\n", 2)
+    return fm, body
+
+
+class CountingWords:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, body: str) -> int:
+        self.calls += 1
+        return len(body.split())
+
+
+def write_post(path: Path, body: str = BODY, audio: str | None = None) -> None:
+    fm = 'title: "Post"\n' + (f"audio: {audio}\n" if audio else "")
+    path.write_text(f"---\n{fm}---\n{body}", encoding="utf-8")
+
+
+def git(cwd: Path, *args: str) -> None:
+    subprocess.run(["git", *args], cwd=cwd, check=True, capture_output=True)
+
+
+@pytest.fixture
+def repo(tmp_path: Path) -> Path:
+    if shutil.which("git") is None:
+        pytest.skip("git not available")
+    posts = tmp_path / "_posts"
+    posts.mkdir()
+    write_post(posts / "2024-01-01-a.md", audio="/a.mp3")
+    write_post(posts / "2024-01-02-b.md")
+    write_post(posts / "2024-01-03-short.md", body="few words")
+    git(tmp_path, "init", "-q")
+    git(tmp_path, "add", ".")
+    git(tmp_path, "-c", "user.name=t", "-c", "user.email=t@t", "commit", "-qm", "posts")
+    return posts
+
+
+def scan(manifest: Manifest, posts: Path, counter=None, min_words: int = 10):
+    counter = counter or CountingWords()
+    candidates = manifest.scan(sorted(posts.glob("*.md")), min_words, False,
+                               split, counter)
+    return {c.path.name: (c.action, c.reason) for c in candidates}
+
+
+def test_git_blob_ids_match_git_and_skip_modified_files(repo: Path):
+    blobs = git_blob_ids(repo)
+    assert set(blobs) == {"2024-01-01-a.md", "2024-01-02-b.md", "2024-01-03-short.md"}
+    write_post(repo / "2024-01-02-b.md", body="changed " * 20)
+    assert "2024-01-02-b.md" not in git_blob_ids(repo)
+
+
+def test_git_blob_ids_outside_git_is_empty(tmp_path: Path):
+    assert git_blob_ids(tmp_path) == {}
+
+
+def test_fresh_checkout_does_not_reread_posts(repo: Path, tmp_path: Path, monkeypatch):
+    manifest = Manifest(tmp_path / "manifest.json")
+    scan(manifest, repo)
+    manifest.save()
+
+    # A new checkout: same bytes, every mtime different.
+    for post in repo.glob("*.md"):
+        st = post.stat()
+        os.utime(post, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    reads = []
+    original = Path.read_bytes
+    monkeypatch.setattr(Path, "read_bytes",
+                        lambda self: reads.append(self.name) or original(self))
+
+    reloaded = Manifest.load(tmp_path / "manifest.json")
+    result = scan(reloaded, repo)
+    assert reads == []
+    assert result["2024-01-01-a.md"] == ("skip", "already has audio")
+    assert result["2024-01-02-b.md"][0] == "narrate"
+
+
+def test_fresh_checkout_without_git_keeps_committed_stat(tmp_path: Path):
+    posts = tmp_path / "_posts"
+    posts.mkdir()
+    write_post(posts / "2024-01-01-a.md")
+    manifest = Manifest(tmp_path / "manifest.json")
+    scan(manifest, posts)
+    entry = dict(manifest.entries["2024-01-01-a.md"])
+    manifest._dirty = False
+
+    post = posts / "2024-01-01-a.md"
+    os.utime(post, ns=(0, entry["mtime_ns"] + 10**9))
+    counter = CountingWords()
+    scan(manifest, posts, counter)
+    assert counter.calls == 0
+    assert manifest.entries["2024-01-01-a.md"] == entry
+    assert not manifest._dirty
+
+
+def test_edited_body_marks_narrated_post_stale(repo: Path, tmp_path: Path):
+    manifest = Manifest(tmp_path / "manifest.json")
+    scan(manifest, repo)
+    write_post(repo / "2024-01-01-a.md", body=BODY + "more words here",
+               audio="/a.mp3")
+    assert scan(manifest, repo)["2024-01-01-a.md"][0] == "stale"
+
+    manifest.record_narration(repo / "2024-01-01-a.md", split, CountingWords())
+    assert scan(manifest, repo)["2024-01-01-a.md"] == ("skip", "already has audio")
+
+
+def test_stale_post_below_min_words_is_skipped(repo: Path, tmp_path: Path):
+    manifest = Manifest(tmp_path / "manifest.json")
+    scan(manifest, repo)
+    write_post(repo / "2024-01-01-a.md", body="now short", audio="/a.mp3")
+    action, reason = scan(manifest, repo)["2024-01-01-a.md"]
+    assert action == "skip"
+    assert "words" in reason
+
+
+def test_removed_posts_are_pruned(repo: Path, tmp_path: Path):
+    manifest = Manifest(tmp_path / "manifest.json")
+    scan(manifest, repo)
+    (repo / "2024-01-02-b.md").unlink()
+    scan(manifest, repo)
+    assert "2024-01-02-b.md" not in manifest.entries
@@ -0,0 +1,174 @@
+import os
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+import narrate
+from engines import EngineSpec
+from narrate import run_jobs, run_pipelined
+
+
+class Stubs:
+    """Stub render/finalize that record what the pipeline does and when."""
+
+    def __init__(self, fail_render=(), fail_finalize=(), skip=(),
+                 finalize_delay=0.0):
+        self.fail_render = set(fail_render)
+        self.fail_finalize = set(fail_finalize)
+        self.skip = set(skip)
+        self.finalize_delay = finalize_delay
+        self.rendered: list[str] = []
+        self.finalized: list[str] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+    def render_post(self, post, **kwargs):
+        if post.name in self.fail_render:
+            raise RuntimeError(f"render {post.name}")
+        self.rendered.append(post.name)
+        if post.name in self.skip:
+            return None
+        with self.lock:
+            # Rendered posts not yet finalized, including this one.
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        return post
+
+    def finalize_post(self, post):
+        time.sleep(self.finalize_delay)
+        with self.lock:
+            self.in_flight -= 1
+        if post.name in self.fail_finalize:
+            raise RuntimeError(f"finalize {post.name}")
+        self.finalized.append(post.name)
+        return f"result {post.name}"
+
+
+@pytest.fixture
+def stubs(monkeypatch):
+    def install(**kwargs):
+        stub = Stubs(**kwargs)
+        monkeypatch.setattr(narrate, "render_post", stub.render_post)
+        monkeypatch.setattr(narrate, "finalize_post", stub.finalize_post)
+        return stub
+    return install
+
+
+def jobs(n: int) -> list[tuple[Path, dict]]:
+    return [(Path(f"p{i}.md"), {}) for i in range(n)]
+
+
+def run(job_list, encoders=2, depth=2, timeout=10.0):
+    """Consume the pipeline on a thread so a hang fails instead of blocking."""
+    outcomes = []
+    thread = threading.Thread(
+        target=lambda: outcomes.extend(run_pipelined(job_list, encoders, depth)),
+        daemon=True)
+    thread.start()
+    thread.join(timeout)
+    assert not thread.is_alive(), "run_pipelined hung"
+    return [(post.name, result, ok) for post, result, ok in outcomes]
+
+
+def test_results_come_out_in_job_order(stubs):
+    stub = stubs(finalize_delay=0.01)
+    outcomes = run(jobs(6), encoders=3, depth=3)
+    assert outcomes == [(f"p{i}.md", f"result p{i}.md", True) for i in range(6)]
+    assert sorted(stub.finalized) == [f"p{i}.md" for i in range(6)]
+
+
+def test_in_flight_posts_are_bounded_by_depth(stubs):
+    stub = stubs(finalize_delay=0.02)
+    run(jobs(8), encoders=4, depth=2)
+    assert stub.max_in_flight == 2
+
+
+def test_render_failures_and_skips_keep_order(stubs):
+    stubs(fail_render={"p1.md"}, skip={"p3.md"}, finalize_delay=0.02)
+    outcomes = run(jobs(5))
+    assert outcomes == [
+        ("p0.md", "result p0.md", True),
+        ("p1.md", None, False),
+        ("p2.md", "result p2.md", True),
+        ("p3.md", None, True),
+        ("p4.md", "result p4.md", True),
+    ]
+
+
+def test_finalize_failure_stops_synthesis(stubs):
+    stub = stubs(fail_finalize={"p1.md"})
+    outcomes = run(jobs(6), encoders=1, depth=1)
+    assert outcomes[:2] == [("p0.md", "result p0.md", True), ("p1.md", None, False)]
+    assert [ok for _, _, ok in outcomes[2:]] == [False] * 4
+    # depth=1: p2 is never synthesized once p1's finalize has failed.
+    assert stub.rendered == ["p0.md", "p1.md"]
+
+
+class StubEngine:
+    """Half a second of tone per line; raises on posts that ask for it."""
+
+    def synthesize(self, text, voice, speed):
+        for line in text.splitlines():
+            if "quebra" in line:
+                raise RuntimeError("stub engine failure")
+            time.sleep(0.01)
+            yield np.full(narrate.SAMPLE_RATE // 2, 0.1, dtype=np.float32)
+
+
+def fake_encode(wav_path, outputs):
+    """Stands in for ffmpeg: records which process encoded the post."""
+    for path, _ in outputs:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(str(os.getpid()), encoding="utf-8")
+
+
+def write_post(directory: Path, name: str, body: str) -> Path:
+    path = directory / name
+    path.write_text(f"---\ntitle: {name}\n---\n\n{body}\n", encoding="utf-8")
+    return path
+
+
+@pytest.fixture
+def pool_jobs(tmp_path, monkeypatch):
+    spec = EngineSpec("torch")
+    monkeypatch.setitem(narrate._ENGINES, (spec, "p"), StubEngine())
+    monkeypatch.setattr(narrate, "encode_file", fake_encode)
+    kwargs = dict(audio_dir=tmp_path / "audio", url_prefix="/audio", voice="v",
+                  lang="p", speed=1.0, bitrate="64k", min_words=3,
+                  site_title=None, stream=False, engine=spec, target_db=None,
+                  peaks=False, chapters=False)
+    posts = [
+        write_post(tmp_path, "2025-01-01-a.md", "Primeira frase aqui.\n\nOutra."),
+        write_post(tmp_path, "2025-01-02-b.md", "Esta aqui quebra o motor."),
+        write_post(tmp_path, "2025-01-03-c.md", "Curto."),
+        write_post(tmp_path, "2025-01-04-d.md", "Mais uma frase para narrar."),
+    ]
+    return spec, [(post, kwargs) for post in posts]
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_run_jobs_reports_results_failures_and_skips(pool_jobs, workers):
+    spec, job_list = pool_jobs
+    outcomes = {post.name: (result, ok)
+                for post, result, ok in run_jobs(job_list, workers, "p", spec)}
+
+    failed, skipped = outcomes["2025-01-02-b.md"], outcomes["2025-01-03-c.md"]
+    assert failed == (None, False)
+    assert skipped == (None, True)
+    for name in ("2025-01-01-a.md", "2025-01-04-d.md"):
+        result, ok = outcomes[name]
+        assert ok
+        assert result.audio_seconds > 0
+        assert result.synth_seconds > 0
+        assert result.rtf == pytest.approx(result.synth_seconds / result.audio_seconds)
+        assert "audio: /audio/" in result.post.read_text(encoding="utf-8")
+
+    pids = {int(p.read_text()) for p in (job_list[0][1]["audio_dir"]).glob("*.mp3")}
+    if workers == 1:
+        assert pids == {os.getpid()}
+    else:
+        assert os.getpid() not in pids
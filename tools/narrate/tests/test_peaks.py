@@ -0,0 +1,92 @@
+import json
+
+import numpy as np
+
+from peaks import PeaksBuilder
+
+RATE = 1000  # 10-sample windows
+
+
+def build(*chunks: np.ndarray) -> PeaksBuilder:
+    builder = PeaksBuilder(RATE)
+    for _ in builder.tap(chunks):
+        pass
+    return builder
+
+
+def ramp(n: int) -> np.ndarray:
+    return np.linspace(-0.5, 0.5, n, dtype=np.float32)
+
+
+def test_tap_passes_chunks_through_unchanged():
+    chunks = [ramp(25), ramp(7)]
+    builder = PeaksBuilder(RATE)
+    out = list(builder.tap(iter(chunks)))
+    assert all(a is b for a, b in zip(out, chunks))
+    assert builder.samples == 32
+
+
+def test_schema_matches_audiowaveform_v2():
+    doc = build(ramp(95)).to_json(bars=4)
+    assert doc["version"] == 2
+    assert doc["channels"] == 1
+    assert doc["bits"] == 8
+    assert doc["sample_rate"] == RATE
+    assert doc["samples"] == 95
+    assert len(doc["data"]) == 2 * doc["length"]
+    assert all(isinstance(v, int) for v in doc["data"])
+    # 10 windows (the last one partial) fold into 4 bars of 3 windows each.
+    assert doc["samples_per_pixel"] == 30
+    assert doc["length"] == 4
+
+
+def test_length_times_samples_per_pixel_overshoots_exact_samples():
+    doc = build(ramp(2401)).to_json(bars=4)
+    assert doc["length"] * doc["samples_per_pixel"] > doc["samples"] == 2401
+
+
+def test_int8_quantization_scales_loudest_peak_to_127():
+    audio = np.zeros(40, dtype=np.float32)
+    audio[5] = 0.25
+    audio[15] = -0.5
+    audio[25] = 0.1
+    doc = build(audio).to_json(bars=4)
+    assert doc["data"] == [0, 64, -127, 0, 0, 25, 0, 0]
+    assert min(doc["data"]) >= -128 and max(doc["data"]) <= 127
+
+
+def test_silence_does_not_divide_by_zero():
+    doc = build(np.zeros(30, dtype=np.float32)).to_json(bars=3)
+    assert doc["data"] == [0] * 6
+
+
+def test_empty_input_still_writes_one_bar():
+    doc = build().to_json()
+    assert doc["length"] == 1
+    assert doc["samples"] == 0
+    assert doc["data"] == [0, 0]
+
+
+def test_buckets_do_not_depend_on_chunk_boundaries():
+    rng = np.random.default_rng(0)
+    audio = rng.uniform(-1, 1, 1234).astype(np.float32)
+    whole = build(audio).to_json(bars=16)
+    # Chunks that split windows at odd offsets, including empty ones.
+    cuts = [0, 3, 3, 17, 250, 251, 999, 1234]
+    pieces = [audio[a:b] for a, b in zip(cuts, cuts[1:])]
+    assert build(*pieces).to_json(bars=16) == whole
+
+
+def test_peak_in_partial_last_window_is_kept():
+    audio = np.zeros(23, dtype=np.float32)
+    audio[-1] = -0.8
+    doc = build(audio[:12], audio[12:]).to_json(bars=3)
+    assert doc["data"][-2] == -127
+
+
+def test_write_is_compact_json(tmp_path):
+    path = tmp_path / "peaks" / "post.peaks.json"
+    build(ramp(50)).write(path, bars=5)
+    text = path.read_text(encoding="utf-8")
+    assert " " not in text
+    assert json.loads(text)["length"] == 5
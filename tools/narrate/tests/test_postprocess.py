@@ -0,0 +1,94 @@
+import numpy as np
+import pytest
+
+from postprocess import PostProcessor, db_to_amplitude, window_rms
+
+RATE = 1000  # 10-sample windows keep the arithmetic readable
+WINDOW = 10
+
+
+def tone(seconds: float, amplitude: float = 0.1) -> np.ndarray:
+    n = int(RATE * seconds)
+    # Square wave: RMS equals the amplitude exactly.
+    return np.where(np.arange(n) % 2, amplitude, -amplitude).astype(np.float32)
+
+
+def silence(seconds: float) -> np.ndarray:
+    return np.zeros(int(RATE * seconds), dtype=np.float32)
+
+
+def render(processor: PostProcessor, *chunks: np.ndarray) -> np.ndarray:
+    out = list(processor.run(chunks))
+    return np.concatenate(out) if out else np.zeros(0, dtype=np.float32)
+
+
+def test_window_rms_includes_partial_last_window():
+    audio = np.array([1, -1] * 5 + [0.5, -0.5, 0.5], dtype=np.float32)
+    np.testing.assert_allclose(window_rms(audio, WINDOW), [1.0, 0.5])
+
+
+def test_db_to_amplitude():
+    assert db_to_amplitude(0) == 1.0
+    assert db_to_amplitude(-20) == pytest.approx(0.1)
+
+
+def test_pause_across_chunks_is_capped():
+    processor = PostProcessor(RATE, max_pause=0.2, target_db=None)
+    out = render(processor, tone(0.1), silence(1.0), silence(1.0), tone(0.1))
+    # 0.1 s of speech on each side plus a 0.2 s pause.
+    assert len(out) == 400
+    assert processor.samples_in == 2200
+    assert processor.samples_out == 400
+
+
+def test_pause_inside_chunk_is_capped_and_keeps_speech():
+    processor = PostProcessor(RATE, max_pause=0.2, target_db=None)
+    chunk = np.concatenate((tone(0.1), silence(1.0), tone(0.1)))
+    out = render(processor, chunk)
+    assert len(out) == 400
+    assert np.count_nonzero(out) == 200
+
+
+def test_short_pauses_are_untouched():
+    processor = PostProcessor(RATE, max_pause=0.5, target_db=None)
+    chunk = np.concatenate((tone(0.1), silence(0.3), tone(0.1)))
+    np.testing.assert_array_equal(render(processor, chunk), chunk)
+
+
+def test_leading_and_trailing_silence_trimmed_to_half_the_cap():
+    processor = PostProcessor(RATE, max_pause=0.2, target_db=None)
+    out = render(processor, np.concatenate((silence(1.0), tone(0.1), silence(1.0))))
+    assert len(out) == 100 + 100 + 100
+
+
+def test_all_silence_passes_through():
+    processor = PostProcessor(RATE, max_pause=0.2)
+    out = render(processor, silence(1.0))
+    assert len(out) == 1000
+
+
+def test_no_max_pause_disables_trimming():
+    processor = PostProcessor(RATE, max_pause=0, target_db=None)
+    chunk = np.concatenate((silence(1.0), tone(0.1), silence(1.0)))
+    np.testing.assert_array_equal(render(processor, chunk), chunk)
+
+
+def test_speech_is_normalized_to_target():
+    processor = PostProcessor(RATE, max_pause=0, target_db=-20.0)
+    out = render(processor, tone(0.5, amplitude=0.01))
+    assert float(np.sqrt(np.mean(np.square(out)))) == pytest.approx(0.1, rel=1e-3)
+
+
+def test_gain_is_limited_by_peak_ceiling():
+    processor = PostProcessor(RATE, max_pause=0, target_db=0.0)
+    out = render(processor, tone(0.5, amplitude=0.5))
+    assert float(np.max(np.abs(out))) == pytest.approx(db_to_amplitude(-1.0), rel=1e-3)
+
+
+def test_gain_is_smoothed_between_chunks():
+    processor = PostProcessor(RATE, max_pause=0, target_db=-20.0)
+    first = np.concatenate(list(processor.process(tone(0.2, amplitude=0.1))))
+    second = np.concatenate(list(processor.process(tone(0.2, amplitude=0.01))))
+    # The quiet chunk moves 30% of the way from gain 1 to gain 10.
+    assert float(np.max(first)) == pytest.approx(0.1)
+    assert float(np.max(second)) == pytest.approx(0.01 * (1 + 0.3 * 9), rel=1e-3)
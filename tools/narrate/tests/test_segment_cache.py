@@ -0,0 +1,43 @@
+import os
+
+import numpy as np
+
+from segment_cache import SegmentCache, segment_key
+
+
+def test_key_depends_on_every_parameter():
+    base = segment_key("Olá.", "pf_dora", "p", 1.0, "kokoro")
+    assert segment_key("Olá.", "pf_dora", "p", 1, "kokoro") == base
+    for other in [("Oi.", "pf_dora", "p", 1.0, "kokoro"),
+                  ("Olá.", "pm_alex", "p", 1.0, "kokoro"),
+                  ("Olá.", "pf_dora", "e", 1.0, "kokoro"),
+                  ("Olá.", "pf_dora", "p", 1.1, "kokoro"),
+                  ("Olá.", "pf_dora", "p", 1.0, "onnx")]:
+        assert segment_key(*other) != base
+
+
+def test_round_trip_and_stats(tmp_path):
+    cache = SegmentCache(tmp_path, max_bytes=10**6)
+    audio = np.linspace(-1, 1, 100, dtype=np.float32)
+    assert cache.get("ab" * 32) is None
+    cache.put("ab" * 32, audio)
+    np.testing.assert_array_equal(cache.get("ab" * 32), audio)
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert not list(tmp_path.rglob("*.tmp"))
+
+
+def test_evict_drops_least_recently_used(tmp_path):
+    cache = SegmentCache(tmp_path, max_bytes=0)
+    keys = [f"{i:02d}" * 32 for i in range(3)]
+    for age, key in enumerate(keys):
+        cache.put(key, np.zeros(1000, dtype=np.float32))
+        path = tmp_path / key[:2] / f"{key}.npy"
+        os.utime(path, (1000 + age, 1000 + age))
+    size = (tmp_path / keys[0][:2] / f"{keys[0]}.npy").stat().st_size
+    cache.max_bytes = 2 * size
+
+    cache.get(keys[0])  # a hit makes the oldest segment the newest
+    assert cache.evict() == 1
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]) is not None
+    assert cache.get(keys[2]) is not None
@@ -0,0 +1,140 @@
+import io
+import subprocess
+
+import numpy as np
+import pytest
+
+import narrate
+from narrate import StreamEncoder, encode_file
+
+
+class _Stdin(io.BytesIO):
+    def __init__(self, broken: bool):
+        super().__init__()
+        self.broken = broken
+        self.data = b""
+
+    def write(self, data):
+        if self.broken:
+            raise BrokenPipeError
+        return super().write(data)
+
+    def close(self):
+        if not self.closed:
+            self.data = self.getvalue()
+        super().close()
+
+
+class FakeFfmpeg:
+    """Stands in for `subprocess.Popen(ffmpeg ...)`.
+
+    Like ffmpeg, it creates its output files as soon as it starts; it exits
+    with `returncode` once stdin is closed, or -9 when killed.
+    """
+
+    returncode_on_exit = 0
+    broken_pipe = False
+    instances: list["FakeFfmpeg"] = []
+
+    def __init__(self, cmd, stdin, stderr):
+        self.cmd = cmd
+        self.stdin = _Stdin(self.broken_pipe)
+        self.stderr = io.BytesIO(b"ffmpeg: boom" if self.returncode_on_exit else b"")
+        self.returncode = None
+        self.killed = False
+        for arg in cmd:
+            if arg.endswith(".part"):
+                with open(arg, "wb") as f:
+                    f.write(b"encoded")
+        type(self).instances.append(self)
+
+    def poll(self):
+        return self.returncode
+
+    def wait(self):
+        if self.returncode is None:
+            self.returncode = -9 if self.killed else self.returncode_on_exit
+        return self.returncode
+
+    def kill(self):
+        self.killed = True
+
+
+@pytest.fixture
+def ffmpeg(monkeypatch):
+    fake = type("Ffmpeg", (FakeFfmpeg,), {"instances": []})
+    monkeypatch.setattr(narrate.subprocess, "Popen", fake)
+    return fake
+
+
+def outputs(tmp_path):
+    return [(tmp_path / "out" / "post.mp3", ["-c:a", "libmp3lame"]),
+            (tmp_path / "out" / "post.opus", ["-c:a", "libopus"])]
+
+
+def files(tmp_path):
+    return sorted(p.name for p in (tmp_path / "out").iterdir())
+
+
+def test_chunks_are_piped_as_float32_and_parts_renamed(ffmpeg, tmp_path):
+    encoder = StreamEncoder(outputs(tmp_path))
+    assert files(tmp_path) == ["post.mp3.part", "post.opus.part"]
+
+    chunks = [np.linspace(-1, 1, 5), np.array([0.5], dtype=np.float32)]
+    for chunk in chunks:
+        encoder.write(chunk)
+    encoder.finish()
+
+    proc = ffmpeg.instances[0]
+    expected = np.concatenate(chunks).astype("<f4").tobytes()
+    assert proc.stdin.data == expected
+    assert encoder.samples == 6
+    assert proc.cmd[proc.cmd.index("-f") + 1] == "f32le"
+    assert files(tmp_path) == ["post.mp3", "post.opus"]
+
+
+def test_nonzero_exit_leaves_no_output(ffmpeg, tmp_path):
+    ffmpeg.returncode_on_exit = 1
+    encoder = StreamEncoder(outputs(tmp_path))
+    encoder.write(np.zeros(10, dtype=np.float32))
+
+    with pytest.raises(subprocess.CalledProcessError) as raised:
+        encoder.finish()
+
+    assert raised.value.returncode == 1
+    assert raised.value.stderr == b"ffmpeg: boom"
+    assert files(tmp_path) == []
+
+
+def test_ffmpeg_dying_mid_stream_raises_and_cleans_up(ffmpeg, tmp_path):
+    ffmpeg.returncode_on_exit = 1
+    ffmpeg.broken_pipe = True
+    encoder = StreamEncoder(outputs(tmp_path))
+
+    with pytest.raises(subprocess.CalledProcessError):
+        encoder.write(np.zeros(10, dtype=np.float32))
+
+    assert files(tmp_path) == []
+
+
+def test_abort_kills_ffmpeg_and_removes_parts(ffmpeg, tmp_path):
+    encoder = StreamEncoder(outputs(tmp_path))
+    encoder.write(np.zeros(10, dtype=np.float32))
+    encoder.abort()
+
+    assert ffmpeg.instances[0].killed
+    assert files(tmp_path) == []
+
+
+def test_encode_file_failure_leaves_no_output(monkeypatch, tmp_path):
+    def run(cmd, check):
+        for arg in cmd:
+            if arg.endswith(".part"):
+                open(arg, "wb").close()
+        raise subprocess.CalledProcessError(1, cmd)
+
+    monkeypatch.setattr(narrate.subprocess, "run", run)
+    with pytest.raises(subprocess.CalledProcessError):
+        encode_file(tmp_path / "in.wav", outputs(tmp_path))
+
+    assert files(tmp_path) == []